@@ -1,3 +1,4 @@
+import asyncio
 import os
 import logging
 from pathlib import Path
@@ -6,6 +7,14 @@ import nextcord
 from nextcord.ext import commands
 from dotenv import load_dotenv
 
+from utils.command_sync import sync_commands
+from utils.cache_profile import bot_options, profile_from_env
+from utils.loop_monitor import LoopLagMonitor
+from utils.metrics import install_ratelimit_listeners, metrics_port_from_env, start_metrics_server
+from utils import persistence, startup, tracing
+from utils.usage import usage
+from utils import storage
+
 # Load .env if present
 load_dotenv()
 
@@ -16,28 +25,87 @@ logging.basicConfig(
 )
 logger = logging.getLogger("reaction-roles-bot")
 
+# Cache profile (CACHE_PROFILE=full|lean|minimal); see utils/cache_profile.py
+CACHE_PROFILE = profile_from_env()
+
 # Intents
 intents = nextcord.Intents.default()
 intents.guilds = True
-intents.members = True
+# Reaction adds carry the member and removals fetch it on demand, so the
+# members intent (and member chunking) is only needed for the full cache.
+intents.members = CACHE_PROFILE == "full"
 intents.reactions = True
 # message_content not required for slash + reactions
 intents.message_content = False
 
+# Sharding: SHARD_COUNT (+ optional SHARD_IDS) pins this process to a shard range,
+# as set by launcher.py; AUTO_SHARD=1 lets Discord pick the shard count.
+SHARD_COUNT = os.getenv("SHARD_COUNT")
+SHARD_IDS = os.getenv("SHARD_IDS")
+WORKER_ID = os.getenv("WORKER_ID")
+
+if WORKER_ID is not None:
+    logger = logging.getLogger(f"reaction-roles-bot.worker{WORKER_ID}")
+
 # Bot
-bot = commands.Bot(
-    intents=intents
-)
+if SHARD_COUNT:
+    shard_count = int(SHARD_COUNT)
+    shard_ids = [int(s) for s in SHARD_IDS.split(",")] if SHARD_IDS else list(range(shard_count))
+    bot = commands.AutoShardedBot(
+        intents=intents, shard_count=shard_count, shard_ids=shard_ids, **bot_options(intents, CACHE_PROFILE)
+    )
+    storage.configure_shards(shard_ids, shard_count)
+    logger.info(f"Running shards {shard_ids} of {shard_count}")
+elif os.getenv("AUTO_SHARD") == "1":
+    bot = commands.AutoShardedBot(intents=intents, **bot_options(intents, CACHE_PROFILE))
+else:
+    bot = commands.Bot(
+        intents=intents,
+        **bot_options(intents, CACHE_PROFILE)
+    )
+
+# Watches for handlers that block the event loop (and with it, gateway heartbeats)
+loop_monitor = LoopLagMonitor(threshold_ms=float(os.getenv("LOOP_LAG_THRESHOLD_MS", "250")))
+
+# Prometheus text endpoint; disabled unless METRICS_PORT is set
+install_ratelimit_listeners(bot)
+METRICS_PORT = metrics_port_from_env()
 
 COGS = [
     "cogs.setup",
     "cogs.react_roles",
+    "cogs.panel_cleanup",
     "cogs.error_handler",
 ]
 
+startup.PROFILE.mark("imports")
+
+@bot.event
+async def on_connect():
+    startup.mark_once("connect")
+    # Replaces the default on_connect, which re-syncs every command on each start
+    try:
+        await sync_commands(bot)
+    except Exception as e:
+        logger.exception(f"Application command sync failed: {e}")
+    startup.mark_once("command sync")
+
 @bot.event
 async def on_ready():
+    if startup.mark_once("ready"):
+        logger.info(f"Startup: {startup.PROFILE.report()}")
     logger.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
+    persistence.start(asyncio.get_running_loop())
+    logger.info(
+        f"Cache profile '{CACHE_PROFILE}': {len(bot.guilds)} guilds, "
+        f"{len(bot.users)} cached users, RSS {startup.rss_mb():.1f} MiB"
+    )
+    loop_monitor.start()
+    if METRICS_PORT and not getattr(bot, "_metrics_runner", None):
+        try:
+            bot._metrics_runner = await start_metrics_server(METRICS_PORT, os.getenv("METRICS_HOST", "127.0.0.1"))
+        except Exception as e:
+            logger.exception(f"Failed to start metrics endpoint: {e}")
     
 
 def main():
@@ -48,15 +116,24 @@ def main():
     for cog in COGS:
         try:
             bot.load_extension(cog)
+            startup.PROFILE.mark(f"load {cog}")
             logger.info(f"Loaded extension: {cog}")
         except Exception as e:
             logger.exception(f"Failed to load extension {cog}: {e}")
 
+    # JSON stores are read here, before the loop starts; afterwards they are written behind
+    persistence.preload()
+
     token = os.getenv("DISCORD_TOKEN")
     if not token:
         logger.error("DISCORD_TOKEN is not set. Put it in your environment or .env file.")
         return
-    bot.run(token)
+    try:
+        bot.run(token)
+    finally:
+        usage.flush()
+        persistence.flush_all()
+        tracing.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+
+import nextcord
+from nextcord.ext import commands, tasks
+
+from utils import storage
+from utils.reactors import reactors
+
+logger = logging.getLogger(__name__)
+
+# Compaction sweep: drops panels whose guild, channel, roles or message are gone
+# (e.g. deleted while the bot was offline). Message checks cost one REST call each.
+COMPACT_INTERVAL_H = float(os.getenv("PANEL_COMPACT_INTERVAL_H", "24"))
+COMPACT_RATE_PER_S = float(os.getenv("PANEL_COMPACT_RATE_PER_S", "1"))
+COMPACT_START_DELAY_S = 15 * 60
+
+class PanelCleanupCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.compact.change_interval(hours=COMPACT_INTERVAL_H)
+        self.compact.start()
+
+    def cog_unload(self):
+        self.compact.cancel()
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: nextcord.RawMessageDeleteEvent):
+        if storage.delete_message_mappings([payload.message_id]):
+            await reactors.drop_messages([payload.message_id])
+            logger.info(f"Panel {payload.message_id} deleted; mapping removed")
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: nextcord.RawBulkMessageDeleteEvent):
+        removed = storage.delete_message_mappings(payload.message_ids)
+        if removed:
+            await reactors.drop_messages(payload.message_ids)
+            logger.info(f"{removed} panel(s) removed by bulk delete in channel {payload.channel_id}")
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: nextcord.abc.GuildChannel):
+        removed = storage.delete_channel_mappings(channel.id)
+        if removed:
+            logger.info(f"{removed} panel(s) removed with channel {channel.id}")
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: nextcord.Role):
+        touched = storage.remove_role_from_mappings(role.id)
+        if touched:
+            logger.info(f"Role {role.id} unmapped from {touched} panel(s)")
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: nextcord.Guild):
+        removed = storage.delete_guild_mappings(guild.id)
+        if removed:
+            logger.info(f"Left guild {guild.id}; {removed} panel(s) removed")
+
+    async def _message_exists(self, channel, message_id: int) -> bool:
+        try:
+            await channel.fetch_message(message_id)
+        except nextcord.NotFound:
+            return False
+        except nextcord.HTTPException:
+            pass  # no access or transient error: keep the panel
+        return True
+
+    @tasks.loop(hours=24)
+    async def compact(self):
+        removed = 0
+        interval = 1.0 / COMPACT_RATE_PER_S if COMPACT_RATE_PER_S > 0 else 0.0
+        for guild_id in storage.indexed_guild_ids():
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                removed += storage.delete_guild_mappings(guild_id)
+                continue
+            if guild.unavailable:
+                continue
+            for message_id in storage.guild_message_ids(guild_id):
+                entry = storage.get_message_mapping(message_id)
+                if entry is None:
+                    continue
+                for role_id in set(entry.get("mappings", {}).values()):
+                    if guild.get_role(int(role_id)) is None:
+                        storage.remove_role_from_mappings(int(role_id))
+                channel = guild.get_channel_or_thread(int(entry.get("channel_id", 0)))
+                if channel is None or storage.get_message_mapping(message_id) is None:
+                    removed += storage.delete_message_mappings([message_id])
+                    continue
+                if interval:
+                    await asyncio.sleep(interval)
+                if not await self._message_exists(channel, message_id):
+                    removed += storage.delete_message_mappings([message_id])
+        # Reactions recorded on panels that no longer exist (channel, guild or role deletions)
+        stale = [
+            mid for mid, guild_id in await reactors.panels()
+            if storage.owns_guild(guild_id) and storage.get_message_mapping(mid) is None
+        ]
+        if stale:
+            await reactors.drop_messages(stale)
+        logger.info(f"Panel compaction finished: {removed} stale panel(s) removed, {len(stale)} reactor list(s) dropped")
+
+    @compact.before_loop
+    async def before_compact(self):
+        await self.bot.wait_until_ready()
+        # Let guilds finish streaming in (and avoid a sweep on every restart in a crash loop)
+        await asyncio.sleep(COMPACT_START_DELAY_S)
+
+def setup(bot: commands.Bot):
+    bot.add_cog(PanelCleanupCog(bot))
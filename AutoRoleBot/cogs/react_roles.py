@@ -1,10 +1,23 @@
 from __future__ import annotations
 
+import logging
+
 import nextcord
 from nextcord.ext import commands
 
 from utils.storage import get_message_mapping
+from utils.bulk_revoke import bulk_revoker, revoke_panel_grants
+from utils.dedup import seen
+from utils.dispatcher import dispatcher
 from utils.embeds import error as error_embed
+from utils.reactors import reactors
+from utils.metrics import EVENTS_RECEIVED, EVENTS_IGNORED, ROLE_OPS, ROLE_OP_FAILURES, ROLE_OPS_SKIPPED, failure_status
+from utils.role_breaker import role_breaker
+from utils.timed_roles import expiry
+from utils.tracing import span, traced
+from utils.usage import ADDS, FAILURES, REMOVES, usage
+
+logger = logging.getLogger(__name__)
 
 def key_from_payload(emoji: nextcord.PartialEmoji) -> str:
     if emoji.id:
@@ -15,13 +28,76 @@ class ReactionRolesCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    def cog_unload(self):
+        bulk_revoker.stop()
+        dispatcher.stop()
+        expiry.stop()
+        usage.stop()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        expiry.start(self.bot)
+        usage.start()
+
+    async def _notify_role_blocked(self, guild: nextcord.Guild, role: nextcord.Role, created_by: int | None):
+        """Tell the panel creator (or the server owner) once that a role can't be assigned."""
+        embed = error_embed(
+            "Reaction Role Paused",
+            f"I couldn't assign the role **{role.name}** in **{guild.name}** due to missing permissions. "
+            f"Please ensure my top role is higher than **{role.name}** and I have 'Manage Roles'.\n\n"
+            "Reactions for this role are ignored until the server's roles change; I'll also retry periodically."
+        )
+        for user_id in dict.fromkeys(u for u in (created_by, guild.owner_id) if u):
+            try:
+                user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+                await user.send(embed=embed)
+                return
+            except Exception:
+                continue
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: nextcord.Role, after: nextcord.Role):
+        # Role order or permissions changed; blocked roles may be assignable now
+        role_breaker.reset_guild(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: nextcord.Member, after: nextcord.Member):
+        # Only delivered with the members intent (CACHE_PROFILE=full); otherwise a role given
+        # to the bot is picked up by on_guild_role_update or the breaker's periodic probe.
+        if after.id == self.bot.user.id and before.roles != after.roles:
+            role_breaker.reset_guild(after.guild.id)
+
+    # Add/remove events are queued per (guild, member) so one member's events
+    # are handled in order while different members run in parallel.
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: nextcord.RawReactionActionEvent):
+        EVENTS_RECEIVED.inc(event="reaction_add")
         if payload.user_id == self.bot.user.id:
             return
+        # Replayed after a resume? An add is only "seen" until the matching remove arrives.
+        key = (payload.message_id, payload.user_id, key_from_payload(payload.emoji))
+        if not seen.first("reaction_add", *key):
+            return
+        seen.forget("reaction_remove", *key)
+        await dispatcher.submit((payload.guild_id, payload.user_id), self._handle_add, payload)
 
-        data = get_message_mapping(payload.message_id)
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: nextcord.RawReactionActionEvent):
+        EVENTS_RECEIVED.inc(event="reaction_remove")
+        if payload.user_id == self.bot.user.id:
+            return
+        key = (payload.message_id, payload.user_id, key_from_payload(payload.emoji))
+        if not seen.first("reaction_remove", *key):
+            return
+        seen.forget("reaction_add", *key)
+        await dispatcher.submit((payload.guild_id, payload.user_id), self._handle_remove, payload)
+
+    @traced("reaction_add")
+    async def _handle_add(self, payload: nextcord.RawReactionActionEvent):
+        with span("storage_read"):
+            data = get_message_mapping(payload.message_id)
         if not data:
+            EVENTS_IGNORED.inc(event="reaction_add")
             return
 
         # Ignore cross-guild (shouldn't happen) or DMs
@@ -38,11 +114,13 @@ class ReactionRolesCog(commands.Cog):
         if guild is None:
             return
 
-        member = guild.get_member(payload.user_id)
+        # The add event carries the member, so no cache or fetch is needed
+        member = payload.member or guild.get_member(payload.user_id)
         if member is None:
             # fetch fallback
             try:
-                member = await guild.fetch_member(payload.user_id)
+                with span("member_fetch"):
+                    member = await guild.fetch_member(payload.user_id)
             except Exception:
                 return
 
@@ -54,28 +132,37 @@ class ReactionRolesCog(commands.Cog):
         if role in member.roles:
             return
 
-        try:
-            await member.add_roles(role, reason=f"Reaction role via message {payload.message_id}")
-        except nextcord.Forbidden:
-            # Try DM user with a friendly embed (best-effort)
-            try:
-                await member.send(embed=error_embed(
-                    "Role Assignment Failed",
-                    f"I couldn't assign the role {role.mention} due to missing permissions. "
-                    f"Please ask an admin to ensure my top role is higher than {role.mention} and I have 'Manage Roles'."
-                ))
-            except Exception:
-                pass
-        except Exception:
-            pass
-
-    @commands.Cog.listener()
-    async def on_raw_reaction_remove(self, payload: nextcord.RawReactionActionEvent):
-        if payload.user_id == self.bot.user.id:
+        if not role_breaker.allow(guild.id, role.id):
+            ROLE_OPS_SKIPPED.inc(op="add")
             return
 
-        data = get_message_mapping(payload.message_id)
+        try:
+            ROLE_OPS.inc(op="add")
+            with span("role_edit"):
+                await member.add_roles(role, reason=f"Reaction role via message {payload.message_id}")
+            role_breaker.success(guild.id, role.id)
+            usage.record(guild.id, payload.message_id, role.id, ADDS)
+            with span("record_reactor"):
+                await reactors.add(payload.message_id, key, member.id, guild.id, role.id)
+            if data.get("ttl_s"):
+                with span("schedule_expiry"):
+                    await expiry.grant(guild.id, member.id, role.id, payload.message_id, key, data["ttl_s"])
+        except nextcord.Forbidden as e:
+            ROLE_OP_FAILURES.inc(op="add", status=failure_status(e))
+            usage.record(guild.id, payload.message_id, role.id, FAILURES)
+            # Notify the admins once instead of DMing every member who reacts
+            if role_breaker.forbidden(guild.id, role.id):
+                await self._notify_role_blocked(guild, role, data.get("created_by"))
+        except Exception as e:
+            ROLE_OP_FAILURES.inc(op="add", status=failure_status(e))
+            usage.record(guild.id, payload.message_id, role.id, FAILURES)
+
+    @traced("reaction_remove")
+    async def _handle_remove(self, payload: nextcord.RawReactionActionEvent):
+        with span("storage_read"):
+            data = get_message_mapping(payload.message_id)
         if not data:
+            EVENTS_IGNORED.inc(event="reaction_remove")
             return
 
         if payload.guild_id != data.get("guild_id"):
@@ -90,11 +177,16 @@ class ReactionRolesCog(commands.Cog):
         if guild is None:
             return
 
+        if data.get("ttl_s"):
+            await expiry.cancel(guild.id, payload.user_id, int(role_id))
+        await reactors.remove(payload.message_id, key, payload.user_id)
+
         member = guild.get_member(payload.user_id)
         if member is None:
             # fetch fallback
             try:
-                member = await guild.fetch_member(payload.user_id)
+                with span("member_fetch"):
+                    member = await guild.fetch_member(payload.user_id)
             except Exception:
                 return
 
@@ -106,10 +198,63 @@ class ReactionRolesCog(commands.Cog):
         if role not in member.roles:
             return
 
+        if not role_breaker.allow(guild.id, role.id):
+            ROLE_OPS_SKIPPED.inc(op="remove")
+            return
+
         try:
-            await member.remove_roles(role, reason=f"Reaction role removal via message {payload.message_id}")
-        except Exception:
-            pass
+            ROLE_OPS.inc(op="remove")
+            with span("role_edit"):
+                await member.remove_roles(role, reason=f"Reaction role removal via message {payload.message_id}")
+            role_breaker.success(guild.id, role.id)
+            usage.record(guild.id, payload.message_id, role.id, REMOVES)
+        except nextcord.Forbidden as e:
+            ROLE_OP_FAILURES.inc(op="remove", status=failure_status(e))
+            usage.record(guild.id, payload.message_id, role.id, FAILURES)
+            if role_breaker.forbidden(guild.id, role.id):
+                await self._notify_role_blocked(guild, role, data.get("created_by"))
+        except Exception as e:
+            ROLE_OP_FAILURES.inc(op="remove", status=failure_status(e))
+            usage.record(guild.id, payload.message_id, role.id, FAILURES)
+
+    async def _revoke_cleared(self, message_id: int, guild_id: int | None, keys: list[str] | None, event: str):
+        """Queue bulk revocation for the roles behind ``keys`` (None = every emoji on the panel)."""
+        EVENTS_RECEIVED.inc(event=event)
+        # Clears are not deduplicated: a replayed clear finds no holders left, and a
+        # second genuine clear of the same panel must still revoke.
+        data = get_message_mapping(message_id)
+        if not data or guild_id != data.get("guild_id"):
+            EVENTS_IGNORED.inc(event=event)
+            return
+
+        mappings = data.get("mappings", {})
+        cleared = set(mappings) if keys is None else set(keys) & set(mappings)
+        # A clear sends no per-user removes; without this, reacting again within
+        # DEDUP_TTL_S would be dropped as a replay of the earlier add.
+        seen.forget_group("reaction_add", message_id, where=lambda ids: ids[2] in cleared)
+
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        # Only members the panel granted the role to lose it; a member who still
+        # holds it through another panel or emoji keeps it.
+        queued = await revoke_panel_grants(
+            guild, message_id, cleared,
+            reason=f"Reactions cleared on reaction role message {message_id}",
+            on_blocked=lambda g, r: self._notify_role_blocked(g, r, data.get("created_by")),
+        )
+        if queued:
+            logger.info(f"Reactions cleared on panel {message_id}; revoking roles from {queued} member(s)")
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear(self, payload: nextcord.RawReactionClearEvent):
+        await self._revoke_cleared(payload.message_id, payload.guild_id, None, "reaction_clear")
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear_emoji(self, payload: nextcord.RawReactionClearEmojiEvent):
+        await self._revoke_cleared(
+            payload.message_id, payload.guild_id, [key_from_payload(payload.emoji)], "reaction_clear_emoji"
+        )
 
 def setup(bot: commands.Bot):
     bot.add_cog(ReactionRolesCog(bot))
\ No newline at end of file
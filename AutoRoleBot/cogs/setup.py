@@ -1,84 +1,36 @@
 from __future__ import annotations
 
+import asyncio
+import csv
+import io
+import json
+import os
 import re
-from typing import Dict, Tuple, Optional, List
+import time
+from typing import Any, Dict, Iterator, Tuple, Optional, List
 
 import nextcord
 from nextcord.ext import commands
 
 from utils import embeds
-from utils.storage import set_message_mapping
-
-TEMPLATES: Dict[str, Dict[str, object]] = {
-    "minimal": {
-        "label": "Minimal",
-        "title": "Choose Your Roles",
-        "description": (
-            "React to get roles. Add or remove your reaction at any time to toggle the role.\n\n"
-            "Notes:\n"
-            "• These roles may unlock channels or pings.\n"
-            "• You can choose multiple roles.\n"
-            "• If something doesn't work, ping an admin."
-        ),
-        "example_pairs": [
-            ("🔔", "Updates"),
-            ("🎉", "Events"),
-            ("📢", "Announcements"),
-        ],
-    },
-    "notifications": {
-        "label": "Notifications",
-        "title": "Pick Your Notifications",
-        "description": (
-            "Choose which announcements you want to be pinged for by reacting below.\n\n"
-            "• Events: Get notified about events and streams.\n"
-            "• Updates: Get news, patch notes, and changelogs.\n"
-            "• Giveaways: Get pinged for giveaways and contests.\n\n"
-            "Remove a reaction to stop getting those pings."
-        ),
-        "example_pairs": [
-            ("🎟️", "Giveaways"),
-            ("🛠️", "Updates"),
-            ("📅", "Events"),
-        ],
-    },
-    "games": {
-        "label": "Game Roles",
-        "title": "Select Your Game Roles",
-        "description": (
-            "React for the games you play to find teammates and unlock LFG channels.\n\n"
-            "• Choose as many as you like.\n"
-            "• Remove a reaction to leave the role.\n"
-            "• New games are added regularly—ask staff if something is missing!"
-        ),
-        "example_pairs": [
-            ("🎮", "FPS"),
-            ("⚔️", "RPG"),
-            ("🏁", "Racing"),
-        ],
-    },
-    "pronouns": {
-        "label": "Pronoun Roles",
-        "title": "Choose Your Pronouns",
-        "description": (
-            "Pick pronoun roles so others know how to address you. You may choose multiple.\n\n"
-            "• React to add a role.\n"
-            "• Remove the reaction to remove the role.\n"
-            "• If you prefer a pronoun not listed, contact a moderator."
-        ),
-        "example_pairs": [
-            ("💬", "He/Him"),
-            ("💖", "She/Her"),
-            ("💜", "They/Them"),
-        ],
-    },
-}
-
+from utils.storage import get_message_mapping, guild_message_ids, set_message_mapping
+from utils.bulk_revoke import revoke_panel_grants
+from utils.dedup import seen
+from utils.metrics import observe_ack
+from utils.tracing import span, traced
+from utils.command_sync import sync_commands
+from utils.timed_roles import format_duration, parse_duration
+from utils.templates import templates
+from utils.usage import ADDS, FAILURES, REMOVES, USAGE_BUCKET_S, USAGE_BUCKETS, current_epoch, usage
 
 CUSTOM_WITH_ID = re.compile(r"^<a?:(?P<name>\w+):(?P<id>\d{15,25})>$")
 CUSTOM_NAME_ONLY = re.compile(r"^<a?:(?P<name>\w+):>$")
 COLON_NAME = re.compile(r"^:(?P<name>\w+):$")
 
+LEGEND_FIELD = "React with"
+MAX_REACTIONS_PER_MESSAGE = 20  # Discord's limit on distinct reactions per message
+PANEL_HOW_IT_WORKS = "• React to add a role\n• Remove your reaction to remove the role\n• You may pick multiple roles"
+
 def parse_emoji_role_lines(text: str) -> Tuple[Dict[str, int], list[str]]:
     """
     Parses lines of 'left:right' where right is a role_id and left can be:
@@ -162,27 +114,8 @@ def resolve_channel_from_text(guild: nextcord.Guild, raw: str) -> Optional[nextc
         return ch if isinstance(ch, nextcord.TextChannel) else None
     return None
 
-def build_template_preview_embed(template_key: str) -> nextcord.Embed:
-    template = TEMPLATES.get(template_key, TEMPLATES["minimal"])
-    title = template["title"] 
-    description = template["description"]  
-    example_pairs: List[tuple[str, str]] = template.get("example_pairs", []) 
-
-    preview = embeds.base(str(title), str(description))
-    if example_pairs:
-        lines = [f"• {em} → @{role}" for em, role in example_pairs]
-        legend = "\n".join(lines)
-        preview.add_field(name="React with", value=legend[:1024], inline=False)
-
-    preview.add_field(
-        name="How it works",
-        value="React to add a role. Remove your reaction to remove the role.",
-        inline=False
-    )
-    return preview
-
 async def format_custom_emoji_str(guild: nextcord.Guild, emoji_id: int) -> str:
-    emoji_obj = await guild.fetch_emoji(emoji_id)
+    emoji_obj = guild.get_emoji(emoji_id) or await guild.fetch_emoji(emoji_id)
     if emoji_obj:
         prefix = "a" if emoji_obj.animated else ""
         return f"<{prefix}:{emoji_obj.name}:{emoji_obj.id}>"
@@ -218,23 +151,254 @@ async def build_role_legend_fields(
     current_len = 0
     for ln in lines:
         if current_len + len(ln) + 1 > 1024 and chunk:
-            fields.append(("React with", "\n".join(chunk)))
+            fields.append((LEGEND_FIELD, "\n".join(chunk)))
             chunk = [ln]
             current_len = len(ln) + 1
         else:
             chunk.append(ln)
             current_len += len(ln) + 1
     if chunk:
-        fields.append(("React with", "\n".join(chunk)))
+        fields.append((LEGEND_FIELD, "\n".join(chunk)))
 
     return fields
 
+def resolve_emoji_names(guild: nextcord.Guild, raw_mappings: Dict[str, int]) -> Tuple[Dict[str, int], list[str]]:
+    """
+    Resolves 'n:<name>' keys from parse_emoji_role_lines to 'e:<id>' using the
+    guild's emojis. Returns (resolved mappings, error messages).
+    """
+    errs: list[str] = []
+    resolved_mappings: Dict[str, int] = {}
+    name_conflicts: list[str] = []
+    if raw_mappings:
+        guild_emojis = list(guild.emojis)
+        lower_index: Dict[str, list[nextcord.Emoji]] = {}
+        exact_index: Dict[str, list[nextcord.Emoji]] = {}
+        for e in guild_emojis:
+            exact_index.setdefault(e.name, []).append(e)
+            lower_index.setdefault(e.name.lower(), []).append(e)
+
+        for key, role_id in raw_mappings.items():
+            if key.startswith("n:"):
+                name = key[2:]
+
+                exact_matches = exact_index.get(name, [])
+                candidate: Optional[nextcord.Emoji] = None
+
+                if len(exact_matches) == 1:
+                    candidate = exact_matches[0]
+                else:
+                    ci_matches = lower_index.get(name.lower(), [])
+                    if len(ci_matches) == 1:
+                        candidate = ci_matches[0]
+
+                if candidate is None:
+                    if not exact_matches and not lower_index.get(name.lower(), []):
+                        errs.append(f"Emoji named '{name}' not found in this server. Use <:name:id> or emoji ID.")
+                    else:
+                        examples = exact_matches or lower_index.get(name.lower(), [])
+                        ids_preview = ", ".join(str(e.id) for e in examples[:5])
+                        more = " ..." if len(examples) > 5 else ""
+                        name_conflicts.append(f"'{name}' matches {len(examples)} emojis. Specify ID. Example IDs: {ids_preview}{more}")
+                    continue
+
+                new_key = f"e:{candidate.id}"
+                if new_key in resolved_mappings or (new_key in raw_mappings and new_key != key):
+                    errs.append(f"Duplicate mapping for emoji '{name}' (ID {candidate.id}).")
+                    continue
+                resolved_mappings[new_key] = role_id
+            else:
+                if key in resolved_mappings:
+                    errs.append(f"Duplicate mapping for emoji key '{key}'.")
+                    continue
+                resolved_mappings[key] = role_id
+
+    return resolved_mappings, errs + name_conflicts
+
+def validate_panel_roles(guild: nextcord.Guild, resolved_mappings: Dict[str, int]) -> list[str]:
+    """Checks that every mapped role exists and the bot can assign it."""
+    errs: list[str] = []
+    if resolved_mappings:
+        for _, role_id in list(resolved_mappings.items()):
+            role = guild.get_role(role_id)
+            if role is None:
+                errs.append(f"Role not found for ID {role_id}.")
+            else:
+                me = guild.me
+                if not me.guild_permissions.manage_roles:
+                    errs.append("Bot lacks 'Manage Roles' permission.")
+                    break
+                if role >= me.top_role:
+                    errs.append(f"Bot's top role must be higher than {role.name} ({role.id}).")
+    return errs
+
+def reaction_for_key(bot: commands.Bot, key: str) -> nextcord.Emoji | nextcord.PartialEmoji | str:
+    """The emoji to react with for a stored mapping key ('e:<id>' or 'u:<emoji>')."""
+    if key.startswith("e:"):
+        emoji_id = int(key.split(":", 1)[1])
+        return bot.get_emoji(emoji_id) or nextcord.PartialEmoji(name="emoji", id=emoji_id, animated=False)
+    return key.split(":", 1)[1]
+
+def mapping_to_lines(bot: commands.Bot, mappings: Dict[str, int]) -> str:
+    """Inverse of parse_emoji_role_lines for stored mappings (used to prefill the edit modal)."""
+    lines = []
+    for key, role_id in mappings.items():
+        emoji = reaction_for_key(bot, key)
+        left = str(emoji) if isinstance(emoji, nextcord.Emoji) else key.split(":", 1)[1]
+        lines.append(f"{left}:{role_id}")
+    return "\n".join(lines)
+
+def diff_mappings(
+    old: Dict[str, int], new: Dict[str, int]
+) -> tuple[List[str], List[str], List[str]]:
+    """(added, removed, remapped) emoji keys between two panel mappings, in mapping order."""
+    added = [k for k in new if k not in old]
+    removed = [k for k in old if k not in new]
+    remapped = [k for k in new if k in old and old[k] != new[k]]
+    return added, removed, remapped
+
+def patch_legend_fields(embed: nextcord.Embed, fields: List[tuple[str, str]]) -> bool:
+    """
+    Replaces the legend fields of an existing panel embed with ``fields``,
+    touching only those whose value changed. Returns True if the embed changed.
+    """
+    legend_idx = [i for i, f in enumerate(embed.fields) if f.name == LEGEND_FIELD]
+    old = [embed.fields[i].value for i in legend_idx]
+    new = [value for _, value in fields]
+    if old == new:
+        return False
+
+    if len(old) == len(new):
+        for i, before, after in zip(legend_idx, old, new):
+            if before != after:
+                embed.set_field_at(i, name=LEGEND_FIELD, value=after, inline=False)
+        return True
+
+    # Legend grew or shrank across the 1024-char chunk boundary: rebuild it in place
+    others = [(f.name, f.value, f.inline) for i, f in enumerate(embed.fields) if i not in legend_idx]
+    insert_at = legend_idx[0] if legend_idx else 0
+    embed.clear_fields()
+    for name, value, inline in others[:insert_at]:
+        embed.add_field(name=name, value=value, inline=inline)
+    for value in new:
+        embed.add_field(name=LEGEND_FIELD, value=value, inline=False)
+    for name, value, inline in others[insert_at:]:
+        embed.add_field(name=name, value=value, inline=inline)
+    return True
+
+def paginate_mappings(mappings: Dict[str, int]) -> List[Dict[str, int]]:
+    """Splits mappings into pages that fit Discord's per-message reaction limit."""
+    items = list(mappings.items())
+    return [dict(items[i:i + MAX_REACTIONS_PER_MESSAGE]) for i in range(0, len(items), MAX_REACTIONS_PER_MESSAGE)] or [{}]
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+SPARK_WIDTH = 48
+
+def sparkline(values: List[int], width: int = SPARK_WIDTH) -> str:
+    """Render counts as a one-line bar chart, summing neighbours to fit ``width``."""
+    if len(values) > width:
+        step = -(-len(values) // width)
+        values = [sum(values[i:i + step]) for i in range(0, len(values), step)]
+    peak = max(values, default=0)
+    if peak == 0:
+        return SPARK_CHARS[0] * len(values)
+    return "".join(SPARK_CHARS[min(len(SPARK_CHARS) - 1, v * len(SPARK_CHARS) // (peak + 1))] for v in values)
+
+def panel_page_title(title: Optional[str], group: Optional[Dict[str, int]] = None) -> str:
+    title = title or "Reaction Roles"
+    if group and group.get("pages", 1) > 1:
+        return f"{title} ({group['page']}/{group['pages']})"
+    return title
+
+async def build_panel_embed(
+    guild: nextcord.Guild,
+    title: Optional[str],
+    description: str,
+    mappings: Dict[str, int],
+    group: Optional[Dict[str, int]] = None,
+    ttl_s: Optional[int] = None
+) -> nextcord.Embed:
+    """
+    One panel message. Pages after the first of a split panel carry only the
+    title (with a page counter) and their legend; the last one explains usage.
+    """
+    page, pages = (group["page"], group["pages"]) if group else (1, 1)
+    embed = embeds.base(panel_page_title(title, group), description if page == 1 else None)
+    with span("legend"):
+        fields = await build_role_legend_fields(guild, mappings)
+    for fname, fval in fields:
+        embed.add_field(name=fname, value=fval, inline=False)
+    if page == pages:
+        how = PANEL_HOW_IT_WORKS
+        if ttl_s:
+            how += f"\n• Roles expire {format_duration(ttl_s)} after you react"
+        embed.add_field(name="How it works", value=how, inline=False)
+    return embed
+
+async def add_panel_reactions(bot: commands.Bot, message: nextcord.Message, mappings: Dict[str, int]) -> list[str]:
+    errors: list[str] = []
+    for key in mappings.keys():
+        try:
+            await message.add_reaction(reaction_for_key(bot, key))
+        except Exception as e:
+            errors.append(f"Failed to add reaction for {key}: {e}")
+    return errors
+
+async def publish_panel(
+    bot: commands.Bot,
+    channel: nextcord.TextChannel,
+    mappings: Dict[str, int],
+    title: Optional[str],
+    description: str,
+    created_by: int,
+    ttl_s: Optional[int] = None
+) -> Tuple[List[nextcord.Message], list[str]]:
+    """
+    Posts a panel, split into pages of MAX_REACTIONS_PER_MESSAGE when needed,
+    stores the pages as one group and adds their reactions. Returns the sent
+    messages and any reaction errors. If a page can't be sent, pages already
+    posted are deleted and the error is raised.
+    """
+    pages = paginate_mappings(mappings)
+    sent: List[nextcord.Message] = []
+    try:
+        with span("send_panel"):
+            for number, page in enumerate(pages, start=1):
+                group = {"page": number, "pages": len(pages)} if len(pages) > 1 else None
+                embed = await build_panel_embed(channel.guild, title, description, page, group, ttl_s)
+                sent.append(await channel.send(embed=embed))
+    except Exception:
+        for message in sent:
+            try:
+                await message.delete()
+            except Exception:
+                pass
+        raise
+
+    with span("storage_write"):
+        for number, (message, page) in enumerate(zip(sent, pages), start=1):
+            set_message_mapping(
+                message_id=message.id,
+                guild_id=message.guild.id,
+                channel_id=message.channel.id,
+                mapping=page,
+                created_by=created_by,
+                title=title,
+                description=description,
+                group={"id": sent[0].id, "page": number, "pages": len(pages)} if len(pages) > 1 else None,
+                ttl_s=ttl_s
+            )
+
+    # Pages are separate messages: add their reactions concurrently
+    with span("add_reactions"):
+        results = await asyncio.gather(*(add_panel_reactions(bot, m, page) for m, page in zip(sent, pages)))
+    return sent, [err for errs in results for err in errs]
+
 class RoleMessageModal(nextcord.ui.Modal):
-    def __init__(self, bot: commands.Bot, template_key: str = "minimal"):
+    def __init__(self, bot: commands.Bot, template_key: Optional[str] = None):
         super().__init__(title="Build Reaction Roles Message")
         self.bot = bot
-        self.template_key = template_key if template_key in TEMPLATES else "minimal"
-        template = TEMPLATES[self.template_key]
+        self.template_key = templates.get(template_key).key
 
         self.title_input = nextcord.ui.TextInput(
             label="Title (optional)",
@@ -267,178 +431,468 @@ class RoleMessageModal(nextcord.ui.Modal):
         self.add_item(self.title_input)
         self.add_item(self.description_input)
         self.add_item(self.pairs_input)
+        self.duration_input = nextcord.ui.TextInput(
+            label="Role Duration (optional)",
+            style=nextcord.TextInputStyle.short,
+            required=False,
+            max_length=20,
+            placeholder="e.g. 12h, 7d or 1d12h — blank keeps roles until unreacted"
+        )
         self.add_item(self.channel_input)
+        self.add_item(self.duration_input)
 
+    @traced("setup_modal")
     async def callback(self, interaction: nextcord.Interaction) -> None:
         assert interaction.guild is not None
 
-        raw_mappings, errs = parse_emoji_role_lines(str(self.pairs_input.value))
-
-        resolved_mappings: Dict[str, int] = {}
-        name_conflicts: list[str] = []
-        if interaction.guild and raw_mappings:
-            guild_emojis = list(interaction.guild.emojis)
-            lower_index: Dict[str, list[nextcord.Emoji]] = {}
-            exact_index: Dict[str, list[nextcord.Emoji]] = {}
-            for e in guild_emojis:
-                exact_index.setdefault(e.name, []).append(e)
-                lower_index.setdefault(e.name.lower(), []).append(e)
-
-            for key, role_id in raw_mappings.items():
-                if key.startswith("n:"):
-                    name = key[2:]
+        with span("parse"):
+            raw_mappings, errs = parse_emoji_role_lines(str(self.pairs_input.value))
 
-                    exact_matches = exact_index.get(name, [])
-                    candidate: Optional[nextcord.Emoji] = None
-
-                    if len(exact_matches) == 1:
-                        candidate = exact_matches[0]
-                    else:
-                        ci_matches = lower_index.get(name.lower(), [])
-                        if len(ci_matches) == 1:
-                            candidate = ci_matches[0]
-
-                    if candidate is None:
-                        if not exact_matches and not lower_index.get(name.lower(), []):
-                            errs.append(f"Emoji named '{name}' not found in this server. Use <:name:id> or emoji ID.")
-                        else:
-                            examples = exact_matches or lower_index.get(name.lower(), [])
-                            ids_preview = ", ".join(str(e.id) for e in examples[:5])
-                            more = " ..." if len(examples) > 5 else ""
-                            name_conflicts.append(f"'{name}' matches {len(examples)} emojis. Specify ID. Example IDs: {ids_preview}{more}")
-                        continue
-
-                    new_key = f"e:{candidate.id}"
-                    if new_key in resolved_mappings or (new_key in raw_mappings and new_key != key):
-                        errs.append(f"Duplicate mapping for emoji '{name}' (ID {candidate.id}).")
-                        continue
-                    resolved_mappings[new_key] = role_id
-                else:
-                    if key in resolved_mappings:
-                        errs.append(f"Duplicate mapping for emoji key '{key}'.")
-                        continue
-                    resolved_mappings[key] = role_id
-
-        errs.extend(name_conflicts)
+        resolved_mappings, resolve_errs = resolve_emoji_names(interaction.guild, raw_mappings)
+        errs.extend(resolve_errs)
 
         channel = resolve_channel_from_text(interaction.guild, str(self.channel_input.value))
         if channel is None:
             errs.append("Invalid channel. Use a channel mention like #channel or the numeric channel ID.")
 
-        if interaction.guild and resolved_mappings:
-            for _, role_id in list(resolved_mappings.items()):
-                role = interaction.guild.get_role(role_id)
-                if role is None:
-                    errs.append(f"Role not found for ID {role_id}.")
-                else:
-                    me = interaction.guild.me
-                    if not me.guild_permissions.manage_roles:
-                        errs.append("Bot lacks 'Manage Roles' permission.")
-                        break
-                    if role >= me.top_role:
-                        errs.append(f"Bot's top role must be higher than {role.name} ({role.id}).")
+        ttl_s = None
+        try:
+            ttl_s = parse_duration(str(self.duration_input.value or ""))
+        except ValueError as e:
+            errs.append(str(e))
+
+        errs.extend(validate_panel_roles(interaction.guild, resolved_mappings))
 
         if errs:
             await interaction.response.send_message(
                 embed=embeds.error("Setup Validation Failed", "\n".join(f"• {e}" for e in errs)),
                 ephemeral=True
             )
+            observe_ack(interaction, "setup_modal")
             return
 
-        template = TEMPLATES.get(self.template_key, TEMPLATES["minimal"])
-        title = (str(self.title_input.value).strip() or str(template["title"])).strip()
-        description = (str(self.description_input.value).strip() or str(template["description"])).strip()
+        template = templates.get(self.template_key)
+        title = (str(self.title_input.value).strip() or template.title).strip()
+        description = (str(self.description_input.value).strip() or template.description).strip()
 
-        preview = embeds.base(title or "Reaction Roles", description)
+        # Several pages can take a while to publish: acknowledge first
+        await interaction.response.defer(ephemeral=True)
+        observe_ack(interaction, "setup_modal")
 
-        fields = await build_role_legend_fields(interaction.guild, resolved_mappings)
-        if fields:
-            for fname, fval in fields:
-                preview.add_field(name=fname, value=fval, inline=False)
+        try:
+            sent, add_errors = await publish_panel(
+                self.bot, channel, resolved_mappings, title, description, created_by=interaction.user.id, ttl_s=ttl_s
+            )
+        except Exception as e:
+            await interaction.followup.send(
+                embed=embeds.error("Failed to Send Message", f"Could not send the embed in {channel.mention}.\nError: {e}"),
+                ephemeral=True
+            )
+            return
 
-        preview.add_field(
-            name="How it works",
-            value="• React to add a role\n• Remove your reaction to remove the role\n• You may pick multiple roles",
-            inline=False
+        if len(sent) > 1:
+            where = f"Reaction roles panel created in {channel.mention} as {len(sent)} messages."
+        else:
+            where = f"Reaction roles message created in {channel.mention}."
+        success_desc = (
+            f"Template used: {template.label}\n"
+            f"{where}\n[Jump to message]({sent[0].jump_url})"
+        )
+        if add_errors:
+            success_desc += "\n\nSome reactions could not be added:\n" + "\n".join(f"• {err}" for err in add_errors)
+
+        with span("respond"):
+            await interaction.followup.send(
+                embed=embeds.success("Setup Complete", success_desc),
+                ephemeral=True
+            )
+
+class EditPanelModal(nextcord.ui.Modal):
+    def __init__(self, bot: commands.Bot, message_id: int, entry: Dict[str, Any]):
+        super().__init__(title="Edit Reaction Roles Message")
+        self.bot = bot
+        self.message_id = message_id
+        self.entry = entry
+
+        self.title_input = nextcord.ui.TextInput(
+            label="Title (optional)",
+            style=nextcord.TextInputStyle.short,
+            required=False,
+            max_length=200,
+            default_value=(entry.get("title") or "")[:200],
+            placeholder="Leave blank to keep the current title"
+        )
+        self.description_input = nextcord.ui.TextInput(
+            label="Message Body (optional)",
+            style=nextcord.TextInputStyle.paragraph,
+            required=False,
+            max_length=4000,
+            default_value=(entry.get("description") or "")[:4000],
+            placeholder="Leave blank to keep the current message"
+        )
+        self.pairs_input = nextcord.ui.TextInput(
+            label="Emoji ↔ Role Pairs (one per line)",
+            style=nextcord.TextInputStyle.paragraph,
+            required=True,
+            max_length=4000,
+            default_value=mapping_to_lines(bot, entry.get("mappings", {}))[:4000],
+            placeholder="e.g., <:name:id>:role • 😀:role • :name::role • emoji_id:role"
         )
 
+        self.duration_input = nextcord.ui.TextInput(
+            label="Role Duration (optional)",
+            style=nextcord.TextInputStyle.short,
+            required=False,
+            max_length=20,
+            default_value=format_duration(entry.get("ttl_s")),
+            placeholder="e.g. 12h, 7d or 1d12h — blank keeps roles until unreacted"
+        )
+
+        self.add_item(self.title_input)
+        self.add_item(self.description_input)
+        self.add_item(self.pairs_input)
+        self.add_item(self.duration_input)
+
+    async def _retitle_pages(
+        self, guild: nextcord.Guild, channel: nextcord.abc.Messageable, group: Dict[str, int], title: str
+    ) -> List[str]:
+        """Carry a title change over to the other pages of a split panel."""
+        problems = []
+        for mid in guild_message_ids(guild.id):
+            entry = get_message_mapping(mid)
+            sibling = (entry or {}).get("group")
+            if mid == self.message_id or not sibling or sibling.get("id") != group.get("id"):
+                continue
+            set_message_mapping(
+                message_id=mid,
+                guild_id=guild.id,
+                channel_id=entry["channel_id"],
+                mapping=entry.get("mappings", {}),
+                created_by=entry.get("created_by"),
+                title=title,
+                description=entry.get("description", ""),
+                group=sibling,
+                ttl_s=entry.get("ttl_s")
+            )
+            try:
+                page = await channel.fetch_message(mid)
+                if page.embeds:
+                    embed = page.embeds[0]
+                    embed.title = panel_page_title(title, sibling)
+                    await page.edit(embed=embed)
+            except Exception as e:
+                problems.append(f"Could not retitle page {sibling.get('page')}: {e}")
+        return problems
+
+    @traced("edit_modal")
+    async def callback(self, interaction: nextcord.Interaction) -> None:
+        assert interaction.guild is not None
+        guild = interaction.guild
+
+        with span("parse"):
+            raw_mappings, errs = parse_emoji_role_lines(str(self.pairs_input.value))
+        resolved_mappings, resolve_errs = resolve_emoji_names(guild, raw_mappings)
+        errs.extend(resolve_errs)
+        errs.extend(validate_panel_roles(guild, resolved_mappings))
+
+        channel = guild.get_channel_or_thread(int(self.entry.get("channel_id", 0)))
+        if channel is None:
+            errs.append("The panel's channel no longer exists.")
+        ttl_s = None
         try:
-            sent = await channel.send(embed=preview)
-        except Exception as e:
+            ttl_s = parse_duration(str(self.duration_input.value or ""))
+        except ValueError as e:
+            errs.append(str(e))
+        if len(resolved_mappings) > MAX_REACTIONS_PER_MESSAGE:
+            errs.append(
+                f"A panel message holds at most {MAX_REACTIONS_PER_MESSAGE} reactions; "
+                "use /setup to publish a larger set as several messages."
+            )
+
+        if errs:
             await interaction.response.send_message(
-                embed=embeds.error("Failed to Send Message", f"Could not send the embed in {channel.mention}.\nError: {e}"),
+                embed=embeds.error("Edit Validation Failed", "\n".join(f"• {e}" for e in errs)),
                 ephemeral=True
             )
+            observe_ack(interaction, "edit_modal")
             return
 
-        add_errors = []
-        for key in resolved_mappings.keys():
+        await interaction.response.defer(ephemeral=True)
+        observe_ack(interaction, "edit_modal")
+
+        old_mappings = {k: int(v) for k, v in self.entry.get("mappings", {}).items()}
+        added, removed, remapped = diff_mappings(old_mappings, resolved_mappings)
+        title = str(self.title_input.value).strip() or (self.entry.get("title") or "")
+        description = str(self.description_input.value).strip() or (self.entry.get("description") or "")
+
+        try:
+            with span("fetch_panel"):
+                message = await channel.fetch_message(self.message_id)
+        except nextcord.NotFound:
+            await interaction.followup.send(
+                embed=embeds.error("Panel Not Found", "The reaction roles message no longer exists."),
+                ephemeral=True
+            )
+            return
+
+        # Later pages of a split panel show a page counter and no body
+        group = self.entry.get("group")
+        page_title = panel_page_title(title, group)
+        page_description = description if not group or group.get("page") == 1 else ""
+        embed = message.embeds[0] if message.embeds else embeds.base(page_title, page_description)
+        changed = not message.embeds
+        if (embed.title or "") != page_title:
+            embed.title = page_title
+            changed = True
+        if (embed.description or "") != page_description:
+            embed.description = page_description or None
+            changed = True
+        if ttl_s != self.entry.get("ttl_s"):
+            how = PANEL_HOW_IT_WORKS + (f"\n• Roles expire {format_duration(ttl_s)} after you react" if ttl_s else "")
+            for i, field in enumerate(embed.fields):
+                if field.name == "How it works" and field.value != how:
+                    embed.set_field_at(i, name=field.name, value=how, inline=False)
+                    changed = True
+        if added or removed or remapped:
+            with span("legend"):
+                fields = await build_role_legend_fields(guild, resolved_mappings)
+            changed = patch_legend_fields(embed, fields) or changed
+
+        # Removed and remapped emoji: members who got the old role from them lose
+        # it now (unless another panel or emoji still grants it), and the emoji's
+        # reactions are reset below so a remapped emoji is re-reacted for the new role.
+        reset = removed + remapped
+        revoked = 0
+        if reset:
+            with span("revoke_old_roles"):
+                revoked = await revoke_panel_grants(
+                    guild, self.message_id, reset,
+                    reason=f"Reaction role message {self.message_id} edited",
+                )
+            seen.forget_group("reaction_add", self.message_id, where=lambda ids: ids[2] in reset)
+
+        # Store first: the clears below then find the new mapping and the grants
+        # already taken, so they revoke nothing further.
+        with span("storage_write"):
+            set_message_mapping(
+                message_id=self.message_id,
+                guild_id=guild.id,
+                channel_id=channel.id,
+                mapping=resolved_mappings,
+                created_by=self.entry.get("created_by", interaction.user.id),
+                title=title,
+                description=description,
+                group=group,
+                ttl_s=ttl_s
+            )
+
+        problems = []
+        if changed:
             try:
-                if key.startswith("e:"):
-                    emoji_id = int(key.split(":", 1)[1])
-                    emoji_obj = self.bot.get_emoji(emoji_id) or nextcord.PartialEmoji(name="emoji", id=emoji_id, animated=False)
-                    await sent.add_reaction(emoji_obj)
-                else:
-                    uni = key.split(":", 1)[1]
-                    await sent.add_reaction(uni)
+                with span("edit_panel"):
+                    await message.edit(embed=embed)
             except Exception as e:
-                add_errors.append(f"Failed to add reaction for {key}: {e}")
-
-        set_message_mapping(
-            message_id=sent.id,
-            guild_id=sent.guild.id,
-            channel_id=sent.channel.id,
-            mapping=resolved_mappings,
-            created_by=interaction.user.id,
-            title=title,
-            description=description
-        )
+                problems.append(f"Could not update the embed: {e}")
 
-        success_desc = (
-            f"Template used: {TEMPLATES[self.template_key]['label']}\n"
-            f"Reaction roles message created in {channel.mention}.\n[Jump to message]({sent.jump_url})"
-        )
-        if add_errors:
-            success_desc += "\n\nSome reactions could not be added:\n" + "\n".join(f"• {err}" for err in add_errors)
+        with span("sync_reactions"):
+            readd = []
+            for key in reset:
+                emoji = reaction_for_key(self.bot, key)
+                try:
+                    await message.clear_reaction(emoji)
+                except nextcord.Forbidden:
+                    problems.append(
+                        f"Missing Manage Messages: members' reactions for {key} were kept, "
+                        "so they must un-react and react again"
+                    )
+                    if key in removed:
+                        # At least drop the bot's own reaction
+                        try:
+                            await message.remove_reaction(emoji, guild.me)
+                        except Exception as e:
+                            problems.append(f"Failed to remove reaction for {key}: {e}")
+                    continue
+                except Exception as e:
+                    problems.append(f"Failed to remove reaction for {key}: {e}")
+                    continue
+                if key in remapped:
+                    readd.append(key)  # the clear also removed the bot's reaction
+            for key in added + readd:
+                try:
+                    await message.add_reaction(reaction_for_key(self.bot, key))
+                except Exception as e:
+                    problems.append(f"Failed to add reaction for {key}: {e}")
 
-        await interaction.response.send_message(
-            embed=embeds.success("Setup Complete", success_desc),
-            ephemeral=True
+        if title != (self.entry.get("title") or "") and group and group.get("pages", 1) > 1:
+            with span("retitle_pages"):
+                problems.extend(await self._retitle_pages(guild, channel, group, title))
+
+        summary = (
+            f"{len(added)} added, {len(removed)} removed, {len(remapped)} remapped; "
+            f"embed {'updated' if changed else 'unchanged'}.\n[Jump to message]({message.jump_url})"
         )
+        if reset:
+            summary += (
+                f"\n\nReactions on removed or remapped emoji were reset; {revoked} member(s) are losing the "
+                "old role. Members react again to get a remapped emoji's new role."
+            )
+        if problems:
+            summary += "\n\nSome changes could not be applied:\n" + "\n".join(f"• {p}" for p in problems)
+
+        with span("respond"):
+            await interaction.followup.send(embed=embeds.success("Panel Updated", summary), ephemeral=True)
+
+# Bulk import (/importpanels)
+IMPORT_MAX_BYTES = 256 * 1024
+IMPORT_MAX_PANELS = int(os.getenv("IMPORT_MAX_PANELS", "50"))
+IMPORT_PANEL_INTERVAL_S = float(os.getenv("IMPORT_PANEL_INTERVAL_S", "2"))
+IMPORT_PROGRESS_EVERY_S = 3.0
+
+def iter_import_rows(filename: str, text: str) -> Iterator[Dict[str, str]]:
+    """
+    Yields one raw panel spec (channel, title, description, template, duration, pairs)
+    per CSV row or JSON object. CSV rows are read one at a time; in CSV,
+    pairs may be separated by ';' as well as newlines. JSON may be a list of
+    panels or {"panels": [...]}, with pairs as text, a list of lines or an
+    {emoji: role_id} object. Raises ValueError (or csv.Error) on malformed files.
+    """
+    if filename.lower().endswith(".csv"):
+        for row in csv.DictReader(io.StringIO(text)):
+            row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items() if k}
+            row["pairs"] = row.get("pairs", "").replace(";", "\n")
+            yield row
+        return
+
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get("panels")
+    if not isinstance(data, list):
+        raise ValueError('expected a list of panels or {"panels": [...]}')
+    for item in data:
+        if not isinstance(item, dict):
+            raise ValueError("every panel must be an object")
+        pairs = item.get("pairs", "")
+        if isinstance(pairs, list):
+            pairs = "\n".join(str(p) for p in pairs)
+        elif isinstance(pairs, dict):
+            pairs = "\n".join(f"{emoji}:{role_id}" for emoji, role_id in pairs.items())
+        yield {
+            "channel": str(item.get("channel", "")),
+            "title": str(item.get("title") or ""),
+            "description": str(item.get("description") or ""),
+            "template": str(item.get("template") or ""),
+            "duration": str(item.get("duration") or ""),
+            "pairs": str(pairs),
+        }
+
+def validate_import_row(guild: nextcord.Guild, row: Dict[str, str]) -> Tuple[Optional[Dict[str, Any]], list[str]]:
+    """Checks one panel spec against the cached guild state; returns (panel, errors)."""
+    template_key = (row.get("template") or templates.get(None).key).strip().lower()
+    errs: list[str] = []
+    if template_key not in templates:
+        errs.append(f"Unknown template '{template_key}'. Use one of: {', '.join(templates.keys())}.")
+
+    raw_mappings, parse_errs = parse_emoji_role_lines(row.get("pairs", ""))
+    errs.extend(parse_errs)
+    resolved_mappings, resolve_errs = resolve_emoji_names(guild, raw_mappings)
+    errs.extend(resolve_errs)
+    errs.extend(validate_panel_roles(guild, resolved_mappings))
+
+    ttl_s = None
+    try:
+        ttl_s = parse_duration(row.get("duration", ""))
+    except ValueError as e:
+        errs.append(str(e))
+
+    channel = resolve_channel_from_text(guild, row.get("channel", ""))
+    if channel is None:
+        errs.append(f"Invalid channel '{row.get('channel', '')}'. Use a channel mention or numeric ID.")
+    else:
+        perms = channel.permissions_for(guild.me)
+        if not (perms.send_messages and perms.embed_links and perms.add_reactions):
+            errs.append(f"Bot needs Send Messages, Embed Links and Add Reactions in {channel.mention}.")
+
+    if errs:
+        return None, errs
+    template = templates.get(template_key)
+    return {
+        "channel": channel,
+        "mappings": resolved_mappings,
+        "title": (row.get("title") or template.title).strip(),
+        "description": (row.get("description") or template.description).strip(),
+        "ttl_s": ttl_s,
+    }, []
+
+def import_file_supported(filename: str, size: int) -> bool:
+    """Checks an attachment's name and declared size before it is downloaded."""
+    return filename.lower().endswith((".json", ".csv")) and size <= IMPORT_MAX_BYTES
+
+def load_import_panels(guild: nextcord.Guild, filename: str, data: bytes) -> Tuple[List[Dict[str, Any]], list[str]]:
+    """
+    Parses and validates every panel in an import file without publishing any,
+    so a typo doesn't leave a half-imported set. Returns (panels, errors);
+    panels should only be published when errors is empty.
+    """
+    if len(data) > IMPORT_MAX_BYTES:
+        return [], [f"{filename} is larger than {IMPORT_MAX_BYTES // 1024} KB."]
+    panels: List[Dict[str, Any]] = []
+    errs: list[str] = []
+    try:
+        text = data.decode("utf-8-sig")
+        for number, row in enumerate(iter_import_rows(filename, text), start=1):
+            if number > IMPORT_MAX_PANELS:
+                errs.append(f"At most {IMPORT_MAX_PANELS} panels can be imported at once.")
+                break
+            panel, row_errs = validate_import_row(guild, row)
+            errs.extend(f"Panel {number}: {e}" for e in row_errs)
+            if panel:
+                panels.append(panel)
+    except (ValueError, csv.Error) as e:
+        errs.append(f"Could not read {filename}: {e}")
+    if not panels and not errs:
+        errs.append("The file describes no panels.")
+    return panels, errs
 
 class TemplateSelect(nextcord.ui.Select):
     def __init__(self, parent_view: "SetupView"):
         self.parent_view = parent_view
-        options = [
-            nextcord.SelectOption(
-                label=TEMPLATES[k]["label"],  # type: ignore
-                value=k,
-                description=f"Preview and use the {TEMPLATES[k]['label']} template"  # type: ignore
-            )
-            for k in TEMPLATES.keys()
-        ]
-        super().__init__(placeholder="Select a template (preview shown immediately)", min_values=1, max_values=1, options=options)
+        super().__init__(
+            placeholder="Select a template (preview shown immediately)",
+            min_values=1,
+            max_values=1,
+            options=templates.select_options()
+        )
 
     async def callback(self, interaction: nextcord.Interaction):
         self.parent_view.template_key = self.values[0]
         # Show an aesthetic preview embed (ephemeral) so admins see how it will look
-        preview = build_template_preview_embed(self.parent_view.template_key)
+        preview = templates.get(self.parent_view.template_key).preview()
         await interaction.response.send_message(embed=preview, ephemeral=True)
+        observe_ack(interaction, "template_select")
 
 class SetupView(nextcord.ui.View):
     def __init__(self, bot: commands.Bot, timeout: Optional[float] = 600):
         super().__init__(timeout=timeout)
         self.bot = bot
-        self.template_key: str = "minimal"
+        self.template_key: str = templates.get(None).key
         self.add_item(TemplateSelect(self))
 
     @nextcord.ui.button(label="Open Builder", style=nextcord.ButtonStyle.blurple, emoji="⚙️")
     async def open_builder(self, button: nextcord.ui.Button, interaction: nextcord.Interaction):
         await interaction.response.send_modal(RoleMessageModal(self.bot, template_key=self.template_key))
+        observe_ack(interaction, "open_builder")
 
 class SetupCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        templates.load()
+
+    def cog_unload(self):
+        templates.stop()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        templates.start()
 
     @nextcord.slash_command(
         name="setup",
@@ -469,6 +923,226 @@ class SetupCog(commands.Cog):
         )
         view = SetupView(self.bot)
         await interaction.response.send_message(embed=guide, view=view, ephemeral=True)
+        observe_ack(interaction, "setup")
+
+    @nextcord.slash_command(
+        name="editpanel",
+        description="Edit an existing reaction roles message in place.",
+        default_member_permissions=nextcord.Permissions(administrator=True)
+    )
+    async def editpanel_cmd(
+        self,
+        interaction: nextcord.Interaction,
+        message: str = nextcord.SlashOption(description="Message ID or link of the reaction roles message")
+    ):
+        assert interaction.guild is not None
+
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message(
+                embed=embeds.error("Permission Denied", "You must be a server administrator to use /editpanel."),
+                ephemeral=True
+            )
+            return
+
+        raw_id = message.strip().rstrip("/").rsplit("/", 1)[-1]
+        entry = get_message_mapping(int(raw_id)) if raw_id.isdigit() else None
+        if not entry or entry.get("guild_id") != interaction.guild.id:
+            await interaction.response.send_message(
+                embed=embeds.error("Panel Not Found", "That message is not a reaction roles message in this server."),
+                ephemeral=True
+            )
+            observe_ack(interaction, "editpanel")
+            return
+
+        await interaction.response.send_modal(EditPanelModal(self.bot, int(raw_id), dict(entry)))
+        observe_ack(interaction, "editpanel")
+
+    @nextcord.slash_command(
+        name="importpanels",
+        description="Create many reaction roles messages from a JSON or CSV file.",
+        default_member_permissions=nextcord.Permissions(administrator=True)
+    )
+    async def importpanels_cmd(
+        self,
+        interaction: nextcord.Interaction,
+        file: nextcord.Attachment = nextcord.SlashOption(description="JSON or CSV file: channel, title, template, pairs")
+    ):
+        assert interaction.guild is not None
+
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message(
+                embed=embeds.error("Permission Denied", "You must be a server administrator to use /importpanels."),
+                ephemeral=True
+            )
+            return
+
+        if not import_file_supported(file.filename, file.size):
+            await interaction.response.send_message(
+                embed=embeds.error(
+                    "Unsupported File",
+                    f"Attach a .json or .csv file of at most {IMPORT_MAX_BYTES // 1024} KB."
+                ),
+                ephemeral=True
+            )
+            observe_ack(interaction, "importpanels")
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        observe_ack(interaction, "importpanels")
+
+        try:
+            panels, errs = load_import_panels(interaction.guild, file.filename, await file.read())
+        except nextcord.HTTPException as e:
+            panels, errs = [], [f"Could not read {file.filename}: {e}"]
+
+        if errs:
+            await interaction.followup.send(
+                embed=embeds.error("Import Validation Failed", "\n".join(f"• {e}" for e in errs)[:4000]),
+                ephemeral=True
+            )
+            return
+
+        total = len(panels)
+        progress = await interaction.followup.send(
+            embed=embeds.info("Importing Panels", f"0/{total} published…"), ephemeral=True, wait=True
+        )
+        links: list[str] = []
+        problems: list[str] = []
+        last_update = time.monotonic()
+        for number, panel in enumerate(panels, start=1):
+            started = time.monotonic()
+            try:
+                sent, add_errors = await publish_panel(
+                    self.bot, panel["channel"], panel["mappings"], panel["title"], panel["description"],
+                    created_by=interaction.user.id, ttl_s=panel["ttl_s"]
+                )
+                links.append(f"[{panel['title'][:60]}]({sent[0].jump_url})")
+                problems.extend(f"Panel {number}: {e}" for e in add_errors)
+            except Exception as e:
+                problems.append(f"Panel {number}: could not send in {panel['channel'].mention}: {e}")
+
+            # Progress edits cost requests too: at most one every few seconds
+            if number < total and time.monotonic() - last_update >= IMPORT_PROGRESS_EVERY_S:
+                last_update = time.monotonic()
+                try:
+                    await progress.edit(embed=embeds.info("Importing Panels", f"{number}/{total} published…"))
+                except nextcord.HTTPException:
+                    pass
+            if number < total:
+                await asyncio.sleep(max(0.0, IMPORT_PANEL_INTERVAL_S - (time.monotonic() - started)))
+
+        summary = f"{len(links)}/{total} panels published.\n" + "\n".join(f"• {link}" for link in links[:15])
+        if len(links) > 15:
+            summary += f"\n• …and {len(links) - 15} more"
+        if problems:
+            summary += "\n\nProblems:\n" + "\n".join(f"• {p}" for p in problems)
+        done = embeds.success if len(links) == total else embeds.warn
+        await progress.edit(embed=done("Import Complete", summary[:4000]))
+
+    @nextcord.slash_command(
+        name="panelstats",
+        description="Show which reaction roles and panels are used most.",
+        default_member_permissions=nextcord.Permissions(administrator=True)
+    )
+    async def panelstats_cmd(
+        self,
+        interaction: nextcord.Interaction,
+        hours: int = nextcord.SlashOption(
+            description="Window to report on (default 24 hours)",
+            required=False,
+            default=24,
+            min_value=1,
+            max_value=max(1, USAGE_BUCKETS * USAGE_BUCKET_S // 3600)
+        )
+    ):
+        assert interaction.guild is not None
+
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message(
+                embed=embeds.error("Permission Denied", "You must be a server administrator to use /panelstats."),
+                ephemeral=True
+            )
+            return
+
+        stats = usage.guild(interaction.guild.id)
+        if stats is None or not stats.roles:
+            await interaction.response.send_message(
+                embed=embeds.info("No Usage Yet", "No reaction roles have been given or removed in this server yet."),
+                ephemeral=True
+            )
+            observe_ack(interaction, "panelstats")
+            return
+
+        epoch = current_epoch()
+        n = min(USAGE_BUCKETS, max(1, -(-hours * 3600 // USAGE_BUCKET_S)))
+        role_windows = {role_id: series.window(epoch, n) for role_id, series in stats.roles.items()}
+        panel_windows = {mid: series.window(epoch, n) for mid, series in stats.panels.items()}
+
+        top_roles = sorted(role_windows.items(), key=lambda kv: (kv[1][ADDS], kv[1][REMOVES]), reverse=True)[:10]
+        role_lines = []
+        for role_id, w in top_roles:
+            role = interaction.guild.get_role(role_id)
+            name = role.mention if role else f"deleted role {role_id}"
+            line = f"{name} — +{w[ADDS]} / −{w[REMOVES]}"
+            if w[FAILURES]:
+                line += f" / {w[FAILURES]} failed"
+            role_lines.append(line + f" (all time +{stats.roles[role_id].total[ADDS]})")
+
+        top_panels = sorted(panel_windows.items(), key=lambda kv: (kv[1][ADDS], kv[1][REMOVES]), reverse=True)[:5]
+        panel_lines = []
+        for mid, w in top_panels:
+            entry = get_message_mapping(mid)
+            if entry:
+                link = f"https://discord.com/channels/{interaction.guild.id}/{entry['channel_id']}/{mid}"
+                label = f"[{panel_page_title(entry.get('title'), entry.get('group'))}]({link})"
+            else:
+                label = f"deleted panel {mid}"
+            panel_lines.append(f"{label} — +{w[ADDS]} / −{w[REMOVES]}")
+
+        trend_adds = [0] * n
+        trend_removes = [0] * n
+        for series in stats.roles.values():
+            for i, v in enumerate(series.series(epoch, n, ADDS)):
+                trend_adds[i] += v
+            for i, v in enumerate(series.series(epoch, n, REMOVES)):
+                trend_removes[i] += v
+
+        emb = embeds.info("Reaction Role Usage", f"Last {hours}h, oldest → newest.")
+        emb.add_field(name="Top Roles", value="\n".join(role_lines)[:1024] or "None", inline=False)
+        emb.add_field(name="Top Panels", value="\n".join(panel_lines)[:1024] or "None", inline=False)
+        emb.add_field(
+            name="Trend",
+            value=(
+                f"`{sparkline(trend_adds)}` +{sum(trend_adds)} added\n"
+                f"`{sparkline(trend_removes)}` −{sum(trend_removes)} removed"
+            ),
+            inline=False
+        )
+        await interaction.response.send_message(embed=emb, ephemeral=True)
+        observe_ack(interaction, "panelstats")
+
+    @nextcord.slash_command(
+        name="resync_commands",
+        description="Force a slash command sync with Discord (bot owner only).",
+        default_member_permissions=nextcord.Permissions(administrator=True)
+    )
+    async def resync_commands(self, interaction: nextcord.Interaction):
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message(
+                embed=embeds.error("Owner Only", "Only the bot owner can resync commands."),
+                ephemeral=True
+            )
+            observe_ack(interaction, "resync_commands")
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        observe_ack(interaction, "resync_commands")
+        # Failures surface through the error handler cog
+        await sync_commands(self.bot, force=True)
+        await interaction.followup.send(
+            embed=embeds.success("Commands Synced", "Slash commands were pushed to Discord."),
+            ephemeral=True
+        )
 
 def setup(bot: commands.Bot):
     bot.add_cog(SetupCog(bot))
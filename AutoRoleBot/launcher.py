@@ -0,0 +1,217 @@
+"""
+Cluster launcher: runs bot.py as several worker processes, each owning a
+contiguous range of shards (and therefore only its guilds' panels).
+
+The supervisor restarts crashed workers with backoff, prefixes and merges
+their logs on stdout, and (when METRICS_PORT is set) serves one /metrics
+endpoint that aggregates every worker's metrics with a `worker` label.
+
+Usage:
+    python launcher.py --workers 4                 # shard count from Discord
+    python launcher.py --shards 16 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+logger = logging.getLogger("reaction-roles-launcher")
+
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+MAX_BACKOFF_S = 60.0
+STABLE_AFTER_S = 300.0
+
+
+def recommended_shard_count(token: str) -> int:
+    req = urllib.request.Request(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}", "User-Agent": "DiscordBot (reaction-roles-launcher, 1.0)"},
+    )
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return int(json.load(resp)["shards"])
+
+
+def split_shards(shard_count: int, workers: int) -> List[List[int]]:
+    workers = max(1, min(workers, shard_count))
+    base, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for i in range(workers):
+        size = base + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+def _label_sample(line: str, worker_id: int) -> str:
+    name, sep, rest = line.partition("{")
+    if sep:
+        return f'{name}{{worker="{worker_id}",{rest}'
+    name, _, value = line.partition(" ")
+    return f'{name}{{worker="{worker_id}"}} {value}'
+
+
+class Worker:
+    def __init__(self, worker_id: int, shard_ids: List[int], shard_count: int, metrics_port: Optional[int]):
+        self.worker_id = worker_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.metrics_port = metrics_port
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.restarts = 0
+
+    def env(self) -> Dict[str, str]:
+        env = dict(os.environ)
+        env["SHARD_COUNT"] = str(self.shard_count)
+        env["SHARD_IDS"] = ",".join(map(str, self.shard_ids))
+        env["WORKER_ID"] = str(self.worker_id)
+        env["PYTHONUNBUFFERED"] = "1"
+        if self.metrics_port:
+            env["METRICS_PORT"] = str(self.metrics_port)
+        else:
+            env.pop("METRICS_PORT", None)
+        return env
+
+    async def _pump_logs(self):
+        assert self.proc and self.proc.stdout
+        prefix = f"[worker {self.worker_id}] "
+        while True:
+            line = await self.proc.stdout.readline()
+            if not line:
+                return
+            sys.stdout.write(prefix + line.decode(errors="replace"))
+            sys.stdout.flush()
+
+    async def supervise(self, stopping: asyncio.Event):
+        backoff = 1.0
+        while not stopping.is_set():
+            started = time.monotonic()
+            self.proc = await asyncio.create_subprocess_exec(
+                sys.executable, "bot.py",
+                cwd=BOT_DIR, env=self.env(),
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            )
+            logger.info(f"Worker {self.worker_id} started (pid {self.proc.pid}, shards {self.shard_ids})")
+            pump = asyncio.create_task(self._pump_logs())
+            code = await self.proc.wait()
+            await pump
+            if stopping.is_set():
+                return
+            if time.monotonic() - started > STABLE_AFTER_S:
+                backoff = 1.0
+            self.restarts += 1
+            logger.warning(f"Worker {self.worker_id} exited with code {code}; restarting in {backoff:.0f}s")
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, MAX_BACKOFF_S)
+
+    def terminate(self):
+        if self.proc and self.proc.returncode is None:
+            self.proc.terminate()
+
+
+async def _scrape(port: int) -> str:
+    from aiohttp import ClientSession, ClientTimeout
+
+    async with ClientSession(timeout=ClientTimeout(total=2)) as session:
+        async with session.get(f"http://127.0.0.1:{port}/metrics") as resp:
+            return await resp.text()
+
+
+async def serve_aggregated_metrics(workers: List[Worker], port: int, host: str):
+    from aiohttp import web
+
+    async def handle(request):
+        texts = await asyncio.gather(*(_scrape(w.metrics_port) for w in workers), return_exceptions=True)
+        seen_meta = set()
+        out: List[str] = []
+        for w, text in zip(workers, texts):
+            if isinstance(text, Exception):
+                continue
+            for line in text.splitlines():
+                if not line:
+                    continue
+                if line.startswith("#"):
+                    if line not in seen_meta:
+                        seen_meta.add(line)
+                        out.append(line)
+                    continue
+                out.append(_label_sample(line, w.worker_id))
+        out.append("# HELP reactionroles_worker_restarts_total Worker processes restarted by the launcher.")
+        out.append("# TYPE reactionroles_worker_restarts_total counter")
+        for w in workers:
+            out.append(f'reactionroles_worker_restarts_total{{worker="{w.worker_id}"}} {w.restarts}')
+        return web.Response(text="\n".join(out) + "\n", content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Aggregated metrics on http://{host}:{port}/metrics")
+    return runner
+
+
+async def run(args):
+    token = os.getenv("DISCORD_TOKEN")
+    shard_count = args.shards
+    if not shard_count:
+        if not token:
+            logger.error("DISCORD_TOKEN is not set; pass --shards or set the token.")
+            return
+        shard_count = recommended_shard_count(token)
+        logger.info(f"Discord recommends {shard_count} shard(s)")
+
+    metrics_port = int(os.environ["METRICS_PORT"]) if os.getenv("METRICS_PORT", "").isdigit() else None
+    ranges = split_shards(shard_count, args.workers)
+    workers = [
+        Worker(i, shard_ids, shard_count, metrics_port + 1 + i if metrics_port else None)
+        for i, shard_ids in enumerate(ranges)
+    ]
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError:
+            pass
+
+    runner = None
+    if metrics_port:
+        runner = await serve_aggregated_metrics(workers, metrics_port, os.getenv("METRICS_HOST", "127.0.0.1"))
+
+    tasks = [asyncio.create_task(w.supervise(stopping)) for w in workers]
+    await stopping.wait()
+    logger.info("Shutting down workers")
+    for w in workers:
+        w.terminate()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if runner is not None:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run AutoRoleBot as a multi-process shard cluster")
+    parser.add_argument("--shards", type=int, default=0, help="Total shard count (default: Discord's recommendation)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes to spread shards across")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
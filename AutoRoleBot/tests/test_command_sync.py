@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+from utils import command_sync
+from utils.command_sync import command_fingerprint, sync_commands
+from utils.persistence import JsonDocument
+
+
+class FakeCommand:
+    def __init__(self, name, options=(), is_global=True):
+        self.is_global = is_global
+        self._payload = {"type": 1, "name": name, "description": name, "options": list(options)}
+
+    def get_payload(self, guild_id):
+        return self._payload
+
+
+class FakeHTTP:
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def get_global_commands(self, application_id):
+        return [dict(cmd.get_payload(None), id=str(i)) for i, cmd in enumerate(self.bot.commands)]
+
+
+class FakeBot:
+    application_id = 42
+
+    def __init__(self, commands):
+        self.commands = commands
+        self.http = FakeHTTP(self)
+        self.syncs = []
+
+    def add_all_application_commands(self):
+        pass
+
+    def get_all_application_commands(self):
+        return self.commands
+
+    async def sync_application_commands(self, **kwargs):
+        self.syncs.append(kwargs)
+
+
+def test_fingerprint_ignores_order_and_guild_commands():
+    a, b = FakeCommand("setup"), FakeCommand("editpanel")
+    fingerprint = command_fingerprint(FakeBot([a, b]))
+    assert command_fingerprint(FakeBot([b, a])) == fingerprint
+    assert command_fingerprint(FakeBot([a, b, FakeCommand("debug", is_global=False)])) == fingerprint
+
+
+def test_fingerprint_changes_with_the_definitions():
+    before = command_fingerprint(FakeBot([FakeCommand("setup")]))
+    after = command_fingerprint(FakeBot([FakeCommand("setup", [{"name": "channel", "type": 7}])]))
+    assert before != after
+
+
+def _state_doc(path):
+    return JsonDocument(path, default=dict, on_load=command_sync._upgrade, keyed=True)
+
+
+def test_sync_only_pushes_changed_trees(tmp_path, monkeypatch):
+    monkeypatch.setattr(command_sync, "_state", _state_doc(tmp_path / "command_sync.json"))
+    bot = FakeBot([FakeCommand("setup")])
+
+    assert asyncio.run(sync_commands(bot)) is True
+    assert asyncio.run(sync_commands(bot)) is False
+    assert bot.syncs[-1]["update_known"] is False and bot.syncs[-1]["register_new"] is False
+
+    bot.commands.append(FakeCommand("editpanel"))
+    assert asyncio.run(sync_commands(bot)) is True
+    assert asyncio.run(sync_commands(bot, force=True)) is True
+    assert asyncio.run(sync_commands(bot)) is False
+
+
+def test_processes_sharing_the_file_keep_each_others_fingerprints(tmp_path, monkeypatch):
+    path = tmp_path / "command_sync.json"
+    path.write_text(json.dumps({"application_id": "42", "fingerprint": "old", "commands": [{"id": "1"}]}))
+    first, second = _state_doc(path), _state_doc(path)
+    assert first.data == {"42": {"fingerprint": "old", "commands": [{"id": "1"}]}}
+    second.load()
+
+    def sync(doc, bot):
+        async def scenario():
+            monkeypatch.setattr(command_sync, "_state", doc)
+            pushed = await sync_commands(bot)
+            await doc.flush()
+            return pushed
+        return asyncio.run(scenario())
+
+    bot = FakeBot([FakeCommand("setup")])
+    other = FakeBot([FakeCommand("verify")])
+    other.application_id = 43
+    assert sync(first, bot) is True
+    assert sync(second, other) is True
+
+    on_disk = json.loads(path.read_text())
+    assert set(on_disk) == {"42", "43"}
+    assert on_disk["42"]["fingerprint"] == command_fingerprint(bot)
+    assert sync(second, other) is False
@@ -0,0 +1,77 @@
+from utils import dedup
+from utils.dedup import SeenSet
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make(monkeypatch, ttl_s=10.0, max_keys=100):
+    clock = FakeClock()
+    monkeypatch.setattr(dedup.time, "monotonic", clock)
+    return SeenSet(ttl_s=ttl_s, max_keys=max_keys), clock
+
+
+def test_repeat_within_ttl_is_dropped(monkeypatch):
+    seen, clock = make(monkeypatch)
+    assert seen.first("reaction_add", 1, 2, "u:x")
+    clock.now += 9
+    assert not seen.first("reaction_add", 1, 2, "u:x")
+
+
+def test_key_expires_after_ttl(monkeypatch):
+    seen, clock = make(monkeypatch)
+    assert seen.first("reaction_add", 1, 2, "u:x")
+    clock.now += 10.5
+    assert seen.first("reaction_add", 1, 2, "u:x")
+
+
+def test_disabled_when_ttl_is_zero(monkeypatch):
+    seen, _ = make(monkeypatch, ttl_s=0)
+    assert seen.first("member_join", 1, 2)
+    assert seen.first("member_join", 1, 2)
+
+
+def test_max_keys_evicts_oldest(monkeypatch):
+    seen, _ = make(monkeypatch, max_keys=3)
+    for i in range(5):
+        assert seen.first("e", i)
+    assert len(seen) <= 3
+    assert seen.first("e", 0)
+
+
+def test_forget_lets_real_repeat_pass(monkeypatch):
+    seen, _ = make(monkeypatch)
+    assert seen.first("reaction_add", 1, 2, "u:x")
+    seen.forget("reaction_add", 1, 2, "u:x")
+    assert seen.first("reaction_add", 1, 2, "u:x")
+
+
+def test_forget_group_drops_only_matching_keys(monkeypatch):
+    seen, _ = make(monkeypatch)
+    seen.first("reaction_add", 10, 1, "u:a")
+    seen.first("reaction_add", 10, 2, "u:b")
+    seen.first("reaction_add", 11, 1, "u:a")
+    seen.first("reaction_remove", 10, 3, "u:a")
+
+    assert seen.forget_group("reaction_add", 10, where=lambda ids: ids[2] == "u:a") == 1
+    assert seen.first("reaction_add", 10, 1, "u:a")
+    assert not seen.first("reaction_add", 10, 2, "u:b")
+    assert not seen.first("reaction_add", 11, 1, "u:a")
+    assert not seen.first("reaction_remove", 10, 3, "u:a")
+
+    assert seen.forget_group("reaction_add", 10) == 2
+    assert seen.forget_group("reaction_add", 10) == 0
+
+
+def test_group_index_shrinks_on_expiry(monkeypatch):
+    seen, clock = make(monkeypatch)
+    seen.first("reaction_add", 10, 1, "u:a")
+    clock.now += 20
+    seen.first("reaction_add", 11, 1, "u:a")
+    assert ("reaction_add", 10) not in seen._groups
+    assert seen.forget_group("reaction_add", 10) == 0
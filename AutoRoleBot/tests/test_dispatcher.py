@@ -0,0 +1,95 @@
+import asyncio
+
+from utils.dispatcher import LaneDispatcher
+from utils.metrics import DISPATCH_BACKPRESSURE
+
+
+def test_same_member_events_run_in_arrival_order():
+    async def scenario():
+        dispatcher = LaneDispatcher(lanes=4, depth=10)
+        done = []
+
+        async def handle(n, delay):
+            await asyncio.sleep(delay)
+            done.append(n)
+
+        # The first event is the slowest; it must still finish first
+        for n, delay in enumerate([0.03, 0.0, 0.01, 0.0]):
+            await dispatcher.submit((1, 7), handle, n, delay)
+        await asyncio.sleep(0.1)
+        dispatcher.stop()
+        return done
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3]
+
+
+def test_different_members_run_concurrently():
+    async def scenario():
+        dispatcher = LaneDispatcher(lanes=2, depth=10)
+        running, peak = set(), []
+        release = asyncio.Event()
+
+        async def handle(key):
+            running.add(key)
+            peak.append(len(running))
+            await release.wait()
+            running.discard(key)
+
+        await dispatcher.submit(0, handle, 0)  # int keys hash to themselves: lanes 0 and 1
+        await dispatcher.submit(1, handle, 1)
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.sleep(0.01)
+        dispatcher.stop()
+        return max(peak)
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_full_lane_makes_submit_wait():
+    async def scenario():
+        dispatcher = LaneDispatcher(lanes=1, depth=1)
+        release = asyncio.Event()
+        done = []
+
+        async def handle(n):
+            await release.wait()
+            done.append(n)
+
+        before = DISPATCH_BACKPRESSURE.get()
+        await dispatcher.submit("a", handle, 0)
+        await asyncio.sleep(0)  # the worker takes event 0 and blocks in it
+        await dispatcher.submit("a", handle, 1)  # fills the queue
+        blocked = asyncio.create_task(dispatcher.submit("a", handle, 2))
+        await asyncio.sleep(0.01)
+        waited = not blocked.done() and dispatcher.queued() == 1
+        release.set()
+        await blocked
+        await asyncio.sleep(0.01)
+        dispatcher.stop()
+        return waited, DISPATCH_BACKPRESSURE.get() - before, done
+
+    waited, backpressure, done = asyncio.run(scenario())
+    assert waited
+    assert backpressure == 1
+    assert done == [0, 1, 2]
+
+
+def test_handler_errors_do_not_stop_the_lane():
+    async def scenario():
+        dispatcher = LaneDispatcher(lanes=1, depth=10)
+        done = []
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        async def ok():
+            done.append(True)
+
+        await dispatcher.submit("a", fail)
+        await dispatcher.submit("a", ok)
+        await asyncio.sleep(0.01)
+        dispatcher.stop()
+        return done
+
+    assert asyncio.run(scenario()) == [True]
@@ -0,0 +1,135 @@
+import asyncio
+import types
+
+import nextcord
+
+from cogs.setup import LEGEND_FIELD, build_role_legend_fields, diff_mappings, patch_legend_fields
+
+
+def fake_guild(*role_ids):
+    roles = {rid: types.SimpleNamespace(id=rid, mention=f"<@&{rid}>") for rid in role_ids}
+    return types.SimpleNamespace(get_role=roles.get, emojis=[])
+
+
+def legend(mappings, *role_ids):
+    return asyncio.run(build_role_legend_fields(fake_guild(*role_ids), mappings))
+
+
+def panel_embed(fields):
+    embed = nextcord.Embed(title="Roles", description="Pick some")
+    for name, value in fields:
+        embed.add_field(name=name, value=value, inline=False)
+    embed.add_field(name="How it works", value="React to add a role.", inline=False)
+    return embed
+
+
+def test_diff_added_removed_remapped():
+    old = {"u:😀": 1, "u:🎮": 2, "u:🔔": 3}
+    new = {"u:😀": 1, "u:🎮": 5, "u:💜": 4}
+    assert diff_mappings(old, new) == (["u:💜"], ["u:🔔"], ["u:🎮"])
+
+
+def test_diff_unchanged_and_empty():
+    same = {"u:😀": 1, "e:123": 2}
+    assert diff_mappings(same, dict(same)) == ([], [], [])
+    assert diff_mappings({}, same) == (["u:😀", "e:123"], [], [])
+    assert diff_mappings(same, {}) == ([], ["u:😀", "e:123"], [])
+
+
+def test_patch_legend_remap_touches_only_the_legend():
+    before = {"u:😀": 1, "u:🎮": 2}
+    embed = panel_embed(legend(before, 1, 2, 5))
+    after = {"u:😀": 1, "u:🎮": 5}
+    assert patch_legend_fields(embed, legend(after, 1, 2, 5))
+    assert [f.name for f in embed.fields] == [LEGEND_FIELD, "How it works"]
+    assert embed.fields[0].value == "• 😀 → <@&1>\n• 🎮 → <@&5>"
+    assert embed.fields[1].value == "React to add a role."
+
+
+def test_patch_legend_unchanged_returns_false():
+    mappings = {"u:😀": 1}
+    embed = panel_embed(legend(mappings, 1))
+    assert not patch_legend_fields(embed, legend(mappings, 1))
+
+
+def test_patch_legend_rebuilds_when_the_chunk_count_changes():
+    roles = range(1000, 1080)
+    big = {f"u:{chr(0x1F600 + i)}": rid for i, rid in enumerate(roles)}
+    fields = legend(big, *roles)
+    assert len(fields) > 1
+    embed = panel_embed(legend({"u:😀": 1000}, *roles))
+    assert patch_legend_fields(embed, fields)
+    assert [f.name for f in embed.fields] == [LEGEND_FIELD] * len(fields) + ["How it works"]
+    assert [f.value for f in embed.fields[:-1]] == [value for _, value in fields]
+
+    small = legend({"u:🎮": 1001}, *roles)
+    assert patch_legend_fields(embed, small)
+    assert [(f.name, f.value) for f in embed.fields] == [(LEGEND_FIELD, "• 🎮 → <@&1001>"), ("How it works", "React to add a role.")]
+
+
+async def _done(value):
+    return value
+
+
+class FakeMessage:
+    jump_url = "https://discord.com/channels/1/2/3"
+
+    def __init__(self, embed):
+        self.embeds = [embed]
+        self.cleared, self.added = [], []
+
+    async def edit(self, embed=None):
+        self.embeds = [embed]
+
+    async def clear_reaction(self, emoji):
+        self.cleared.append(emoji)
+
+    async def add_reaction(self, emoji):
+        self.added.append(emoji)
+
+
+def test_edit_revokes_removed_and_remapped_emoji(monkeypatch):
+    from cogs import setup
+
+    old = {"u:😀": 1, "u:🎮": 2, "u:🔔": 3}
+    message = FakeMessage(panel_embed(legend(old, 1, 2, 3, 5)))
+    channel = types.SimpleNamespace(id=2, fetch_message=lambda mid: _done(message))
+    guild = fake_guild(1, 2, 3, 5)
+    guild.id = 1
+    guild.get_channel_or_thread = lambda cid: channel
+    revoked, stored, sent = [], [], []
+
+    async def revoke(guild, message_id, keys, reason, on_blocked=None):
+        revoked.append(list(keys))
+        return 4
+
+    monkeypatch.setattr(setup, "validate_panel_roles", lambda guild, mappings: [])
+    monkeypatch.setattr(setup, "revoke_panel_grants", revoke)
+    monkeypatch.setattr(setup, "set_message_mapping", lambda **kwargs: stored.append(kwargs["mapping"]))
+
+    async def followup(embed=None, ephemeral=None):
+        sent.append(embed)
+
+    async def defer(ephemeral=None):
+        pass
+
+    interaction = types.SimpleNamespace(
+        guild=guild, user=types.SimpleNamespace(id=9), created_at=None,
+        response=types.SimpleNamespace(defer=defer), followup=types.SimpleNamespace(send=followup),
+    )
+    bot = types.SimpleNamespace(get_emoji=lambda emoji_id: None)
+
+    async def scenario():
+        modal = setup.EditPanelModal(bot, 3, {"channel_id": 2, "mappings": old, "title": "Roles", "description": "Pick some"})
+        modal.title_input = modal.description_input = modal.duration_input = types.SimpleNamespace(value="")
+        modal.pairs_input = types.SimpleNamespace(value="😀:1\n🎮:5\n💜:5")
+        await modal.callback(interaction)
+
+    asyncio.run(scenario())
+    assert revoked == [["u:🔔", "u:🎮"]]
+    assert stored == [{"u:😀": 1, "u:🎮": 5, "u:💜": 5}]
+    assert message.cleared == ["🔔", "🎮"]
+    assert message.added == ["💜", "🎮"]  # new emoji, and the bot's reaction back on the remapped one
+    assert message.embeds[0].fields[0].value == "• 😀 → <@&1>\n• 🎮 → <@&5>\n• 💜 → <@&5>"
+    assert "1 added, 1 removed, 1 remapped" in sent[0].description
+    assert "4 member(s)" in sent[0].description
@@ -0,0 +1,113 @@
+import functools
+import json
+import types
+
+import pytest
+
+from cogs import setup
+from cogs.setup import IMPORT_MAX_BYTES, import_file_supported, load_import_panels
+
+CHANNEL_ID = 111111111111111111
+
+
+@functools.total_ordering
+class FakeRole:
+    def __init__(self, role_id, position):
+        self.id, self.name, self.position = role_id, f"role{role_id}", position
+
+    def __eq__(self, other):
+        return self.position == other.position
+
+    def __lt__(self, other):
+        return self.position < other.position
+
+
+def fake_guild():
+    roles = {rid: FakeRole(rid, 1) for rid in (1, 2, 3)}
+    me = types.SimpleNamespace(
+        guild_permissions=types.SimpleNamespace(manage_roles=True), top_role=FakeRole(0, 10)
+    )
+    return types.SimpleNamespace(get_role=roles.get, emojis=[], me=me)
+
+
+@pytest.fixture(autouse=True)
+def channel(monkeypatch):
+    perms = types.SimpleNamespace(send_messages=True, embed_links=True, add_reactions=True)
+    ch = types.SimpleNamespace(id=CHANNEL_ID, mention=f"<#{CHANNEL_ID}>", permissions_for=lambda member: perms)
+    monkeypatch.setattr(
+        setup, "resolve_channel_from_text", lambda guild, raw: ch if raw.strip() == str(CHANNEL_ID) else None
+    )
+    return ch
+
+
+def test_valid_json_and_csv(channel):
+    doc = {"panels": [
+        {"channel": CHANNEL_ID, "title": "Games", "pairs": {"🎮": 1, "🎲": 2}},
+        {"channel": str(CHANNEL_ID), "pairs": ["🔔:3"], "duration": "1h"},
+    ]}
+    panels, errs = load_import_panels(fake_guild(), "panels.json", json.dumps(doc).encode())
+    assert errs == []
+    assert [p["mappings"] for p in panels] == [{"u:🎮": 1, "u:🎲": 2}, {"u:🔔": 3}]
+    assert panels[0]["channel"] is channel and panels[0]["title"] == "Games"
+    assert panels[1]["ttl_s"] == 3600 and panels[1]["title"]  # template default
+
+    csv_text = f"\ufeffChannel,Title,Pairs\n{CHANNEL_ID},Games,🎮:1;🎲:2\n"
+    panels, errs = load_import_panels(fake_guild(), "panels.CSV", csv_text.encode("utf-8"))
+    assert errs == []
+    assert panels[0]["mappings"] == {"u:🎮": 1, "u:🎲": 2}
+
+
+@pytest.mark.parametrize("filename, data", [
+    ("panels.json", b"{not json"),
+    ("panels.json", b'{"panels": {"channel": 1}}'),
+    ("panels.json", b'["not an object"]'),
+    ("panels.json", b"\xff\xfe\x00"),
+])
+def test_malformed_file(filename, data):
+    panels, errs = load_import_panels(fake_guild(), filename, data)
+    assert panels == []
+    assert len(errs) == 1 and errs[0].startswith(f"Could not read {filename}:")
+
+
+def test_invalid_rows_reject_the_whole_file():
+    doc = [
+        {"channel": CHANNEL_ID, "pairs": "🎮:1"},
+        {"channel": "general", "pairs": "🎲:99"},
+    ]
+    panels, errs = load_import_panels(fake_guild(), "panels.json", json.dumps(doc).encode())
+    assert errs == [
+        "Panel 2: Role not found for ID 99.",
+        "Panel 2: Invalid channel 'general'. Use a channel mention or numeric ID.",
+    ]
+    assert len(panels) == 1  # validated, but the command publishes nothing while errs is non-empty
+
+
+def test_empty_file():
+    assert load_import_panels(fake_guild(), "panels.json", b"[]") == ([], ["The file describes no panels."])
+
+
+def test_oversize_file():
+    assert import_file_supported("panels.json", IMPORT_MAX_BYTES)
+    assert not import_file_supported("panels.json", IMPORT_MAX_BYTES + 1)
+    assert not import_file_supported("panels.txt", 10)
+    # The declared attachment size isn't trusted on its own
+    panels, errs = load_import_panels(fake_guild(), "panels.json", b" " * (IMPORT_MAX_BYTES + 1))
+    assert panels == [] and errs == [f"panels.json is larger than {IMPORT_MAX_BYTES // 1024} KB."]
+
+
+def test_too_many_panels(monkeypatch):
+    monkeypatch.setattr(setup, "IMPORT_MAX_PANELS", 2)
+    doc = [{"channel": CHANNEL_ID, "pairs": "🎮:1"}] * 3
+    panels, errs = load_import_panels(fake_guild(), "panels.json", json.dumps(doc).encode())
+    assert errs == ["At most 2 panels can be imported at once."]
+
+
+def test_duplicate_emoji():
+    doc = [{"channel": CHANNEL_ID, "pairs": ["🎮:1", "🎮:2"]}]
+    panels, errs = load_import_panels(fake_guild(), "panels.json", json.dumps(doc).encode())
+    assert panels == []
+    assert errs == ["Panel 1: Line 2: Duplicate emoji mapping for '🎮:2'."]
+
+    csv_text = f"channel,pairs\n{CHANNEL_ID},🎮:1;🎮:3\n"
+    panels, errs = load_import_panels(fake_guild(), "panels.csv", csv_text.encode())
+    assert panels == [] and errs == ["Panel 1: Line 2: Duplicate emoji mapping for '🎮:3'."]
@@ -0,0 +1,25 @@
+from cogs.setup import MAX_REACTIONS_PER_MESSAGE, paginate_mappings, panel_page_title
+
+
+def test_paginate_keeps_small_panels_on_one_page():
+    mappings = {f"u:{i}": i for i in range(MAX_REACTIONS_PER_MESSAGE)}
+    assert paginate_mappings(mappings) == [mappings]
+
+
+def test_paginate_splits_in_order_at_the_reaction_limit():
+    mappings = {f"u:{i}": i for i in range(2 * MAX_REACTIONS_PER_MESSAGE + 1)}
+    pages = paginate_mappings(mappings)
+    assert [len(p) for p in pages] == [MAX_REACTIONS_PER_MESSAGE, MAX_REACTIONS_PER_MESSAGE, 1]
+    assert [k for p in pages for k in p] == list(mappings)
+    assert {k: v for p in pages for k, v in p.items()} == mappings
+
+
+def test_paginate_empty_is_one_empty_page():
+    assert paginate_mappings({}) == [{}]
+
+
+def test_page_titles():
+    assert panel_page_title(None) == "Reaction Roles"
+    assert panel_page_title("Games", {"id": 1, "page": 1, "pages": 1}) == "Games"
+    assert panel_page_title("Games", {"id": 1, "page": 2, "pages": 3}) == "Games (2/3)"
+
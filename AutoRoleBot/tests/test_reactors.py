@@ -0,0 +1,86 @@
+import asyncio
+import types
+
+from utils import bulk_revoke
+from utils.reactors import ReactorIndex
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_index(tmp_path, monkeypatch):
+    index = ReactorIndex(str(tmp_path / "reactors.sqlite3"))
+    monkeypatch.setattr(bulk_revoke, "reactors", index)
+    return index
+
+
+def test_take_returns_and_deletes_only_requested_emoji(tmp_path, monkeypatch):
+    index = make_index(tmp_path, monkeypatch)
+
+    async def scenario():
+        await index.add(100, "u:a", 1, 9, 50)
+        await index.add(100, "u:a", 2, 9, 50)
+        await index.add(100, "u:b", 1, 9, 51)
+        taken = await index.take(100, ["u:a"])
+        rest = await index.take(100)
+        return taken, rest
+
+    taken, rest = run(scenario())
+    assert taken == {50: {1, 2}}
+    assert rest == {51: {1}}
+
+
+def test_remove_and_still_granted(tmp_path, monkeypatch):
+    index = make_index(tmp_path, monkeypatch)
+
+    async def scenario():
+        await index.add(100, "u:a", 1, 9, 50)
+        await index.add(200, "u:x", 1, 9, 50)
+        await index.add(200, "u:x", 2, 9, 50)
+        await index.remove(200, "u:x", 2)
+        return await index.still_granted(9, 50, [1, 2, 3])
+
+    assert run(scenario()) == {1}
+
+
+def test_revoke_panel_grants_skips_members_granted_elsewhere(tmp_path, monkeypatch):
+    index = make_index(tmp_path, monkeypatch)
+    jobs = []
+    monkeypatch.setattr(bulk_revoke.bulk_revoker, "submit", jobs.append)
+    role = types.SimpleNamespace(id=50)
+    guild = types.SimpleNamespace(id=9, get_role=lambda rid: role if rid == 50 else None)
+
+    async def scenario():
+        await index.add(100, "u:a", 1, 9, 50)
+        await index.add(100, "u:a", 2, 9, 50)
+        await index.add(200, "u:x", 2, 9, 50)  # member 2 also holds it through another panel
+        await index.add(100, "u:b", 3, 9, 77)  # role 77 no longer exists
+        queued = await bulk_revoke.revoke_panel_grants(guild, 100, None, reason="test")
+        return queued, await index.panels()
+
+    queued, panels = run(scenario())
+    assert queued == 1
+    assert [(job.role.id, job.member_ids) for job in jobs] == [(50, [1])]
+    assert panels == [(200, 9)]
+
+
+def test_dry_run_leaves_the_rows_in_place(tmp_path, monkeypatch):
+    index = make_index(tmp_path, monkeypatch)
+    jobs = []
+    monkeypatch.setattr(bulk_revoke.bulk_revoker, "submit", jobs.append)
+    monkeypatch.setattr(bulk_revoke.bulk_revoker, "dry_run", True)
+    role = types.SimpleNamespace(id=50)
+    guild = types.SimpleNamespace(id=9, get_role=lambda rid: role)
+
+    async def scenario():
+        await index.add(100, "u:a", 1, 9, 50)
+        await index.add(100, "u:a", 2, 9, 50)
+        await index.add(100, "u:b", 2, 9, 50)  # member 2 keeps the role through another emoji
+        queued = await bulk_revoke.revoke_panel_grants(guild, 100, ["u:a"], reason="test")
+        return queued, await index.peek(100)
+
+    queued, rows = run(scenario())
+    assert queued == 1
+    assert [(job.role.id, job.member_ids) for job in jobs] == [(50, [1])]
+    assert rows == {50: {1, 2}}
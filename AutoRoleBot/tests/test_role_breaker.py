@@ -0,0 +1,27 @@
+import asyncio
+import types
+
+from cogs.react_roles import ReactionRolesCog
+from utils.role_breaker import RoleBreaker, role_breaker
+
+
+def test_breaker_opens_once_and_probes():
+    breaker = RoleBreaker(probe_after_s=0)
+    assert breaker.allow(1, 10)
+    assert breaker.forbidden(1, 10)
+    assert not breaker.forbidden(1, 10)  # already open: notify only once
+    assert breaker.allow(1, 10)  # probe interval elapsed
+    breaker.success(1, 10)
+    assert breaker.open_count() == 0
+
+
+def test_role_update_resets_the_guild_without_the_members_intent():
+    # The lean profile has no member updates; role edits (position, permissions) still arrive.
+    role_breaker.forbidden(1, 10)
+    role_breaker.forbidden(2, 20)
+    cog = ReactionRolesCog.__new__(ReactionRolesCog)
+    role = types.SimpleNamespace(guild=types.SimpleNamespace(id=1))
+    asyncio.run(ReactionRolesCog.on_guild_role_update(cog, role, role))
+    assert role_breaker.allow(1, 10)
+    assert not role_breaker.allow(2, 20)
+    role_breaker.reset_guild(2)
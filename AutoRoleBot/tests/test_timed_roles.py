@@ -0,0 +1,94 @@
+import asyncio
+import math
+
+import pytest
+
+from utils import timed_roles
+from utils.timed_roles import ExpiryScheduler, TimedGrantStore, format_duration, parse_duration
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("90m", 5400),
+    ("12h", 43200),
+    ("1d12h", 129600),
+    (" 2w ", 1209600),
+    ("1d 6h", 108000),
+    ("", None),
+    ("   ", None),
+])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+@pytest.mark.parametrize("text", ["12", "h", "1x", "1d-2h", "30s", "367d", "1d12h!"])
+def test_parse_duration_rejects(text):
+    with pytest.raises(ValueError):
+        parse_duration(text)
+
+
+@pytest.mark.parametrize("seconds", [60, 5400, 129600, 1209600 + 3600, 366 * 86400])
+def test_format_duration_round_trips(seconds):
+    assert parse_duration(format_duration(seconds)) == seconds
+
+
+def test_format_duration_blank():
+    assert format_duration(None) == ""
+    assert format_duration(0) == ""
+
+
+def _grant(user_id, expires_at):
+    return (1, user_id, 100, 500, "u:😀", expires_at)
+
+
+def test_heap_refills_from_the_index_in_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(timed_roles, "EXPIRY_PRELOAD", 3)
+
+    async def scenario():
+        store = TimedGrantStore(str(tmp_path / "timed.sqlite3"))
+        for user_id in range(1, 8):
+            await store.upsert(_grant(user_id, float(user_id)))
+        scheduler = ExpiryScheduler(store)
+
+        await scheduler._refill()
+        assert sorted(scheduler._heap) == [1.0, 2.0, 3.0]
+        assert scheduler._horizon == 3.0
+
+        await store.upsert(_grant(10, 10.0))
+        scheduler._push(10.0)  # past the horizon: left in the index for a later page
+        assert 10.0 not in scheduler._heap
+        scheduler._push(2.5)
+        assert 2.5 in scheduler._heap
+
+        scheduler._heap.clear()
+        await scheduler._refill()
+        assert sorted(scheduler._heap) == [4.0, 5.0, 6.0]
+        scheduler._heap.clear()
+        await scheduler._refill()
+        assert sorted(scheduler._heap) == [7.0, 10.0]
+        assert scheduler._horizon == math.inf
+
+    asyncio.run(scenario())
+
+
+def test_full_heap_pulls_the_horizon_in(tmp_path, monkeypatch):
+    monkeypatch.setattr(timed_roles, "MAX_HEAP", 2)
+
+    async def scenario():
+        store = TimedGrantStore(str(tmp_path / "timed.sqlite3"))
+        scheduler = ExpiryScheduler(store)
+        scheduler._horizon = math.inf
+        scheduler._push(1.0)
+        scheduler._push(2.0)
+        await store.upsert(_grant(3, 3.0))
+        scheduler._push(3.0)  # heap is full: dropped, and the horizon moves below it
+        assert sorted(scheduler._heap) == [1.0, 2.0]
+        assert 2.0 < scheduler._horizon < 3.0
+
+        scheduler._push(0.5)  # earlier than everything: still kept
+        assert scheduler._heap[0] == 0.5
+
+        scheduler._heap.clear()
+        await scheduler._refill()  # the dropped deadline comes back from the index
+        assert scheduler._heap == [3.0]
+
+    asyncio.run(scenario())
@@ -0,0 +1,51 @@
+from utils import storage, usage
+from utils.usage import ADDS, FAILURES, REMOVES, USAGE_BUCKETS, RingSeries
+
+
+def test_bump_and_window():
+    series = RingSeries()
+    series.bump(100, ADDS)
+    series.bump(100, ADDS)
+    series.bump(99, REMOVES)
+    series.bump(90, FAILURES)
+    assert series.window(100, 2) == [2, 1, 0]
+    assert series.window(100, 11) == [2, 1, 1]
+    assert series.series(100, 3, ADDS) == [0, 0, 2]
+    assert series.total == [2, 1, 1]
+
+
+def test_rollover_reuses_slot_and_forgets_old_bucket():
+    series = RingSeries()
+    series.bump(100, ADDS, 5)
+    series.bump(100 + USAGE_BUCKETS, ADDS)  # same slot, one full ring later
+    assert series.bucket(100) == (0, 0, 0)
+    assert series.bucket(100 + USAGE_BUCKETS) == (1, 0, 0)
+    assert series.total[ADDS] == 6
+
+
+def test_json_round_trip_drops_buckets_outside_the_ring():
+    series = RingSeries()
+    series.bump(10, ADDS, 3)
+    series.bump(10 + USAGE_BUCKETS - 1, REMOVES, 2)
+    now = 10 + USAGE_BUCKETS  # bucket 10 has aged out
+    restored = RingSeries.from_json(series.to_json(), now)
+    assert restored.bucket(10) == (0, 0, 0)
+    assert restored.bucket(10 + USAGE_BUCKETS - 1) == (0, 2, 0)
+    assert restored.total == [3, 2, 0]
+
+
+def test_merge_keeps_guilds_owned_by_other_workers(monkeypatch):
+    # Shard of a guild id is (id >> 22) % shard_count
+    ours, theirs = 0 << 22, 1 << 22
+    monkeypatch.setattr(storage, "_shards", (frozenset({0}), 2))
+    on_disk = {"bucket_s": 3600, "guilds": {str(ours): {"stale": True}, str(theirs): {"kept": True}}}
+    mine = {"bucket_s": 3600, "guilds": {str(ours): {"fresh": True}}}
+    merged = usage._merge(on_disk, mine)
+    assert merged["guilds"] == {str(ours): {"fresh": True}, str(theirs): {"kept": True}}
+
+
+def test_usage_file_is_written_under_a_cluster_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "_shards", (frozenset({0}), 1))
+    monkeypatch.setattr(usage, "USAGE_LOCK_FILE", tmp_path / "usage.lock")
+    with usage._doc.lock():
+        assert (tmp_path / "usage.lock").exists()
@@ -0,0 +1,182 @@
+"""
+Paced bulk role revocation.
+
+When a moderator clears a panel's reactions, every member who got the
+affected role from that panel loses it. Jobs hold member ids; each member is
+taken from the cache or fetched when its turn comes. Jobs run one after
+another on a single worker task, one member at a time at BULK_REVOKE_RATE_PER_S, so a large server does not starve the
+guild's rate limit for normal reaction traffic. Progress is logged every
+PROGRESS_EVERY_S. With BULK_REVOKE_DRY_RUN=1 nothing is changed; the members
+that would lose the role are logged instead.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+import nextcord
+
+from utils.metrics import ROLE_OPS, ROLE_OP_FAILURES, ROLE_OPS_SKIPPED, failure_status
+from utils.reactors import reactors
+from utils.role_breaker import role_breaker
+
+logger = logging.getLogger(__name__)
+
+BULK_REVOKE_RATE_PER_S = float(os.getenv("BULK_REVOKE_RATE_PER_S", "2"))
+BULK_REVOKE_DRY_RUN = os.getenv("BULK_REVOKE_DRY_RUN", "0") == "1"
+PROGRESS_EVERY_S = 10.0
+
+OnBlocked = Callable[[nextcord.Guild, nextcord.Role], Awaitable[None]]
+
+
+class RevokeJob:
+    __slots__ = ("guild", "role", "member_ids", "reason", "on_blocked", "removed", "skipped", "failed")
+
+    def __init__(
+        self,
+        guild: nextcord.Guild,
+        role: nextcord.Role,
+        member_ids: List[int],
+        reason: str,
+        on_blocked: Optional[OnBlocked] = None,
+    ):
+        self.guild = guild
+        self.role = role
+        self.member_ids = member_ids
+        self.reason = reason
+        self.on_blocked = on_blocked
+        self.removed = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def describe(self) -> str:
+        return f"role {self.role.id} in guild {self.guild.id}"
+
+
+class BulkRevoker:
+    def __init__(self, rate_per_s: float = BULK_REVOKE_RATE_PER_S, dry_run: bool = BULK_REVOKE_DRY_RUN):
+        self.rate_per_s = rate_per_s
+        self.dry_run = dry_run
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def submit(self, job: RevokeJob) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name="bulk-revoke")
+        self._queue.put_nowait(job)
+        logger.info(
+            "Queued bulk revoke of %s: %s member(s)%s", job.describe(), len(job.member_ids), " [dry run]" if self.dry_run else ""
+        )
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    async def _run(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except Exception:
+                logger.exception("Bulk revoke of %s failed", job.describe())
+
+    @staticmethod
+    async def _resolve(guild: nextcord.Guild, member_id: int) -> Optional[nextcord.Member]:
+        member = guild.get_member(member_id)
+        if member is None:
+            try:
+                member = await guild.fetch_member(member_id)
+            except nextcord.NotFound:
+                return None
+        return member
+
+    async def _process(self, job: RevokeJob):
+        interval = 1.0 / self.rate_per_s if self.rate_per_s > 0 else 0.0
+        total = len(job.member_ids)
+        started = last_report = time.monotonic()
+        for done, member_id in enumerate(job.member_ids, 1):
+            try:
+                member = await self._resolve(job.guild, member_id)
+            except Exception as e:
+                logger.warning("Bulk revoke of %s: could not fetch member %s: %s", job.describe(), member_id, e)
+                member = None
+            if member is None or job.role not in member.roles:
+                job.skipped += 1
+            elif self.dry_run:
+                logger.info("[dry run] Would remove %s from member %s", job.describe(), member.id)
+                job.removed += 1
+            elif not role_breaker.allow(job.guild.id, job.role.id):
+                ROLE_OPS_SKIPPED.inc(op="remove", amount=total - done + 1)
+                logger.warning("Bulk revoke of %s stopped: role is blocked (403)", job.describe())
+                break
+            else:
+                try:
+                    ROLE_OPS.inc(op="remove")
+                    await member.remove_roles(job.role, reason=job.reason)
+                    role_breaker.success(job.guild.id, job.role.id)
+                    job.removed += 1
+                except nextcord.Forbidden as e:
+                    ROLE_OP_FAILURES.inc(op="remove", status=failure_status(e))
+                    job.failed += 1
+                    logger.warning("Bulk revoke of %s stopped: 403 Forbidden", job.describe())
+                    if role_breaker.forbidden(job.guild.id, job.role.id) and job.on_blocked is not None:
+                        await job.on_blocked(job.guild, job.role)
+                    break
+                except Exception as e:
+                    ROLE_OP_FAILURES.inc(op="remove", status=failure_status(e))
+                    job.failed += 1
+                if interval:
+                    await asyncio.sleep(interval)
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_EVERY_S:
+                last_report = now
+                logger.info(
+                    "Bulk revoke of %s: %s/%s processed (%s removed, %s failed)",
+                    job.describe(), done, total, job.removed, job.failed,
+                )
+
+        logger.info(
+            "Bulk revoke of %s finished in %.1fs: %s removed, %s gone or already without the role, %s failed%s",
+            job.describe(), time.monotonic() - started, job.removed, job.skipped, job.failed,
+            " [dry run]" if self.dry_run else "",
+        )
+
+
+bulk_revoker = BulkRevoker()
+
+
+async def revoke_panel_grants(
+    guild: nextcord.Guild,
+    message_id: int,
+    keys: Optional[Iterable[str]],
+    reason: str,
+    on_blocked: Optional[OnBlocked] = None,
+) -> int:
+    """
+    Queue removal of the roles a panel granted through ``keys`` (None = every
+    emoji) from the members who reacted. Members who still hold a recorded
+    reaction for the same role elsewhere keep it. Returns the members queued.
+    A dry run leaves the recorded reactions in place for a real run.
+    """
+    queued = 0
+    keys = None if keys is None else list(keys)
+    if bulk_revoker.dry_run:
+        held = await reactors.peek(message_id, keys)
+    else:
+        held = await reactors.take(message_id, keys)
+    for role_id, user_ids in held.items():
+        user_ids -= await reactors.still_granted(guild.id, role_id, user_ids, message_id, keys)
+        role = guild.get_role(role_id)
+        if role is None or not user_ids:
+            continue
+        bulk_revoker.submit(RevokeJob(guild, role, sorted(user_ids), reason=reason, on_blocked=on_blocked))
+        queued += len(user_ids)
+    return queued
@@ -0,0 +1,75 @@
+"""
+Fingerprinted application-command sync.
+
+On connect the global command tree is serialized and hashed. When the hash
+matches the one stored in data/command_sync.json (for the same application),
+local commands are associated with the command payloads Discord returned at
+the last push, without any REST calls. Otherwise the normal sync runs and
+the new fingerprint and Discord's payloads are stored.
+
+The file is keyed by application id and written per key under a file lock,
+so bot processes sharing a data directory keep each other's entries.
+"""
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from nextcord.ext import commands
+
+from utils.persistence import JsonDocument, file_lock
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = Path("data/command_sync.json")
+STATE_LOCK_FILE = Path("data/command_sync.json.lock")
+_LEGACY_KEYS = ("application_id", "fingerprint", "commands")  # single-application layout
+
+
+def _upgrade(data: Dict[str, Any]) -> Dict[str, Any]:
+    if "application_id" in data:
+        data = {str(data["application_id"]): {k: data.get(k) for k in ("fingerprint", "commands")}}
+    return data
+
+
+_state = JsonDocument(
+    STATE_FILE, default=dict, on_load=_upgrade, keyed=True, lock=lambda: file_lock(STATE_LOCK_FILE)
+)
+
+
+def command_fingerprint(bot: commands.Bot) -> str:
+    """SHA-256 over the sorted global command payloads."""
+    payloads: List[dict] = [cmd.get_payload(None) for cmd in bot.get_all_application_commands() if cmd.is_global]
+    canonical = json.dumps(
+        sorted(payloads, key=lambda p: (p.get("type", 1), p["name"])), sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def sync_commands(bot: commands.Bot, force: bool = False) -> bool:
+    """
+    Sync global commands if the tree changed (or ``force``). Returns True when
+    commands were pushed to Discord, False when the stored fingerprint matched.
+    """
+    bot.add_all_application_commands()
+    fingerprint = command_fingerprint(bot)
+    app_id = str(bot.application_id)
+    state = _state.data.get(app_id) or {}
+    cached: Optional[List[dict]] = state.get("commands")
+
+    if not force and cached and state.get("fingerprint") == fingerprint:
+        await bot.sync_application_commands(
+            data=cached, guild_id=None, delete_unknown=False, update_known=False, register_new=False
+        )
+        logger.info("Application commands unchanged (%s); skipped sync", fingerprint[:12])
+        return False
+
+    await bot.sync_application_commands(guild_id=None)
+    remote = await bot.http.get_global_commands(bot.application_id)
+    _state.data[app_id] = {"fingerprint": fingerprint, "commands": remote}
+    _state.changed(app_id)
+    _state.removed(*_LEGACY_KEYS)
+    _state.save()
+    logger.info("Synced %s application commands (%s)", len(remote), fingerprint[:12])
+    return True
@@ -0,0 +1,91 @@
+"""
+Idempotency filter for replayed gateway events.
+
+After a resume or reconnect Discord can deliver events we already handled.
+Listeners call ``seen.first(event, *ids)`` with the ids that identify the
+event, e.g. ("reaction_add", message, user, emoji) or ("member_join", guild,
+member, joined_at); a repeat within DEDUP_TTL_S returns False and is counted
+in the events-deduplicated metric. Keys expire oldest first and at most
+DEDUP_MAX_KEYS are held, so memory stays bounded under bursts.
+
+Keys are also grouped by (event, first id), so every key of one group can be
+dropped at once, e.g. all reaction adds on a panel after its reactions are
+cleared.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Set, Tuple
+
+from utils.metrics import EVENTS_DEDUPLICATED
+
+DEDUP_TTL_S = float(os.getenv("DEDUP_TTL_S", "300"))
+DEDUP_MAX_KEYS = int(os.getenv("DEDUP_MAX_KEYS", "50000"))
+
+
+class SeenSet:
+    def __init__(self, ttl_s: float = DEDUP_TTL_S, max_keys: int = DEDUP_MAX_KEYS):
+        self.ttl_s = ttl_s
+        self.max_keys = max_keys
+        # key -> expiry; insertion order == expiry order since the TTL is fixed
+        self._seen: "OrderedDict[Tuple[Hashable, ...], float]" = OrderedDict()
+        # (event, first id) -> keys of that group currently held
+        self._groups: Dict[Tuple[Hashable, Hashable], Set[Tuple[Hashable, ...]]] = {}
+
+    def _unindex(self, key: Tuple[Hashable, ...]) -> None:
+        if len(key) < 2:
+            return
+        group = self._groups.get(key[:2])
+        if group is not None:
+            group.discard(key)
+            if not group:
+                del self._groups[key[:2]]
+
+    def _expire(self, now: float) -> None:
+        seen = self._seen
+        while seen:
+            expires = next(iter(seen.values()))
+            if expires > now and len(seen) < self.max_keys:
+                break
+            key, _ = seen.popitem(last=False)
+            self._unindex(key)
+
+    def first(self, event: str, *ids: Hashable) -> bool:
+        """True the first time (event, *ids) is seen within the TTL; False for a duplicate."""
+        if self.ttl_s <= 0:
+            return True
+        now = time.monotonic()
+        self._expire(now)
+        key = (event, *ids)
+        if key in self._seen:
+            EVENTS_DEDUPLICATED.inc(event=event)
+            return False
+        self._seen[key] = now + self.ttl_s
+        if ids:
+            self._groups.setdefault(key[:2], set()).add(key)
+        return True
+
+    def forget(self, event: str, *ids: Hashable) -> None:
+        """Drop a key, e.g. a reaction add once the matching remove arrives, so a real re-add passes."""
+        key = (event, *ids)
+        if self._seen.pop(key, None) is not None:
+            self._unindex(key)
+
+    def forget_group(
+        self, event: str, first_id: Hashable, where: Optional[Callable[[Tuple[Hashable, ...]], bool]] = None
+    ) -> int:
+        """Drop every key of ``event`` whose first id is ``first_id`` (and that ``where`` accepts)."""
+        group = self._groups.get((event, first_id))
+        if not group:
+            return 0
+        dropped = [key for key in group if where is None or where(key[1:])]
+        for key in dropped:
+            del self._seen[key]
+            self._unindex(key)
+        return len(dropped)
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+seen = SeenSet()
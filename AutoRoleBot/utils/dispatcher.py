@@ -0,0 +1,70 @@
+"""
+Ordered per-member event dispatch.
+
+Reaction events are hashed by (guild, member) onto one of DISPATCH_LANES
+lanes. Each lane is a bounded queue drained by its own worker, so events for
+the same member run strictly in arrival order (a quick add/remove toggle can
+no longer finish out of order), while different members and guilds proceed
+in parallel on other lanes. When a lane holds DISPATCH_LANE_DEPTH events,
+``submit`` waits for room instead of queueing without bound.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Hashable, List
+
+from utils.metrics import DISPATCH_BACKPRESSURE, DISPATCH_QUEUED, DISPATCH_WAIT
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_LANES = int(os.getenv("DISPATCH_LANES", "32"))
+DISPATCH_LANE_DEPTH = int(os.getenv("DISPATCH_LANE_DEPTH", "100"))
+
+
+class LaneDispatcher:
+    def __init__(self, lanes: int = DISPATCH_LANES, depth: int = DISPATCH_LANE_DEPTH):
+        self.lane_count = max(1, lanes)
+        self.depth = max(1, depth)
+        self._queues: List[asyncio.Queue] = []
+        self._workers: List[asyncio.Task] = []
+
+    def _start(self) -> None:
+        self._queues = [asyncio.Queue(self.depth) for _ in range(self.lane_count)]
+        self._workers = [
+            asyncio.create_task(self._run(q), name=f"dispatch-lane-{i}") for i, q in enumerate(self._queues)
+        ]
+
+    async def submit(self, key: Hashable, handler: Callable[..., Awaitable[Any]], *args: Any) -> None:
+        """Queue ``handler(*args)`` on the lane for ``key``; waits while that lane is full."""
+        if not self._workers:
+            self._start()
+        queue = self._queues[hash(key) % self.lane_count]
+        item = (time.perf_counter(), handler, args)
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            DISPATCH_BACKPRESSURE.inc()
+            await queue.put(item)
+
+    def queued(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        self._workers = []
+        self._queues = []
+
+    async def _run(self, queue: asyncio.Queue):
+        while True:
+            enqueued, handler, args = await queue.get()
+            DISPATCH_WAIT.observe(time.perf_counter() - enqueued)
+            try:
+                await handler(*args)
+            except Exception:
+                logger.exception("Unhandled error in %s", getattr(handler, "__qualname__", handler))
+
+
+dispatcher = LaneDispatcher()
+DISPATCH_QUEUED.set_function(dispatcher.queued)
@@ -10,8 +10,8 @@ BOT_FOOTER = "Reaction Roles • Powered by Nextcord"
 
 def base(title: str | None = None, description: str | None = None, color: nextcord.Colour = ACCENT) -> nextcord.Embed:
     emb = nextcord.Embed(
-        title=title or nextcord.Embed.Empty,
-        description=description or nextcord.Embed.Empty,
+        title=title or None,
+        description=description or None,
         color=color,
         timestamp=datetime.datetime.utcnow()
     )
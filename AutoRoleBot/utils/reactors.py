@@ -0,0 +1,163 @@
+"""
+Who holds a role because of a panel.
+
+Every role the bot grants through a reaction is recorded as (panel message,
+emoji, user) -> role in a local SQLite file (REACTORS_DB_PATH); un-reacting
+deletes the row. When a panel's reactions are cleared or an emoji is removed
+or remapped, only these members lose the role, so members who got it some
+other way keep it, and no member list (members intent) is needed to find them.
+Grants made before this index existed are not recorded and are not revoked.
+"""
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+REACTORS_DB_PATH = os.getenv("REACTORS_DB_PATH", os.path.join("data", "reactors.sqlite3"))
+
+
+class ReactorIndex:
+    """Rows on a local SQLite file (WAL); statements run on a dedicated thread."""
+
+    def __init__(self, path: str = REACTORS_DB_PATH):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reactors-sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS reactors ("
+                "message_id INTEGER NOT NULL, emoji TEXT NOT NULL, user_id INTEGER NOT NULL, "
+                "guild_id INTEGER NOT NULL, role_id INTEGER NOT NULL, "
+                "PRIMARY KEY (message_id, emoji, user_id)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS reactors_role ON reactors(guild_id, role_id, user_id)")
+            self._conn = conn
+        return self._conn
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def add(self, message_id: int, emoji: str, user_id: int, guild_id: int, role_id: int) -> None:
+        def work():
+            self._db().execute(
+                "INSERT INTO reactors VALUES (?, ?, ?, ?, ?) ON CONFLICT(message_id, emoji, user_id) "
+                "DO UPDATE SET role_id = excluded.role_id",
+                (message_id, emoji, user_id, guild_id, role_id),
+            )
+        await self._call(work)
+
+    async def remove(self, message_id: int, emoji: str, user_id: int) -> None:
+        def work():
+            self._db().execute(
+                "DELETE FROM reactors WHERE message_id = ? AND emoji = ? AND user_id = ?", (message_id, emoji, user_id)
+            )
+        await self._call(work)
+
+    @staticmethod
+    def _panel_filter(message_id: int, emojis: Optional[List[str]]) -> Tuple[str, list]:
+        where, params = "message_id = ?", [message_id]
+        if emojis is not None:
+            where += f" AND emoji IN ({','.join('?' * len(emojis))})"
+            params += emojis
+        return where, params
+
+    @staticmethod
+    def _by_role(rows) -> Dict[int, Set[int]]:
+        held: Dict[int, Set[int]] = {}
+        for role_id, user_id in rows:
+            held.setdefault(role_id, set()).add(user_id)
+        return held
+
+    async def peek(self, message_id: int, emojis: Optional[Iterable[str]] = None) -> Dict[int, Set[int]]:
+        """The rows of a panel (or of some of its emoji) as role_id -> user ids, left in place."""
+        emojis = None if emojis is None else list(emojis)
+
+        def work():
+            where, params = self._panel_filter(message_id, emojis)
+            return self._by_role(self._db().execute(f"SELECT role_id, user_id FROM reactors WHERE {where}", params))
+
+        if emojis is not None and not emojis:
+            return {}
+        return await self._call(work)
+
+    async def take(self, message_id: int, emojis: Optional[Iterable[str]] = None) -> Dict[int, Set[int]]:
+        """Delete and return the rows of a panel (or of some of its emoji) as role_id -> user ids."""
+        emojis = None if emojis is None else list(emojis)
+
+        def work():
+            db = self._db()
+            where, params = self._panel_filter(message_id, emojis)
+            db.execute("BEGIN")
+            try:
+                rows = db.execute(f"SELECT role_id, user_id FROM reactors WHERE {where}", params).fetchall()
+                db.execute(f"DELETE FROM reactors WHERE {where}", params)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            return self._by_role(rows)
+
+        if emojis is not None and not emojis:
+            return {}
+        return await self._call(work)
+
+    async def still_granted(
+        self,
+        guild_id: int,
+        role_id: int,
+        user_ids: Iterable[int],
+        skip_message: Optional[int] = None,
+        skip_emojis: Optional[Iterable[str]] = None,
+    ) -> Set[int]:
+        """
+        Those of ``user_ids`` who still hold a recorded reaction for ``role_id`` on
+        any panel, not counting ``skip_message`` (or just its ``skip_emojis``).
+        """
+        user_ids = list(user_ids)
+        skip_emojis = None if skip_emojis is None else list(skip_emojis)
+
+        def work():
+            db = self._db()
+            skip, skip_params = "", []
+            if skip_message is not None:
+                where, skip_params = self._panel_filter(skip_message, skip_emojis)
+                skip = f" AND NOT ({where})"
+            found: Set[int] = set()
+            for i in range(0, len(user_ids), 500):
+                chunk = user_ids[i:i + 500]
+                rows = db.execute(
+                    f"SELECT DISTINCT user_id FROM reactors WHERE guild_id = ? AND role_id = ? "
+                    f"AND user_id IN ({','.join('?' * len(chunk))}){skip}",
+                    [guild_id, role_id, *chunk, *skip_params],
+                )
+                found.update(r[0] for r in rows)
+            return found
+        return await self._call(work)
+
+    async def panels(self) -> List[Tuple[int, int]]:
+        """(message_id, guild_id) of every panel with recorded reactions."""
+        def work():
+            return self._db().execute("SELECT DISTINCT message_id, guild_id FROM reactors").fetchall()
+        return await self._call(work)
+
+    async def drop_messages(self, message_ids: Iterable[int]) -> None:
+        def work(ids):
+            db = self._db()
+            db.execute("BEGIN")
+            try:
+                db.executemany("DELETE FROM reactors WHERE message_id = ?", [(i,) for i in ids])
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        await self._call(work, list(message_ids))
+
+
+reactors = ReactorIndex()
@@ -1,24 +1,91 @@
-import json
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, ContextManager, Dict, Iterable, List, Optional, Set
+
+from utils.metrics import STORAGE_LATENCY
+from utils.persistence import JsonDocument, file_lock
 
 DATA_FILE = Path("data/role_messages.json")
+LOCK_FILE = Path("data/role_messages.json.lock")
+
+# (shard_ids, shard_count) when running as one worker of a cluster, else None
+_shards: Optional[tuple[frozenset, int]] = None
+
+def configure_shards(shard_ids: Iterable[int], shard_count: int) -> None:
+    """Restrict this process to panels in guilds that belong to the given shards."""
+    global _shards
+    _shards = (frozenset(shard_ids), shard_count)
+    _doc.invalidate()
+
+def owns_guild(guild_id: int) -> bool:
+    if _shards is None:
+        return True
+    shard_ids, shard_count = _shards
+    return (int(guild_id) >> 22) % shard_count in shard_ids
+
+def cluster_lock(lock_file: Path = LOCK_FILE) -> ContextManager:
+    """Exclusive flock on ``lock_file`` in cluster mode, for read-merge-writes of a shared file."""
+    return file_lock(lock_file) if _shards is not None else nullcontext()
+
+def _merge(on_disk: Optional[Dict[str, Any]], ours: Dict[str, Any]) -> Dict[str, Any]:
+    # Other workers share the file: keep their panels, replace ours.
+    if _shards is None or not on_disk:
+        return ours
+    merged = {
+        mid: entry for mid, entry in on_disk.get("messages", {}).items() if not owns_guild(entry.get("guild_id", 0))
+    }
+    merged.update(ours["messages"])
+    return {**on_disk, **ours, "messages": merged}
+
+# Reverse indexes (guild/channel/role id -> panel message ids) over the loaded
+# panels, so deletions can find affected panels without a full scan.
+_by_guild: Dict[int, Set[str]] = {}
+_by_channel: Dict[int, Set[str]] = {}
+_by_role: Dict[int, Set[str]] = {}
+
+def _index_add(mid: str, entry: Dict[str, Any]) -> None:
+    _by_guild.setdefault(int(entry.get("guild_id", 0)), set()).add(mid)
+    _by_channel.setdefault(int(entry.get("channel_id", 0)), set()).add(mid)
+    for role_id in entry.get("mappings", {}).values():
+        _by_role.setdefault(int(role_id), set()).add(mid)
+
+def _index_discard(mid: str, entry: Dict[str, Any]) -> None:
+    keys = [
+        (_by_guild, int(entry.get("guild_id", 0))),
+        (_by_channel, int(entry.get("channel_id", 0))),
+    ] + [(_by_role, int(role_id)) for role_id in entry.get("mappings", {}).values()]
+    for index, key in keys:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(mid)
+            if not ids:
+                del index[key]
+
+def _owned_only(data: Dict[str, Any]) -> Dict[str, Any]:
+    data["messages"] = {
+        mid: entry for mid, entry in data.get("messages", {}).items() if owns_guild(entry.get("guild_id", 0))
+    }
+    for index in (_by_guild, _by_channel, _by_role):
+        index.clear()
+    for mid, entry in data["messages"].items():
+        _index_add(mid, entry)
+    return data
 
-def _ensure_file():
-    if not DATA_FILE.exists():
-        DATA_FILE.write_text(json.dumps({"messages": {}}, indent=2))
+# Loaded once, served from memory, written behind on the persistence thread.
+_doc = JsonDocument(
+    DATA_FILE,
+    default=lambda: {"messages": {}},
+    on_load=_owned_only,
+    merge=_merge,
+    lock=cluster_lock,
+    latency=STORAGE_LATENCY,
+)
 
 def load_data() -> Dict[str, Any]:
-    _ensure_file()
-    try:
-        return json.loads(DATA_FILE.read_text() or '{"messages": {}}')
-    except json.JSONDecodeError:
-        # Reset on corruption
-        DATA_FILE.write_text(json.dumps({"messages": {}}, indent=2))
-        return {"messages": {}}
+    return _doc.data
 
 def save_data(data: Dict[str, Any]) -> None:
-    DATA_FILE.write_text(json.dumps(data, indent=2))
+    _doc.replace(data)
 
 def set_message_mapping(
     message_id: int,
@@ -27,10 +94,21 @@ def set_message_mapping(
     mapping: Dict[str, int],
     created_by: int,
     title: Optional[str],
-    description: str
+    description: str,
+    group: Optional[Dict[str, int]] = None,
+    ttl_s: Optional[int] = None
 ) -> None:
+    """
+    ``group`` ({"id", "page", "pages"}) marks one page of a panel split across
+    several messages; "id" is the first page's message id. Each page keeps its
+    own mappings, so reaction lookup stays a single dict access. ``ttl_s``
+    makes the panel's roles expire that many seconds after they are granted.
+    """
     data = load_data()
-    data["messages"][str(message_id)] = {
+    mid = str(message_id)
+    if mid in data["messages"]:
+        _index_discard(mid, data["messages"][mid])
+    data["messages"][mid] = {
         "guild_id": guild_id,
         "channel_id": channel_id,
         "mappings": mapping,
@@ -38,6 +116,11 @@ def set_message_mapping(
         "title": title,
         "description": description,
     }
+    if group:
+        data["messages"][mid]["group"] = group
+    if ttl_s:
+        data["messages"][mid]["ttl_s"] = int(ttl_s)
+    _index_add(mid, data["messages"][mid])
     save_data(data)
 
 def get_message_mapping(message_id: int) -> Optional[Dict[str, Any]]:
@@ -45,7 +128,56 @@ def get_message_mapping(message_id: int) -> Optional[Dict[str, Any]]:
     return data["messages"].get(str(message_id))
 
 def delete_message_mapping(message_id: int) -> None:
+    delete_message_mappings([message_id])
+
+def delete_message_mappings(message_ids: Iterable[int]) -> int:
+    """Drop the given panels; returns how many existed."""
+    data = load_data()
+    removed = 0
+    for message_id in message_ids:
+        entry = data["messages"].pop(str(message_id), None)
+        if entry is not None:
+            _index_discard(str(message_id), entry)
+            removed += 1
+    if removed:
+        save_data(data)
+    return removed
+
+def _lookup(index: Dict[int, Set[str]], key: int) -> List[int]:
+    load_data()  # indexes are built on load
+    return [int(mid) for mid in index.get(int(key), ())]
+
+def guild_message_ids(guild_id: int) -> List[int]:
+    return _lookup(_by_guild, guild_id)
+
+def channel_message_ids(channel_id: int) -> List[int]:
+    return _lookup(_by_channel, channel_id)
+
+def role_message_ids(role_id: int) -> List[int]:
+    return _lookup(_by_role, role_id)
+
+def indexed_guild_ids() -> List[int]:
+    load_data()
+    return list(_by_guild)
+
+def delete_guild_mappings(guild_id: int) -> int:
+    return delete_message_mappings(guild_message_ids(guild_id))
+
+def delete_channel_mappings(channel_id: int) -> int:
+    return delete_message_mappings(channel_message_ids(channel_id))
+
+def remove_role_from_mappings(role_id: int) -> int:
+    """Unmap a deleted role from every panel; panels left with no roles are dropped. Returns panels touched."""
     data = load_data()
-    if str(message_id) in data["messages"]:
-        del data["messages"][str(message_id)]
+    touched = role_message_ids(role_id)
+    for mid in touched:
+        entry = data["messages"][str(mid)]
+        _index_discard(str(mid), entry)
+        entry["mappings"] = {k: v for k, v in entry.get("mappings", {}).items() if int(v) != int(role_id)}
+        if entry["mappings"]:
+            _index_add(str(mid), entry)
+        else:
+            del data["messages"][str(mid)]
+    if touched:
         save_data(data)
+    return len(touched)
@@ -0,0 +1,163 @@
+"""
+Panel template registry.
+
+Templates are JSON files in TEMPLATES_DIR (one per template; the file name is
+the template key). Each file holds "label", "title", "description" and optional
+"example_pairs" ([emoji, role name] pairs) and "order". The preview embed, the
+legend text and the select option of every template are built once when the
+directory is loaded; interactions get a copy of the prebuilt preview.
+
+The directory is checked every TEMPLATES_POLL_S seconds and reloaded when a
+file is added, changed or removed, so new templates need no restart. A file
+that fails to parse keeps its previous version.
+"""
+import asyncio
+import datetime
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import nextcord
+
+from utils import embeds
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(os.getenv("TEMPLATES_DIR", "templates"))
+TEMPLATES_POLL_S = float(os.getenv("TEMPLATES_POLL_S", "5"))
+DEFAULT_TEMPLATE = "minimal"
+MAX_TEMPLATES = 25  # Discord's limit on options in one select menu
+
+Signature = Tuple[Tuple[str, int, int], ...]
+
+
+class Template:
+    __slots__ = ("key", "label", "title", "description", "example_pairs", "order", "legend", "option", "_preview")
+
+    def __init__(self, key: str, raw: Dict[str, Any]):
+        self.key = key
+        self.label = str(raw["label"])[:100]
+        self.title = str(raw["title"])
+        self.description = str(raw["description"])
+        self.example_pairs: List[Tuple[str, str]] = [(str(em), str(role)) for em, role in raw.get("example_pairs", [])]
+        self.order = int(raw.get("order", 1000))
+        self.legend = "\n".join(f"• {em} → @{role}" for em, role in self.example_pairs)
+        self.option = nextcord.SelectOption(
+            label=self.label, value=key, description=f"Preview and use the {self.label} template"[:100]
+        )
+
+        preview = embeds.base(self.title, self.description)
+        if self.legend:
+            preview.add_field(name="React with", value=self.legend[:1024], inline=False)
+        preview.add_field(
+            name="How it works",
+            value="React to add a role. Remove your reaction to remove the role.",
+            inline=False
+        )
+        preview.timestamp = None
+        self._preview = preview.to_dict()
+
+    def preview(self) -> nextcord.Embed:
+        """A fresh copy of the prebuilt preview embed, safe to modify."""
+        payload = dict(self._preview)
+        payload["fields"] = [dict(f) for f in self._preview.get("fields", [])]
+        emb = nextcord.Embed.from_dict(payload)
+        emb.timestamp = datetime.datetime.utcnow()
+        return emb
+
+
+FALLBACK = Template(DEFAULT_TEMPLATE, {
+    "label": "Minimal",
+    "title": "Choose Your Roles",
+    "description": "React to get roles. Add or remove your reaction at any time to toggle the role.",
+})
+
+
+def _signature(directory: Path) -> Signature:
+    try:
+        entries = [e for e in os.scandir(directory) if e.name.endswith(".json") and e.is_file()]
+    except FileNotFoundError:
+        return ()
+    return tuple(sorted((e.name, e.stat().st_mtime_ns, e.stat().st_size) for e in entries))
+
+
+class TemplateRegistry:
+    def __init__(self, directory: Path = TEMPLATES_DIR):
+        self.directory = directory
+        self._templates: Optional[Dict[str, Template]] = None
+        self._signature: Signature = ()
+        self._task: Optional[asyncio.Task] = None
+
+    def _read(self, signature: Signature) -> Dict[str, Template]:
+        previous = self._templates or {}
+        found: List[Template] = []
+        for name, _, _ in signature:
+            key = name[:-len(".json")].lower()
+            try:
+                raw = json.loads((self.directory / name).read_text(encoding="utf-8"))
+                found.append(Template(key, raw))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning("Template %s is invalid (%s); %s", name, e,
+                               "keeping the previous version" if key in previous else "skipping it")
+                if key in previous:
+                    found.append(previous[key])
+        found.sort(key=lambda t: (t.order, t.key))
+        if len(found) > MAX_TEMPLATES:
+            logger.warning("%s templates found; only the first %s are offered", len(found), MAX_TEMPLATES)
+            found = found[:MAX_TEMPLATES]
+        if not found:
+            logger.warning("No templates in %s; using the built-in minimal template", self.directory)
+            found = [FALLBACK]
+        return {t.key: t for t in found}
+
+    def load(self) -> None:
+        """Read the directory now (blocking). Called on first access and at startup."""
+        self._signature = _signature(self.directory)
+        self._templates = self._read(self._signature)
+        logger.info("Loaded %s templates from %s", len(self._templates), self.directory)
+
+    @property
+    def _loaded(self) -> Dict[str, Template]:
+        if self._templates is None:
+            self.load()
+        return self._templates
+
+    def get(self, key: Optional[str]) -> Template:
+        """The named template, else the default (or first) one."""
+        loaded = self._loaded
+        return loaded.get(key or "") or loaded.get(DEFAULT_TEMPLATE) or next(iter(loaded.values()))
+
+    def keys(self) -> List[str]:
+        return list(self._loaded)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._loaded
+
+    def select_options(self) -> List[nextcord.SelectOption]:
+        return [t.option for t in self._loaded.values()]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(TEMPLATES_POLL_S)
+            try:
+                signature = await asyncio.to_thread(_signature, self.directory)
+                if signature != self._signature:
+                    templates = await asyncio.to_thread(self._read, signature)
+                    self._templates, self._signature = templates, signature
+                    logger.info("Reloaded %s templates from %s", len(templates), self.directory)
+            except Exception as e:
+                logger.exception("Template reload failed: %s", e)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="template-reload")
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+templates = TemplateRegistry()
@@ -0,0 +1,304 @@
+"""
+Timed reaction roles.
+
+Panels created with a duration grant their role until it expires. Grants are
+rows in a SQLite table indexed by expiry (EXPIRY_DB_PATH), so there is no task
+per grant and nothing is read up front: the scheduler keeps a min-heap of
+upcoming deadlines, filled from the index EXPIRY_PRELOAD rows at a time
+starting at the earliest. When the earliest deadline arrives, every grant due
+within EXPIRY_BATCH_WINDOW_S is revoked in one pass, one member at a time (all
+of a member's expired roles in a single edit) at EXPIRY_RATE_PER_S.
+"""
+import asyncio
+import heapq
+import logging
+import math
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from typing import List, Optional, Tuple
+
+import nextcord
+
+from utils.metrics import ROLE_OPS, ROLE_OP_FAILURES, ROLE_OPS_SKIPPED, failure_status
+from utils.role_breaker import role_breaker
+from utils.storage import get_message_mapping, owns_guild
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_DB_PATH = os.getenv("EXPIRY_DB_PATH", os.path.join("data", "timed_roles.sqlite3"))
+EXPIRY_BATCH_WINDOW_S = float(os.getenv("EXPIRY_BATCH_WINDOW_S", "5"))
+EXPIRY_RATE_PER_S = float(os.getenv("EXPIRY_RATE_PER_S", "5"))
+EXPIRY_PRELOAD = 1000
+MAX_HEAP = 10 * EXPIRY_PRELOAD
+RETRY_AFTER_S = 300.0
+MAX_DURATION_S = 366 * 86400
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_DURATION = re.compile(r"(\d+)\s*([smhdw])")
+
+# (guild_id, user_id, role_id, message_id, emoji_key, expires_at)
+Grant = Tuple[int, int, int, int, str, float]
+
+
+def parse_duration(text: str) -> Optional[int]:
+    """'90m', '2h', '1d12h', '2w' -> seconds. Blank -> None. Raises ValueError if malformed."""
+    compact = text.strip().lower().replace(" ", "")
+    if not compact:
+        return None
+    parts = _DURATION.findall(compact)
+    if not parts or "".join(n + u for n, u in parts) != compact:
+        raise ValueError(f"Invalid duration '{text.strip()}'. Use e.g. 90m, 12h, 7d or 1d12h.")
+    seconds = sum(int(n) * _UNITS[u] for n, u in parts)
+    if not 60 <= seconds <= MAX_DURATION_S:
+        raise ValueError("Durations must be between 1 minute and 366 days.")
+    return seconds
+
+
+def format_duration(seconds: Optional[int]) -> str:
+    if not seconds:
+        return ""
+    out = []
+    for unit in ("w", "d", "h", "m", "s"):
+        count, seconds = divmod(seconds, _UNITS[unit])
+        if count:
+            out.append(f"{count}{unit}")
+    return "".join(out)
+
+
+class TimedGrantStore:
+    """Grant rows on a local SQLite file (WAL); statements run on a dedicated thread."""
+
+    def __init__(self, path: str = EXPIRY_DB_PATH):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="expiry-sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS grants ("
+                "guild_id INTEGER NOT NULL, user_id INTEGER NOT NULL, role_id INTEGER NOT NULL, "
+                "message_id INTEGER NOT NULL, emoji TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (guild_id, user_id, role_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS grants_expires ON grants(expires_at)")
+            self._conn = conn
+        return self._conn
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _many(self, sql: str, rows: list) -> None:
+        db = self._db()
+        db.execute("BEGIN")
+        try:
+            db.executemany(sql, rows)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    async def upsert(self, grant: Grant) -> None:
+        def work(g):
+            self._db().execute(
+                "INSERT INTO grants VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(guild_id, user_id, role_id) DO UPDATE SET "
+                "message_id = excluded.message_id, emoji = excluded.emoji, expires_at = excluded.expires_at",
+                g,
+            )
+        await self._call(work, grant)
+
+    async def delete(self, guild_id: int, user_id: int, role_id: int) -> None:
+        def work():
+            self._db().execute(
+                "DELETE FROM grants WHERE guild_id = ? AND user_id = ? AND role_id = ?", (guild_id, user_id, role_id)
+            )
+        await self._call(work)
+
+    async def next_deadlines(self, after: float, limit: int) -> List[float]:
+        def work():
+            rows = self._db().execute(
+                "SELECT expires_at FROM grants WHERE expires_at > ? ORDER BY expires_at LIMIT ?", (after, limit)
+            )
+            return [r[0] for r in rows]
+        return await self._call(work)
+
+    async def due(self, until: float) -> List[Grant]:
+        def work():
+            return self._db().execute(
+                "SELECT guild_id, user_id, role_id, message_id, emoji, expires_at FROM grants "
+                "WHERE expires_at <= ? ORDER BY guild_id, user_id", (until,)
+            ).fetchall()
+        return await self._call(work)
+
+    async def remove(self, grants: List[Grant]) -> None:
+        """Delete grants that were handled, unless they were renewed in the meantime."""
+        await self._call(
+            self._many,
+            "DELETE FROM grants WHERE guild_id = ? AND user_id = ? AND role_id = ? AND expires_at = ?",
+            [(g[0], g[1], g[2], g[5]) for g in grants],
+        )
+
+    async def postpone(self, grants: List[Grant], expires_at: float) -> None:
+        await self._call(
+            self._many,
+            "UPDATE grants SET expires_at = ? WHERE guild_id = ? AND user_id = ? AND role_id = ? AND expires_at = ?",
+            [(expires_at, g[0], g[1], g[2], g[5]) for g in grants],
+        )
+
+
+class ExpiryScheduler:
+    def __init__(self, store: TimedGrantStore):
+        self.store = store
+        # Every stored deadline <= _horizon is in the heap (stale ones are harmless:
+        # waking for them finds nothing due). Deadlines past it are loaded later.
+        self._heap: List[float] = []
+        self._horizon = 0.0
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _push(self, expires_at: float) -> None:
+        if expires_at > self._horizon:
+            return
+        if len(self._heap) >= MAX_HEAP and expires_at > self._heap[0]:
+            # Keep memory bounded: pull the horizon in; this deadline is reloaded from the index later
+            self._horizon = math.nextafter(expires_at, 0.0)
+            return
+        if self._wake is not None and (not self._heap or expires_at < self._heap[0]):
+            self._wake.set()
+        heapq.heappush(self._heap, expires_at)
+
+    async def grant(self, guild_id: int, user_id: int, role_id: int, message_id: int, emoji_key: str, ttl_s: float):
+        expires_at = time.time() + ttl_s
+        await self.store.upsert((guild_id, user_id, role_id, message_id, emoji_key, expires_at))
+        self._push(expires_at)
+
+    async def cancel(self, guild_id: int, user_id: int, role_id: int) -> None:
+        await self.store.delete(guild_id, user_id, role_id)
+
+    def start(self, bot) -> None:
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run(bot), name="role-expiry")
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _retry_later(self, grants: List[Grant]) -> None:
+        retry_at = time.time() + RETRY_AFTER_S
+        await self.store.postpone(grants, retry_at)
+        self._push(retry_at)
+
+    async def _refill(self) -> None:
+        deadlines = await self.store.next_deadlines(self._horizon, EXPIRY_PRELOAD)
+        for expires_at in deadlines:
+            heapq.heappush(self._heap, expires_at)
+        self._horizon = deadlines[-1] if len(deadlines) == EXPIRY_PRELOAD else math.inf
+
+    async def _run(self, bot):
+        await bot.wait_until_ready()
+        while True:
+            try:
+                if self._horizon != math.inf and (not self._heap or self._heap[0] > self._horizon):
+                    await self._refill()
+                self._wake.clear()
+                delay = self._heap[0] - time.time() if self._heap else None
+                if delay is None or delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                until = time.time() + EXPIRY_BATCH_WINDOW_S
+                while self._heap and self._heap[0] <= until:
+                    heapq.heappop(self._heap)
+                await self._expire(bot, await self.store.due(until))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Role expiry pass failed")
+                await asyncio.sleep(RETRY_AFTER_S)
+
+    async def _expire(self, bot, grants: List[Grant]) -> None:
+        interval = 1.0 / EXPIRY_RATE_PER_S if EXPIRY_RATE_PER_S > 0 else 0.0
+        expired = failed = 0
+        for (guild_id, user_id), member_grants in groupby(grants, key=lambda g: (g[0], g[1])):
+            member_grants = list(member_grants)
+            if not owns_guild(guild_id):
+                continue  # another cluster worker's guild
+            guild = bot.get_guild(guild_id)
+            if guild is None:
+                await self.store.remove(member_grants)
+                continue
+            if guild.unavailable:
+                await self._retry_later(member_grants)
+                continue
+
+            try:
+                member = guild.get_member(user_id) or await guild.fetch_member(user_id)
+            except nextcord.NotFound:
+                await self.store.remove(member_grants)  # left the server
+                continue
+            except nextcord.HTTPException:
+                await self._retry_later(member_grants)
+                continue
+
+            roles = [r for r in (guild.get_role(g[2]) for g in member_grants) if r is not None and r in member.roles]
+            blocked = [r for r in roles if not role_breaker.allow(guild.id, r.id)]
+            if blocked:
+                ROLE_OPS_SKIPPED.inc(op="expire")
+                await self._retry_later(member_grants)
+                continue
+            if roles:
+                try:
+                    ROLE_OPS.inc(op="expire")
+                    await member.remove_roles(*roles, reason="Timed reaction role expired")
+                    for role in roles:
+                        role_breaker.success(guild.id, role.id)
+                except nextcord.HTTPException as e:
+                    ROLE_OP_FAILURES.inc(op="expire", status=failure_status(e))
+                    if isinstance(e, nextcord.Forbidden):
+                        for role in roles:
+                            role_breaker.forbidden(guild.id, role.id)
+                    failed += len(member_grants)
+                    await self._retry_later(member_grants)
+                    continue
+
+            await self.store.remove(member_grants)
+            expired += len(member_grants)
+            # Drop the member's reaction too, so reacting again re-grants the role
+            for grant in member_grants:
+                await self._remove_reaction(bot, guild, member, grant)
+            if interval:
+                await asyncio.sleep(interval)
+
+        if expired or failed:
+            logger.info("Expired %s timed role grant(s); %s postponed after errors", expired, failed)
+
+    async def _remove_reaction(self, bot, guild: nextcord.Guild, member: nextcord.Member, grant: Grant) -> None:
+        entry = get_message_mapping(grant[3])
+        channel = guild.get_channel_or_thread(int(entry["channel_id"])) if entry else None
+        if channel is None:
+            return
+        key = grant[4]
+        if key.startswith("e:"):
+            emoji = bot.get_emoji(int(key[2:])) or nextcord.PartialEmoji(name="emoji", id=int(key[2:]))
+        else:
+            emoji = key[2:]
+        try:
+            await channel.get_partial_message(grant[3]).remove_reaction(emoji, member)
+        except nextcord.HTTPException:
+            pass  # needs Manage Messages; the role is gone either way
+
+
+expiry = ExpiryScheduler(TimedGrantStore())
@@ -0,0 +1,177 @@
+"""
+Lightweight per-interaction tracing.
+
+A sampled trace is one JSON line holding the handler name, its total duration and
+the start offset/duration of each stage recorded with ``span()``. Lines go to a
+rotating JSONL file through a background logging thread, so the event loop only
+pays for a queue put.
+
+Summarise an exported file (including rotated siblings) with:
+    python -m utils.tracing data/traces.jsonl
+"""
+import functools
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join("data", "traces.jsonl"))
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_BACKUPS = int(os.getenv("TRACE_BACKUPS", "5"))
+
+_export_logger = logging.getLogger("tracing.export")
+_export_logger.propagate = False
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _Trace:
+    __slots__ = ("name", "started_wall", "started", "spans", "attrs")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_wall = time.time()
+        self.started = time.perf_counter()
+        self.spans: List[dict] = []
+        self.attrs: Dict[str, object] = {}
+
+
+_current: ContextVar[Optional[_Trace]] = ContextVar("current_trace", default=None)
+
+
+def _ensure_exporter():
+    global _listener
+    if _listener is not None:
+        return
+    os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        TRACE_FILE, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS, encoding="utf-8"
+    )
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    _export_logger.addHandler(logging.handlers.QueueHandler(q))
+    _export_logger.setLevel(logging.INFO)
+    _listener = logging.handlers.QueueListener(q, file_handler)
+    _listener.start()
+
+
+def shutdown():
+    """Flush pending spans; call on graceful shutdown."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+@contextmanager
+def trace(name: str):
+    if TRACE_SAMPLE_RATE <= 0 or _current.get() is not None or random.random() >= TRACE_SAMPLE_RATE:
+        yield
+        return
+    tr = _Trace(name)
+    token = _current.set(tr)
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        record = {
+            "trace": tr.name,
+            "ts": round(tr.started_wall, 3),
+            "duration_ms": round((time.perf_counter() - tr.started) * 1000, 3),
+            "spans": tr.spans,
+        }
+        if tr.attrs:
+            record["attrs"] = tr.attrs
+        if error:
+            record["error"] = error
+        _ensure_exporter()
+        _export_logger.info(json.dumps(record, separators=(",", ":")))
+
+
+def traced(name: str):
+    """Decorator form of ``trace`` for coroutine handlers."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with trace(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def span(name: str):
+    tr = _current.get()
+    if tr is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        tr.spans.append({
+            "name": name,
+            "start_ms": round((start - tr.started) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+        })
+
+
+def set_attr(key: str, value: object):
+    tr = _current.get()
+    if tr is not None:
+        tr.attrs[key] = value
+
+
+def _pct(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def summarize(path: str) -> str:
+    totals: Dict[str, List[float]] = {}
+    stages: Dict[str, Dict[str, List[float]]] = {}
+    files = sorted(glob.glob(path + ".*"), reverse=True) + [path]
+    for fname in files:
+        if not os.path.exists(fname):
+            continue
+        with open(fname, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                totals.setdefault(rec["trace"], []).append(rec["duration_ms"])
+                per_stage = stages.setdefault(rec["trace"], {})
+                for sp in rec.get("spans", []):
+                    per_stage.setdefault(sp["name"], []).append(sp["duration_ms"])
+
+    out: List[str] = []
+    for name, durations in sorted(totals.items()):
+        out.append(
+            f"{name}  n={len(durations)}  p50={_pct(durations, 50):.1f}ms  "
+            f"p90={_pct(durations, 90):.1f}ms  p99={_pct(durations, 99):.1f}ms  max={max(durations):.1f}ms"
+        )
+        total_sum = sum(durations) or 1.0
+        for stage, values in sorted(stages.get(name, {}).items(), key=lambda kv: -sum(kv[1])):
+            out.append(
+                f"    {stage:<20} n={len(values):<7} p50={_pct(values, 50):>8.1f}ms  p90={_pct(values, 90):>8.1f}ms  "
+                f"p99={_pct(values, 99):>8.1f}ms  max={max(values):>8.1f}ms  share={sum(values) / total_sum:6.1%}"
+            )
+    return "\n".join(out) if out else "No traces found."
+
+
+if __name__ == "__main__":
+    print(summarize(sys.argv[1] if len(sys.argv) > 1 else TRACE_FILE))
@@ -0,0 +1,200 @@
+"""
+Reaction-role usage statistics.
+
+Each panel message and each role has a fixed-size ring buffer of time buckets
+(USAGE_BUCKETS buckets of USAGE_BUCKET_S seconds, a week of hours by default)
+counting adds, removes and failed role edits, plus all-time totals. Recording
+an event is a couple of array increments; nothing touches the disk until the
+flusher snapshots the counters to data/usage_stats.json every USAGE_FLUSH_S.
+"""
+import asyncio
+import logging
+import os
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.persistence import JsonDocument
+from utils.storage import cluster_lock, owns_guild
+
+logger = logging.getLogger(__name__)
+
+USAGE_FILE = "data/usage_stats.json"
+USAGE_LOCK_FILE = Path("data/usage_stats.json.lock")
+USAGE_BUCKET_S = int(os.getenv("USAGE_BUCKET_S", "3600"))
+USAGE_BUCKETS = int(os.getenv("USAGE_BUCKETS", "168"))
+USAGE_FLUSH_S = float(os.getenv("USAGE_FLUSH_S", "60"))
+
+ADDS, REMOVES, FAILURES = range(3)
+FIELDS = ("adds", "removes", "failures")
+
+
+def current_epoch(now: Optional[float] = None) -> int:
+    return int((time.time() if now is None else now) // USAGE_BUCKET_S)
+
+
+class RingSeries:
+    """Per-bucket [adds, removes, failures] for the last USAGE_BUCKETS buckets."""
+
+    __slots__ = ("epochs", "counts", "total")
+
+    def __init__(self):
+        self.epochs = array("q", [-1]) * USAGE_BUCKETS
+        self.counts = array("L", [0]) * (USAGE_BUCKETS * 3)
+        self.total = [0, 0, 0]
+
+    def bump(self, epoch: int, field: int, amount: int = 1) -> None:
+        slot = epoch % USAGE_BUCKETS
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.counts[slot * 3:slot * 3 + 3] = array("L", [0, 0, 0])
+        self.counts[slot * 3 + field] += amount
+        self.total[field] += amount
+
+    def bucket(self, epoch: int) -> Tuple[int, int, int]:
+        slot = epoch % USAGE_BUCKETS
+        if self.epochs[slot] != epoch:
+            return 0, 0, 0
+        return tuple(self.counts[slot * 3:slot * 3 + 3])
+
+    def series(self, epoch: int, n: int, field: int) -> List[int]:
+        """One field over the last ``n`` buckets ending at ``epoch``, oldest first."""
+        return [self.bucket(e)[field] for e in range(epoch - n + 1, epoch + 1)]
+
+    def window(self, epoch: int, n: int) -> List[int]:
+        sums = [0, 0, 0]
+        for e in range(epoch - n + 1, epoch + 1):
+            for i, v in enumerate(self.bucket(e)):
+                sums[i] += v
+        return sums
+
+    def to_json(self) -> Dict[str, Any]:
+        buckets = {
+            str(e): list(self.counts[slot * 3:slot * 3 + 3])
+            for slot, e in enumerate(self.epochs) if e >= 0
+        }
+        return {"total": list(self.total), "buckets": buckets}
+
+    @classmethod
+    def from_json(cls, raw: Dict[str, Any], epoch: int) -> "RingSeries":
+        series = cls()
+        series.total = [int(v) for v in raw.get("total", [0, 0, 0])]
+        for e, counts in raw.get("buckets", {}).items():
+            e = int(e)
+            if epoch - USAGE_BUCKETS < e <= epoch:
+                slot = e % USAGE_BUCKETS
+                series.epochs[slot] = e
+                series.counts[slot * 3:slot * 3 + 3] = array("L", counts)
+        return series
+
+
+class GuildUsage:
+    __slots__ = ("panels", "roles")
+
+    def __init__(self):
+        self.panels: Dict[int, RingSeries] = {}
+        self.roles: Dict[int, RingSeries] = {}
+
+
+def _owned_only(data: Dict[str, Any]) -> Dict[str, Any]:
+    data["guilds"] = {gid: g for gid, g in data.get("guilds", {}).items() if owns_guild(int(gid))}
+    return data
+
+
+def _merge(on_disk: Optional[Dict[str, Any]], ours: Dict[str, Any]) -> Dict[str, Any]:
+    # Cluster workers share the file: keep the guilds other workers own.
+    if not on_disk:
+        return ours
+    guilds = {gid: g for gid, g in on_disk.get("guilds", {}).items() if not owns_guild(int(gid))}
+    guilds.update(ours["guilds"])
+    return {**ours, "guilds": guilds}
+
+
+_doc = JsonDocument(
+    USAGE_FILE,
+    default=lambda: {"bucket_s": USAGE_BUCKET_S, "guilds": {}},
+    on_load=_owned_only,
+    merge=_merge,
+    lock=lambda: cluster_lock(USAGE_LOCK_FILE),
+)
+
+
+class UsageStats:
+    def __init__(self, doc: JsonDocument):
+        self._doc = doc
+        self._guilds: Optional[Dict[int, GuildUsage]] = None
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+
+    def _load(self) -> Dict[int, GuildUsage]:
+        if self._guilds is None:
+            data = self._doc.data
+            epoch = current_epoch()
+            if data.get("bucket_s") != USAGE_BUCKET_S:
+                # Buckets of a different width can't be mapped onto the ring; keep only totals
+                logger.info("USAGE_BUCKET_S changed; discarding stored usage time series")
+                for g in data.get("guilds", {}).values():
+                    for kind in ("panels", "roles"):
+                        for raw in g.get(kind, {}).values():
+                            raw["buckets"] = {}
+            self._guilds = {}
+            for gid, raw in data.get("guilds", {}).items():
+                usage = GuildUsage()
+                usage.panels = {int(k): RingSeries.from_json(v, epoch) for k, v in raw.get("panels", {}).items()}
+                usage.roles = {int(k): RingSeries.from_json(v, epoch) for k, v in raw.get("roles", {}).items()}
+                self._guilds[int(gid)] = usage
+        return self._guilds
+
+    def guild(self, guild_id: int) -> Optional[GuildUsage]:
+        return self._load().get(guild_id)
+
+    def record(self, guild_id: int, message_id: int, role_id: int, field: int) -> None:
+        """Count one add/remove/failure for a panel and its role. In memory only."""
+        usage = self._load().get(guild_id)
+        if usage is None:
+            usage = self._guilds[guild_id] = GuildUsage()
+        epoch = current_epoch()
+        for series_map, key in ((usage.panels, message_id), (usage.roles, role_id)):
+            series = series_map.get(key)
+            if series is None:
+                series = series_map[key] = RingSeries()
+            series.bump(epoch, field)
+        self._dirty = True
+
+    def flush(self) -> None:
+        """Snapshot the counters into the JSON document (written behind)."""
+        if not self._dirty or self._guilds is None:
+            return
+        self._dirty = False
+        self._doc.replace({
+            "bucket_s": USAGE_BUCKET_S,
+            "guilds": {
+                str(gid): {
+                    "panels": {str(k): s.to_json() for k, s in usage.panels.items()},
+                    "roles": {str(k): s.to_json() for k, s in usage.roles.items()},
+                }
+                for gid, usage in self._guilds.items()
+            },
+        })
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(USAGE_FLUSH_S)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception("Failed to flush usage stats: %s", e)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="usage-flush")
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.flush()
+
+
+usage = UsageStats(_doc)
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 
@@ -6,6 +7,12 @@ import nextcord
 from nextcord.ext import commands
 
 from utils.emoji_manager import ensure_application_emojis, load_global_config
+from utils.command_sync import sync_commands
+from utils.cache_profile import bot_options, profile_from_env
+from utils.challenges import warm_up as warm_up_captcha
+from utils.loop_monitor import LoopLagMonitor
+from utils.metrics import install_ratelimit_listeners, metrics_port_from_env, start_metrics_server
+from utils import audit, persistence, startup, tracing
 
 load_dotenv()
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
@@ -23,10 +30,17 @@ TOKEN = os.getenv("DISCORD_TOKEN")
 if not TOKEN:
     raise RuntimeError("DISCORD_TOKEN is not set in environment")
 
+CACHE_PROFILE = profile_from_env()
+
 intents = nextcord.Intents.default()
 intents.members = True  # required to receive on_member_join
-intents.all()
-bot = commands.Bot(intents=intents, help_command=None)
+# Members are resolved from interactions/events or fetched on demand, so the
+# member cache and startup chunking are opt-in (CACHE_PROFILE=full).
+bot = commands.Bot(intents=intents, help_command=None, **bot_options(intents, CACHE_PROFILE))
+loop_monitor = LoopLagMonitor(threshold_ms=float(os.getenv("LOOP_LAG_THRESHOLD_MS", "250")))
+install_ratelimit_listeners(bot)
+METRICS_PORT = metrics_port_from_env()
+startup.PROFILE.mark("imports")
 
 
 def load_all_cogs(bot: commands.Bot, cogs_dir: str = "cogs"):
@@ -41,13 +55,40 @@ def load_all_cogs(bot: commands.Bot, cogs_dir: str = "cogs"):
         ext = f"{cogs_dir.replace(os.sep, '.')}.{filename[:-3]}"
         try:
             bot.load_extension(ext)
+            startup.PROFILE.mark(f"load {ext}")
             logger.info("Loaded cog: %s", ext)
         except Exception as e:
             logger.exception("Failed to load cog %s: %s", ext, e)
 
+@bot.event
+async def on_connect():
+    startup.mark_once("connect")
+    # Replaces the default on_connect, which re-syncs every command on each start
+    try:
+        await sync_commands(bot)
+    except Exception as e:
+        logger.exception("Application command sync failed: %s", e)
+    startup.mark_once("command sync")
+    # PIL and the captcha fonts load off the event loop while guilds stream in
+    if not getattr(bot, "_captcha_warmup", None):
+        bot._captcha_warmup = asyncio.get_running_loop().run_in_executor(None, warm_up_captcha)
+
 @bot.event
 async def on_ready():
+    if startup.mark_once("ready"):
+        logger.info("Startup: %s", startup.PROFILE.report())
     logger.info("Logged in as %s (ID: %s)", bot.user, bot.user.id)
+    persistence.start(asyncio.get_running_loop())
+    logger.info(
+        "Cache profile '%s': %s guilds, %s cached users, RSS %.1f MiB",
+        CACHE_PROFILE, len(bot.guilds), len(bot.users), startup.rss_mb(),
+    )
+    loop_monitor.start()
+    if METRICS_PORT and not getattr(bot, "_metrics_runner", None):
+        try:
+            bot._metrics_runner = await start_metrics_server(METRICS_PORT, os.getenv("METRICS_HOST", "127.0.0.1"))
+        except Exception as e:
+            logger.exception("Failed to start metrics endpoint: %s", e)
     try:
         await bot.change_presence(
             status=nextcord.Status.online,
@@ -70,7 +111,14 @@ def main():
     logger.info("Global config loaded. Emoji URLs: %s", cfg.get("emoji_urls"))
 
     load_all_cogs(bot, "cogs")
-    bot.run(TOKEN)
+    # JSON stores are read here, before the loop starts; afterwards they are written behind
+    persistence.preload()
+    try:
+        bot.run(TOKEN)
+    finally:
+        persistence.flush_all()
+        audit.journal.close()
+        tracing.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import time
 from io import BytesIO
@@ -10,12 +11,23 @@ from nextcord import ButtonStyle, Embed, File, ui
 
 from utils.config_store import get_guild_config, set_guild_config
 from utils.challenges import (
+    get_challenge,
     get_or_create_active_challenge,
+    record_wrong_attempt,
     clear_challenge,
-    challenges,
+    purge_expired_challenges,
     CHALLENGE_TTL_MINUTES,
 )
 from utils.emoji_manager import get_button_emoji
+from utils.audit import OUTCOMES, journal, pass_rate
+from utils.backfill import BackfillJob, list_running_guild_ids
+from utils.deadlines import DEADLINE_BATCH, DEADLINE_KICK_RATE_PER_S, DEADLINE_MAX_MINUTES, deadlines
+from utils.metrics import DEADLINE_KICKS, EVENTS_RECEIVED, ROLE_OPS, ROLE_OP_FAILURES, ROLE_OPS_SKIPPED, failure_status, observe_ack
+from utils.role_breaker import role_breaker
+from utils.tracing import set_attr, span, traced
+from utils.state_backend import get_backend
+from utils.command_sync import sync_commands
+from utils.dedup import seen
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +36,12 @@ BLUE = nextcord.Color.blurple()
 ORANGE = nextcord.Color.orange()
 RED = nextcord.Color.red()
 
-VERIFY_COOLDOWN_S = 4
-last_verify_click_ts: dict[int, float] = {}  # user_id -> last click
+VERIFY_COOLDOWN_S = 4  # per-user click cooldown, kept in the state backend as cooldown:<user_id>
+backfill_tasks: dict[int, asyncio.Task] = {}  # guild_id -> running backfill
+notify_tasks: set[asyncio.Task] = set()  # admin notifications in flight
+DEADLINE_RETRY_S = 300  # deadline kicks that failed are retried this much later
+DEADLINE_UNAVAILABLE_RETRY_S = 60  # guild not in the cache (reconnecting, or another worker's shard)
+kick_blocked: dict[int, float] = {}  # guild_id -> time.time() of the next kick attempt after a 403
 
 async def send_embed_interaction(
     interaction: Interaction,
@@ -40,10 +56,62 @@ async def send_embed_interaction(
     if view is not None:
         kwargs["view"] = view
 
-    if not interaction.response.is_done():
-        await interaction.response.send_message(**kwargs)
-    else:
-        await interaction.followup.send(**kwargs)
+    with span("respond"):
+        if not interaction.response.is_done():
+            await interaction.response.send_message(**kwargs)
+            data = getattr(interaction, "data", None) or {}
+            observe_ack(interaction, data.get("custom_id") or data.get("name") or "unknown")
+        else:
+            await interaction.followup.send(**kwargs)
+
+async def _notify_admins(guild: nextcord.Guild, embed: Embed) -> bool:
+    """DM the admin who configured verification, else the server owner. True if one got it."""
+    cfg = get_guild_config(guild.id) or {}
+    for user_id in dict.fromkeys(u for u in (cfg.get("configured_by"), guild.owner_id) if u):
+        try:
+            user = guild.get_member(user_id) or await guild.fetch_member(user_id)
+            await user.send(embed=embed)
+            return True
+        except Exception:
+            continue
+    return False
+
+def _spawn_notify(coro):
+    task = asyncio.create_task(coro)
+    notify_tasks.add(task)
+    task.add_done_callback(notify_tasks.discard)
+
+async def _notify_role_blocked(guild: nextcord.Guild, role: nextcord.Role):
+    embed = Embed(
+        title="Verification Role Paused",
+        description=(
+            f"I couldn't manage the role **{role.name}** in **{guild.name}** due to missing permissions. "
+            f"Please ensure my top role is higher than **{role.name}** and I have 'Manage Roles'.\n\n"
+            "Verification skips this role until the server's roles change; I'll also retry periodically."
+        ),
+        color=RED
+    )
+    if not await _notify_admins(guild, embed):
+        logger.warning("Could not notify any admin of guild %s about role %s", guild.id, role.id)
+
+async def _notify_kick_blocked(guild: nextcord.Guild):
+    embed = Embed(
+        title="Verification Deadline Paused",
+        description=(
+            f"I couldn't remove unverified members from **{guild.name}** after their verification deadline "
+            "due to missing permissions. Please give me 'Kick Members' and make sure my top role is above "
+            "the roles of new members.\n\n"
+            f"Overdue members are kept and retried every {DEADLINE_RETRY_S // 60} minutes."
+        ),
+        color=RED
+    )
+    if not await _notify_admins(guild, embed):
+        logger.warning("Could not notify any admin of guild %s about deadline kicks", guild.id)
+
+def _role_failed(guild: nextcord.Guild, role: nextcord.Role, e: Exception):
+    """Trip the role's breaker on 403 and notify the admins once, in the background."""
+    if isinstance(e, nextcord.Forbidden) and role_breaker.forbidden(guild.id, role.id):
+        _spawn_notify(_notify_role_blocked(guild, role))
 
 class SolveModal(Modal):
     def __init__(self, guild_id: int, user_id: int):
@@ -59,15 +127,19 @@ class SolveModal(Modal):
         )
         self.add_item(self.answer_input)
 
+    @traced("solve_modal")
     async def callback(self, interaction: Interaction):
-        ch = challenges.get((self.guild_id, self.user_id))
+        EVENTS_RECEIVED.inc(event="modal_submit")
+        ch = await get_challenge(self.guild_id, self.user_id)
         if ch is None or ch.is_expired():
-            clear_challenge(self.guild_id, self.user_id)
+            await clear_challenge(self.guild_id, self.user_id)
+            journal.record(self.guild_id, self.user_id, "expired")
             embed = Embed(
                 title="Challenge Expired",
                 description="Your challenge expired. Click Verify again to get a new one.",
                 color=ORANGE
             )
+            set_attr("outcome", "expired")
             await send_embed_interaction(interaction, embed, ephemeral=True)
             return
 
@@ -75,40 +147,60 @@ class SolveModal(Modal):
         expected = ch.answer.strip().upper()
 
         if given == expected:
-            clear_challenge(self.guild_id, self.user_id)
+            await clear_challenge(self.guild_id, self.user_id)
             guild = interaction.guild
             if guild is None:
                 embed = Embed(title="Error", description="Could not find guild context.", color=RED)
                 await send_embed_interaction(interaction, embed, ephemeral=True)
                 return
 
-            cfg = get_guild_config(guild.id)
+            with span("config_read"):
+                cfg = get_guild_config(guild.id)
             if not cfg:
                 embed = Embed(title="Not Configured", description="Verification isn't set up in this server.", color=RED)
                 await send_embed_interaction(interaction, embed, ephemeral=True)
                 return
 
-            member = guild.get_member(self.user_id) or await guild.fetch_member(self.user_id)
+            with span("member_resolve"):
+                member = guild.get_member(self.user_id) or await guild.fetch_member(self.user_id)
             verified_role = guild.get_role(cfg["verified_role_id"])
             not_verified_role = guild.get_role(cfg["not_verified_role_id"])
 
             added_text = ""
             removed_text = ""
 
-            if verified_role:
+            if verified_role and not role_breaker.allow(guild.id, verified_role.id):
+                ROLE_OPS_SKIPPED.inc(op="add")
+                added_text = "The verified role can't be granted right now; the server admins have been notified."
+            elif verified_role:
                 try:
-                    await member.add_roles(verified_role, reason="Verification success")
+                    ROLE_OPS.inc(op="add")
+                    with span("role_add"):
+                        await member.add_roles(verified_role, reason="Verification success")
+                    role_breaker.success(guild.id, verified_role.id)
+                    # Only a member who actually got the role is spared the deadline
+                    deadlines.cancel(guild.id, member.id)
                     added_text = f"Granted {verified_role.mention}."
                 except Exception as e:
+                    ROLE_OP_FAILURES.inc(op="add", status=failure_status(e))
                     logger.warning("Failed to add verified role: %s", e)
+                    _role_failed(guild, verified_role, e)
                     added_text = "Tried to grant the verified role but lacked permission."
 
-            if not_verified_role:
+            if not_verified_role and not role_breaker.allow(guild.id, not_verified_role.id):
+                ROLE_OPS_SKIPPED.inc(op="remove")
+                removed_text = "The not-verified role can't be removed right now; the server admins have been notified."
+            elif not_verified_role:
                 try:
-                    await member.remove_roles(not_verified_role, reason="Verification success")
+                    ROLE_OPS.inc(op="remove")
+                    with span("role_remove"):
+                        await member.remove_roles(not_verified_role, reason="Verification success")
+                    role_breaker.success(guild.id, not_verified_role.id)
                     removed_text = f"Removed {not_verified_role.mention}."
                 except Exception as e:
+                    ROLE_OP_FAILURES.inc(op="remove", status=failure_status(e))
                     logger.warning("Failed to remove not-verified role: %s", e)
+                    _role_failed(guild, not_verified_role, e)
                     removed_text = "Tried to remove the not-verified role but lacked permission."
 
             embed = Embed(
@@ -116,13 +208,18 @@ class SolveModal(Modal):
                 description=f"{added_text} {removed_text}".strip(),
                 color=GREEN
             )
+            set_attr("outcome", "verified")
+            journal.record(guild.id, member.id, "verified")
             await send_embed_interaction(interaction, embed, ephemeral=True)
             logger.info("User %s verified in guild %s", member.id, guild.id)
             return
 
-        ch.attempts_left -= 1
+        ch.attempts_left = await record_wrong_attempt(self.guild_id, self.user_id)
+        outcome = "incorrect" if ch.attempts_left > 0 else "exhausted"
+        set_attr("outcome", outcome)
+        journal.record(self.guild_id, self.user_id, outcome)
         if ch.attempts_left <= 0:
-            clear_challenge(self.guild_id, self.user_id)
+            await clear_challenge(self.guild_id, self.user_id)
             embed = Embed(
                 title="Challenge Failed",
                 description="Incorrect answer. You have used all 5 attempts. Click Verify to start a new challenge.",
@@ -196,10 +293,14 @@ class PanelViewWithEmoji(View):
         btn.callback = _cb
         self.add_item(btn)
 
+@traced("handle_start_verify")
 async def handle_start_verify(interaction: Interaction):
+    EVENTS_RECEIVED.inc(event="verify_click")
     now = time.time()
-    last = last_verify_click_ts.get(interaction.user.id, 0.0)
-    if now - last < VERIFY_COOLDOWN_S:
+    backend = get_backend()
+    cooldown_key = f"cooldown:{interaction.user.id}"
+    if not await backend.set_nx(cooldown_key, str(now), VERIFY_COOLDOWN_S):
+        last = float(await backend.get(cooldown_key) or now)
         left = int(VERIFY_COOLDOWN_S - (now - last))
         left = max(left, 1)
         embed = Embed(
@@ -209,7 +310,6 @@ async def handle_start_verify(interaction: Interaction):
         )
         await send_embed_interaction(interaction, embed, ephemeral=True)
         return
-    last_verify_click_ts[interaction.user.id] = now
 
     guild = interaction.guild
     if guild is None:
@@ -217,7 +317,8 @@ async def handle_start_verify(interaction: Interaction):
         await send_embed_interaction(interaction, embed, ephemeral=True)
         return
 
-    cfg = get_guild_config(guild.id)
+    with span("config_read"):
+        cfg = get_guild_config(guild.id)
     if not cfg:
         embed = Embed(title="Not Configured", description="Verification isn't set up in this server.", color=RED)
         await send_embed_interaction(interaction, embed, ephemeral=True)
@@ -233,16 +334,23 @@ async def handle_start_verify(interaction: Interaction):
     not_verified_role = guild.get_role(cfg["not_verified_role_id"])
 
     if verified_role and verified_role in member.roles:
-        if not_verified_role and not_verified_role in member.roles:
+        deadlines.cancel(guild.id, member.id)
+        if not_verified_role and not_verified_role in member.roles and role_breaker.allow(guild.id, not_verified_role.id):
             try:
-                await member.remove_roles(not_verified_role, reason="Already verified")
-            except Exception:
-                pass
+                ROLE_OPS.inc(op="remove")
+                with span("role_remove"):
+                    await member.remove_roles(not_verified_role, reason="Already verified")
+                role_breaker.success(guild.id, not_verified_role.id)
+            except Exception as e:
+                ROLE_OP_FAILURES.inc(op="remove", status=failure_status(e))
+                _role_failed(guild, not_verified_role, e)
         embed = Embed(title="Already Verified", description="You are already verified.", color=GREEN)
         await send_embed_interaction(interaction, embed, ephemeral=True)
         return
 
-    ch = get_or_create_active_challenge(guild.id, member.id)
+    with span("challenge"):
+        ch = await get_or_create_active_challenge(guild.id, member.id)
+    journal.record(guild.id, member.id, "started")
     view = SolveView(guild.id, member.id)
     file = File(BytesIO(ch.image_bytes), filename="challenge.png")
     embed = Embed(
@@ -260,9 +368,11 @@ class Verification(commands.Cog):
         self.bot = bot
         logger.info("Verification cog initialized")
         self.cleanup_expired_challenges.start()
+        self.enforce_deadlines.start()
 
     def cog_unload(self):
         self.cleanup_expired_challenges.cancel()
+        self.enforce_deadlines.cancel()
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -271,6 +381,29 @@ class Verification(commands.Cog):
         self.bot.add_view(PersistentVerificationView())
         self.bot._verification_view_registered = True
         logger.info("Persistent Verification view registered")
+        self._resume_backfills()
+
+    def _resume_backfills(self):
+        for guild_id in list_running_guild_ids():
+            guild = self.bot.get_guild(guild_id)
+            cfg = get_guild_config(guild_id)
+            if guild is None or not cfg or guild_id in backfill_tasks:
+                continue
+            job = BackfillJob(guild, cfg["verified_role_id"], cfg["not_verified_role_id"])
+            self._start_backfill(job)
+
+    def _start_backfill(self, job: BackfillJob) -> asyncio.Task:
+        async def _run():
+            try:
+                await job.run()
+            except Exception as e:
+                logger.exception("Backfill crashed for guild %s: %s", job.guild.id, e)
+            finally:
+                backfill_tasks.pop(job.guild.id, None)
+
+        task = asyncio.create_task(_run())
+        backfill_tasks[job.guild.id] = task
+        return task
 
     @nextcord.slash_command(
         name="setupverification",
@@ -296,6 +429,14 @@ class Verification(commands.Cog):
             description="Channel where the Verify button will be posted",
             required=True,
             channel_types=[ChannelType.text]
+        ),
+        deadlineminutes: int = SlashOption(
+            name="deadlineminutes",
+            description="Kick members who haven't verified this many minutes after joining (0 = never)",
+            required=False,
+            default=0,
+            min_value=0,
+            max_value=DEADLINE_MAX_MINUTES
         )
     ):
         if interaction.guild is None:
@@ -306,9 +447,13 @@ class Verification(commands.Cog):
         cfg = {
             "verified_role_id": verifiedrole.id,
             "not_verified_role_id": notverifiedrole.id,
-            "channel_id": channelofverification.id
+            "channel_id": channelofverification.id,
+            "configured_by": interaction.user.id,
+            "deadline_minutes": deadlineminutes
         }
         set_guild_config(interaction.guild.id, cfg)
+        if not deadlineminutes:
+            deadlines.clear_guild(interaction.guild.id)
 
         panel_embed = Embed(
             title="Server Verification",
@@ -323,7 +468,8 @@ class Verification(commands.Cog):
                 description=(
                     f"Verification panel posted in {channelofverification.mention}\n"
                     f"Verified role: {verifiedrole.mention}\n"
-                    f"Not verified role: {notverifiedrole.mention}"
+                    f"Not verified role: {notverifiedrole.mention}\n"
+                    f"Deadline: {f'{deadlineminutes} minutes after joining' if deadlineminutes else 'none'}"
                 ),
                 color=GREEN
             )
@@ -358,10 +504,183 @@ class Verification(commands.Cog):
             embed = Embed(title="Emoji Refresh Failed", description=str(e), color=RED)
             await send_embed_interaction(interaction, embed, ephemeral=True)
 
+    @nextcord.slash_command(
+        name="resync_commands",
+        description="Force a slash command sync with Discord (bot owner only).",
+        default_member_permissions=Permissions(administrator=True),
+    )
+    async def resync_commands(self, interaction: Interaction):
+        if not await interaction.client.is_owner(interaction.user):
+            embed = Embed(title="Owner Only", description="Only the bot owner can resync commands.", color=RED)
+            await send_embed_interaction(interaction, embed, ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+        try:
+            await sync_commands(interaction.client, force=True)
+            embed = Embed(title="Commands Synced", description="Slash commands were pushed to Discord.", color=GREEN)
+        except Exception as e:
+            logger.exception("Forced command sync failed: %s", e)
+            embed = Embed(title="Command Sync Failed", description=str(e), color=RED)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @nextcord.slash_command(
+        name="backfillverification",
+        description="Give the not-verified role to existing members who have neither verification role.",
+        default_member_permissions=Permissions(administrator=True),
+    )
+    async def backfillverification(
+        self,
+        interaction: Interaction,
+        restart: bool = SlashOption(
+            name="restart",
+            description="Ignore the saved checkpoint and start from the first member",
+            required=False,
+            default=False
+        )
+    ):
+        guild = interaction.guild
+        if guild is None:
+            embed = Embed(title="Server Only", description="Use this command inside a server.", color=RED)
+            await send_embed_interaction(interaction, embed, ephemeral=True)
+            return
+
+        cfg = get_guild_config(guild.id)
+        if not cfg:
+            embed = Embed(title="Not Configured", description="Run /setupverification first.", color=RED)
+            await send_embed_interaction(interaction, embed, ephemeral=True)
+            return
+
+        if guild.id in backfill_tasks:
+            embed = Embed(title="Backfill Running", description="A backfill is already running in this server.", color=ORANGE)
+            await send_embed_interaction(interaction, embed, ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        def _progress_embed(job: BackfillJob) -> Embed:
+            done = job.status == "done"
+            return Embed(
+                title="Backfill Complete" if done else "Backfill In Progress",
+                description=(
+                    f"Members scanned: {job.scanned}\n"
+                    f"Roles assigned: {job.assigned}\n"
+                    f"Failed: {job.failed}"
+                ),
+                color=GREEN if done else BLUE
+            )
+
+        job = BackfillJob(guild, cfg["verified_role_id"], cfg["not_verified_role_id"], restart=restart)
+        progress_msg = await interaction.followup.send(embed=_progress_embed(job), ephemeral=True, wait=True)
+
+        async def _on_progress(j: BackfillJob):
+            # The followup token expires after 15 minutes; the job keeps going and logs either way.
+            try:
+                await progress_msg.edit(embed=_progress_embed(j))
+            except Exception:
+                j.on_progress = None
+
+        job.on_progress = _on_progress
+        self._start_backfill(job)
+        logger.info("backfillverification by %s in guild %s (restart=%s)", interaction.user.id, guild.id, restart)
+
+    @nextcord.slash_command(
+        name="verifyhistory",
+        description="Show a member's verification history in this server.",
+        default_member_permissions=Permissions(administrator=True),
+    )
+    async def verifyhistory(
+        self,
+        interaction: Interaction,
+        user: nextcord.User = SlashOption(
+            name="user",
+            description="Member (or former member) to look up",
+            required=True
+        ),
+        limit: int = SlashOption(
+            name="limit",
+            description="How many recent entries to show",
+            required=False,
+            default=20,
+            min_value=1,
+            max_value=50
+        )
+    ):
+        if interaction.guild is None:
+            embed = Embed(title="Server Only", description="Use this command inside a server.", color=RED)
+            await send_embed_interaction(interaction, embed, ephemeral=True)
+            return
+
+        rows = await journal.history(interaction.guild.id, user.id, limit)
+        if not rows:
+            embed = Embed(title="No History", description=f"No verification records for {user.mention}.", color=BLUE)
+            await send_embed_interaction(interaction, embed, ephemeral=True)
+            return
+
+        lines = [
+            f"<t:{int(ts)}:f> — {outcome}" + (f" ({detail})" if detail else "")
+            for ts, outcome, detail in rows
+        ]
+        embed = Embed(title=f"Verification History: {user}", description="\n".join(lines), color=BLUE)
+        embed.set_footer(text=f"Newest first • user ID {user.id}")
+        await send_embed_interaction(interaction, embed, ephemeral=True)
+
+    @nextcord.slash_command(
+        name="verifystats",
+        description="Show verification pass/fail rates for this server.",
+        default_member_permissions=Permissions(administrator=True),
+    )
+    async def verifystats(
+        self,
+        interaction: Interaction,
+        hours: int = SlashOption(
+            name="hours",
+            description="Window for the recent figures",
+            required=False,
+            default=24,
+            min_value=1,
+            max_value=24 * 30
+        )
+    ):
+        if interaction.guild is None:
+            embed = Embed(title="Server Only", description="Use this command inside a server.", color=RED)
+            await send_embed_interaction(interaction, embed, ephemeral=True)
+            return
+
+        recent = await journal.recent(interaction.guild.id, time.time() - hours * 3600)
+        totals = await journal.totals(interaction.guild.id)
+
+        def _field(counts: dict) -> str:
+            rate = pass_rate(counts)
+            lines = [f"{outcome}: {counts.get(outcome, 0)}" for outcome in OUTCOMES]
+            lines.append(f"**Pass rate: {rate:.1%}**" if rate is not None else "**Pass rate: n/a**")
+            return "\n".join(lines)
+
+        embed = Embed(title="Verification Stats", color=BLUE)
+        embed.add_field(name=f"Last {hours}h", value=_field(recent), inline=True)
+        embed.add_field(name="All time", value=_field(totals), inline=True)
+        embed.set_footer(text="Pass rate = verified / (verified + attempts exhausted + kicked at deadline)")
+        await send_embed_interaction(interaction, embed, ephemeral=True)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: nextcord.Role, after: nextcord.Role):
+        # Role order or permissions changed; blocked roles may be manageable now
+        role_breaker.reset_guild(after.guild.id)
+        kick_blocked.pop(after.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: nextcord.Member, after: nextcord.Member):
+        if after.id == self.bot.user.id and before.roles != after.roles:
+            role_breaker.reset_guild(after.guild.id)
+            kick_blocked.pop(after.guild.id, None)
+
     @commands.Cog.listener()
     async def on_member_join(self, member: nextcord.Member):
+        EVENTS_RECEIVED.inc(event="member_join")
         if member.bot:
             return
+        # A replayed join (after a gateway resume) would re-add the role and re-send the welcome DM
+        if not seen.first("member_join", member.guild.id, member.id, member.joined_at):
+            return
 
         cfg = get_guild_config(member.guild.id)
         if not cfg:
@@ -370,15 +689,28 @@ class Verification(commands.Cog):
         not_verified_role = member.guild.get_role(cfg["not_verified_role_id"])
         channel = member.guild.get_channel(cfg["channel_id"])
 
-        if not_verified_role:
+        if not_verified_role and not role_breaker.allow(member.guild.id, not_verified_role.id):
+            ROLE_OPS_SKIPPED.inc(op="add")
+        elif not_verified_role:
             try:
+                ROLE_OPS.inc(op="add")
                 await member.add_roles(not_verified_role, reason="New member verification pending")
+                role_breaker.success(member.guild.id, not_verified_role.id)
             except Exception as e:
+                ROLE_OP_FAILURES.inc(op="add", status=failure_status(e))
                 logger.warning("Failed to assign not-verified role to user %s in guild %s: %s", member.id, member.guild.id, e)
+                _role_failed(member.guild, not_verified_role, e)
+
+        minutes = cfg.get("deadline_minutes", 0)
+        if minutes:
+            joined = member.joined_at.timestamp() if member.joined_at else time.time()
+            deadlines.add(member.guild.id, member.id, joined + minutes * 60)
 
         desc = "Welcome to the server! Please head to the verification channel to get verified."
         if channel:
             desc = f"Welcome to the server! Please go to {channel.mention} to get verified."
+        if minutes:
+            desc += f"\nUnverified members are removed {minutes} minutes after joining."
 
         embed = Embed(
             title="Welcome",
@@ -390,16 +722,79 @@ class Verification(commands.Cog):
         except Exception:
             logger.info("Couldn't DM user %s on join (DMs closed)", member.id)
 
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: nextcord.Member):
+        deadlines.cancel(member.guild.id, member.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: nextcord.Guild):
+        # Entries of guilds missing from the cache are retried, so drop them when the bot leaves
+        deadlines.clear_guild(guild.id)
+
+    async def _enforce_deadline(self, guild_id: int, member_id: int) -> str:
+        cfg = get_guild_config(guild_id)
+        if not cfg or not cfg.get("deadline_minutes"):
+            return "skipped"
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            deadlines.add(guild_id, member_id, time.time() + DEADLINE_UNAVAILABLE_RETRY_S)
+            return "deferred"
+        retry_at = kick_blocked.get(guild_id)
+        if retry_at is not None and time.time() < retry_at:
+            # Kicks are failing with 403 here: hold the member until the next attempt, no REST call
+            deadlines.add(guild_id, member_id, retry_at)
+            return "deferred"
+        member = guild.get_member(member_id)
+        if member is None:
+            try:
+                member = await guild.fetch_member(member_id)
+            except nextcord.NotFound:
+                return "gone"
+        role_ids = {r.id for r in member.roles}
+        # Verified outside the bot (or the role was handed out manually): leave them alone
+        if cfg["verified_role_id"] in role_ids or cfg["not_verified_role_id"] not in role_ids:
+            return "skipped"
+        try:
+            await member.kick(reason=f"Not verified within {cfg['deadline_minutes']} minutes of joining")
+        except nextcord.Forbidden:
+            logger.warning("Missing permission to kick unverified user %s in guild %s", member_id, guild_id)
+            retry_at = time.time() + DEADLINE_RETRY_S
+            deadlines.add(guild_id, member_id, retry_at)
+            first = guild_id not in kick_blocked
+            kick_blocked[guild_id] = retry_at
+            if first:
+                _spawn_notify(_notify_kick_blocked(guild))
+            return "forbidden"
+        kick_blocked.pop(guild_id, None)
+        journal.record(guild_id, member_id, "kicked", f"{cfg['deadline_minutes']}m deadline")
+        logger.info("Kicked unverified user %s in guild %s", member_id, guild_id)
+        return "kicked"
+
+    @tasks.loop(seconds=30)
+    async def enforce_deadlines(self):
+        # Only entries whose deadline has passed are popped; the member list is never scanned.
+        while due := deadlines.pop_due(time.time(), DEADLINE_BATCH):
+            for guild_id, member_id in due:
+                try:
+                    outcome = await self._enforce_deadline(guild_id, member_id)
+                except Exception as e:
+                    logger.warning("Deadline check failed for user %s in guild %s: %s", member_id, guild_id, e)
+                    outcome = "error"
+                    deadlines.add(guild_id, member_id, time.time() + DEADLINE_RETRY_S)
+                DEADLINE_KICKS.inc(outcome=outcome)
+                if outcome == "kicked":
+                    await asyncio.sleep(1 / DEADLINE_KICK_RATE_PER_S)
+
+    @enforce_deadlines.before_loop
+    async def before_enforce_deadlines(self):
+        await self.bot.wait_until_ready()
+
     @tasks.loop(minutes=2)
     async def cleanup_expired_challenges(self):
-        to_remove = []
-        for (gid, uid), ch in list(challenges.items()):
-            if ch.is_expired() or ch.attempts_left <= 0:
-                to_remove.append((gid, uid))
-        for k in to_remove:
-            clear_challenge(*k)
-        if to_remove:
-            logger.info("Cleaned up %s expired challenges", len(to_remove))
+        # Exhausted challenges are deleted on the spot; this only sweeps TTL-expired keys.
+        removed = await purge_expired_challenges()
+        if removed:
+            logger.info("Cleaned up %s expired state entries", removed)
 
     @cleanup_expired_challenges.before_loop
     async def before_cleanup(self):
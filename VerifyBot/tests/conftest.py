@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The bot runs from its own directory and imports ``utils`` / ``cogs`` as top-level packages.
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
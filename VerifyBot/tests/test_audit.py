@@ -0,0 +1,73 @@
+import asyncio
+
+from utils import audit
+from utils.audit import AuditJournal, pass_rate
+
+
+def test_records_are_buffered_then_written_in_one_batch(tmp_path):
+    journal = AuditJournal(str(tmp_path / "audit.sqlite3"))
+
+    async def scenario():
+        journal.record(1, 7, "started")
+        journal.record(1, 7, "incorrect")
+        journal.record(1, 7, "verified")
+        journal.record(1, 8, "started")
+        journal.record(2, 7, "kicked", "5m deadline")
+        assert len(journal._pending) == 5  # nothing written yet
+        await journal.flush()
+        assert journal._pending == []
+        return (
+            await journal.history(1, 7),
+            await journal.totals(1),
+            await journal.recent(1, since=0),
+            await journal.history(2, 7),
+        )
+
+    history, totals, recent, other_guild = asyncio.run(scenario())
+    journal.close()
+    assert [outcome for _, outcome, _ in history] == ["verified", "incorrect", "started"]  # newest first
+    assert totals == {"started": 2, "incorrect": 1, "verified": 1}
+    assert recent == totals
+    assert other_guild[0][1:] == ("kicked", "5m deadline")
+
+
+def test_full_batch_flushes_without_waiting_for_the_timer(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit, "AUDIT_BATCH", 3)
+    monkeypatch.setattr(audit, "AUDIT_FLUSH_S", 3600)
+    journal = AuditJournal(str(tmp_path / "audit.sqlite3"))
+
+    async def scenario():
+        for user_id in range(3):
+            journal.record(1, user_id, "started")
+        await asyncio.gather(*journal._tasks)
+        return journal._pending, await journal.totals(1)
+
+    pending, totals = asyncio.run(scenario())
+    journal.close()
+    assert pending == []
+    assert totals == {"started": 3}
+
+
+def test_rotation_drops_the_oldest_quarter_and_keeps_totals(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit, "AUDIT_MAX_BYTES", 64 * 1024)
+    journal = AuditJournal(str(tmp_path / "audit.sqlite3"))
+    rows = [(float(i), 1, i, "verified", "x" * 200) for i in range(2000)]
+    for i in range(0, len(rows), 100):
+        journal._executor.submit(journal._write, rows[i:i + 100]).result()
+
+    async def scenario():
+        return await journal.totals(1), await journal.history(1, 0), await journal.history(1, 1999)
+
+    totals, oldest, newest = asyncio.run(scenario())
+    conn = journal._connect()
+    kept = journal._executor.submit(lambda: conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]).result()
+    journal.close()
+    assert kept < 2000
+    assert oldest == []  # the first records were rotated out
+    assert len(newest) == 1
+    assert totals == {"verified": 2000}  # all-time counts survive rotation
+
+
+def test_pass_rate():
+    assert pass_rate({}) is None
+    assert pass_rate({"verified": 3, "exhausted": 1, "kicked": 0, "incorrect": 9}) == 0.75
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from utils import backfill
+from utils.backfill import BackfillJob, get_checkpoint
+from utils.persistence import JsonDocument
+
+
+class FakeMember:
+    bot = False
+
+    def __init__(self, member_id, roles=()):
+        self.id = member_id
+        self.roles = set(roles)
+
+    def get_role(self, role_id):
+        return role_id if role_id in self.roles else None
+
+    async def add_roles(self, role, reason=None):
+        self.roles.add(role.id)
+
+
+class FakeRole:
+    id = 2
+
+
+class FakeGuild:
+    """fetch_members() behaves like nextcord's MemberIterator: it keeps paging until the guild is exhausted."""
+
+    id = 1
+
+    def __init__(self, member_ids):
+        self.members = [FakeMember(i, roles=(1,) if i % 2 else ()) for i in sorted(member_ids)]
+        self.requests = []
+
+    def get_role(self, role_id):
+        return FakeRole() if role_id == FakeRole.id else None
+
+    async def fetch_members(self, limit=1000, after=None):
+        cursor = after.id if after else 0
+        while True:
+            self.requests.append(cursor)
+            page = [m for m in self.members if m.id > cursor][:backfill.CHUNK_SIZE]
+            for member in reversed(page):
+                yield member
+            if len(page) < backfill.CHUNK_SIZE:
+                return
+            cursor = page[-1].id
+
+
+@pytest.fixture
+def checkpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(backfill, "_checkpoints", JsonDocument(tmp_path / "backfill_state.json", default=dict, keyed=True))
+    monkeypatch.setattr(backfill, "CHUNK_SIZE", 3)
+    monkeypatch.setattr(backfill, "BACKFILL_RATE_PER_S", 0)
+
+
+def test_one_request_and_one_checkpoint_per_page(checkpoints):
+    guild = FakeGuild(range(10, 17))
+    saved = []
+
+    async def on_progress(job):
+        saved.append(get_checkpoint(guild.id)["after"])
+
+    job = BackfillJob(guild, verified_role_id=1, not_verified_role_id=2, on_progress=on_progress)
+    asyncio.run(job.run())
+    assert guild.requests == [0, 12, 15]
+    assert saved == [12, 15, 16, 16]
+    assert job.scanned == 7
+    assert job.assigned == 4  # even ids had neither role
+    assert get_checkpoint(guild.id)["status"] == "done"
+
+
+def test_resumes_after_the_checkpoint(checkpoints):
+    guild = FakeGuild(range(10, 17))
+    backfill.save_checkpoint(guild.id, {"status": "running", "after": 12, "scanned": 3, "assigned": 2, "failed": 0})
+    job = BackfillJob(guild, verified_role_id=1, not_verified_role_id=2)
+    assert job.resumed
+    asyncio.run(job.run())
+    assert guild.requests == [12, 15]
+    assert job.scanned == 7
+    assert job.assigned == 2 + 2
@@ -0,0 +1,53 @@
+from utils.deadlines import DeadlineIndex
+from utils.persistence import JsonDocument
+
+
+def _index(tmp_path):
+    return DeadlineIndex(JsonDocument(tmp_path / "deadlines.json", default=dict))
+
+
+def test_pop_due_returns_only_passed_deadlines_in_order(tmp_path):
+    index = _index(tmp_path)
+    index.add(1, 30, 300.0)
+    index.add(1, 10, 100.0)
+    index.add(2, 20, 200.0)
+    assert index.pop_due(250.0, 10) == [(1, 10), (2, 20)]
+    assert len(index) == 1
+    assert index.pop_due(250.0, 10) == []
+    assert index.pop_due(300.0, 10) == [(1, 30)]
+
+
+def test_pop_due_respects_limit(tmp_path):
+    index = _index(tmp_path)
+    for member_id in range(5):
+        index.add(1, member_id, float(member_id))
+    assert index.pop_due(10.0, 2) == [(1, 0), (1, 1)]
+    assert index.pop_due(10.0, 10) == [(1, 2), (1, 3), (1, 4)]
+
+
+def test_cancel_and_readd_skip_stale_heap_entries(tmp_path):
+    index = _index(tmp_path)
+    index.add(1, 10, 100.0)
+    index.add(1, 11, 100.0)
+    assert index.cancel(1, 10)
+    assert not index.cancel(1, 10)
+    index.add(1, 11, 500.0)  # retried later: the old heap entry is stale
+    assert index.pop_due(200.0, 10) == []
+    assert index.pop_due(500.0, 10) == [(1, 11)]
+    assert len(index) == 0
+
+
+def test_clear_guild(tmp_path):
+    index = _index(tmp_path)
+    index.add(1, 10, 100.0)
+    index.add(2, 10, 100.0)
+    assert index.clear_guild(1) == 1
+    assert index.pop_due(100.0, 10) == [(2, 10)]
+
+
+def test_entries_survive_reload(tmp_path):
+    index = _index(tmp_path)
+    index.add(1, 10, 100.0)
+    index.add(1, 11, 200.0)
+    index.cancel(1, 11)
+    assert _index(tmp_path).pop_due(1000.0, 10) == [(1, 10)]
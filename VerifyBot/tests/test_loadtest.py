@@ -0,0 +1,23 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_loadtest_runs_a_few_joiners():
+    # A subprocess: the load test switches to a scratch working directory on import.
+    out = subprocess.run(
+        [
+            sys.executable, str(BOT_DIR / "tools" / "loadtest.py"),
+            "--joiners", "8", "--arrival-rate", "0", "--think-ms", "5",
+            "--rest-latency-ms", "1", "--rest-jitter-ms", "0", "--abandon-rate", "0", "--json",
+        ],
+        capture_output=True, text=True, timeout=120, check=True,
+    )
+    report = json.loads(out.stdout)
+    assert report["joiners"] == 8
+    assert report["verified"] + report["failed"] == 8
+    assert report["verified"] > 0
+    assert report["rest"]["total_calls"] > 0
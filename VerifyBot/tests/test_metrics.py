@@ -0,0 +1,19 @@
+import logging
+
+from utils.metrics import HTTP_RATELIMITS, install_ratelimit_listeners
+
+
+def test_only_429_responses_count_as_ratelimits():
+    install_ratelimit_listeners(None)
+    install_ratelimit_listeners(None)  # idempotent: one handler
+    http_log = logging.getLogger("nextcord.http")
+    before = HTTP_RATELIMITS.get()
+
+    # Logged by nextcord's HTTPClient.request in the 429 branch only
+    http_log.warning('We are being rate limited. Retrying in %.2f seconds. Handled under the bucket "%s"', 1.5, "abc")
+    http_log.warning("Global rate limit has been hit. Retrying in %.2f seconds.", 1.5)
+    # A bucket running out before a request is not a 429
+    http_log.debug("A rate limit bucket has been exhausted (bucket: %s, retry: %s).", "abc", 1.0)
+    http_log.warning("Some other warning")
+
+    assert HTTP_RATELIMITS.get() == before + 1
@@ -0,0 +1,33 @@
+"""
+AutoRoleBot and VerifyBot are standalone folders, each deployed and run from
+its own directory with ``utils`` as a top-level package, so the helpers they
+share are copied rather than installed from a common package. These copies
+must stay byte-identical: change both, or neither.
+"""
+from pathlib import Path
+
+import pytest
+
+BOT_DIR = Path(__file__).resolve().parent.parent
+SIBLING = BOT_DIR.parent / {"AutoRoleBot": "VerifyBot", "VerifyBot": "AutoRoleBot"}.get(BOT_DIR.name, "")
+
+MIRRORED = [
+    "utils/cache_profile.py",
+    "utils/command_sync.py",
+    "utils/dedup.py",
+    "utils/loop_monitor.py",
+    "utils/persistence.py",
+    "utils/role_breaker.py",
+    "utils/startup.py",
+    "utils/tracing.py",
+    "tools/bench_profiles.py",
+    "tests/conftest.py",
+    "tests/test_command_sync.py",
+    "tests/test_mirrored.py",
+]
+
+
+@pytest.mark.skipif(not SIBLING.is_dir() or SIBLING == BOT_DIR.parent, reason="sibling bot not checked out")
+@pytest.mark.parametrize("path", MIRRORED)
+def test_shared_module_matches_sibling_bot(path):
+    assert (BOT_DIR / path).read_bytes() == (SIBLING / path).read_bytes(), f"{path} differs from {SIBLING.name}/{path}"
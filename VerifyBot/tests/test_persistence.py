@@ -0,0 +1,54 @@
+import json
+
+from utils.persistence import JsonDocument
+
+
+def test_keyed_writes_keep_other_processes_entries(tmp_path):
+    path = tmp_path / "shared.json"
+    ours = JsonDocument(path, default=dict, keyed=True)
+    theirs = JsonDocument(path, default=dict, keyed=True)
+    theirs.load()  # before any of our keys exist
+    ours.data["1"] = {"a": 1}
+    ours.data["2"] = {"a": 2}
+    ours.changed("1", "2")
+    ours.save()
+
+    assert "1" not in theirs.data
+    theirs.data["3"] = {"a": 3}
+    theirs.changed("3")
+    theirs.save()
+    assert json.loads(path.read_text()) == {"1": {"a": 1}, "2": {"a": 2}, "3": {"a": 3}}
+
+    del ours.data["2"]
+    ours.removed("2")
+    ours.data["1"] = {"a": 10}
+    ours.changed("1")
+    ours.save()
+    assert json.loads(path.read_text()) == {"1": {"a": 10}, "3": {"a": 3}}
+
+
+def test_unkeyed_documents_overwrite(tmp_path):
+    path = tmp_path / "plain.json"
+    path.write_text(json.dumps({"old": 1}))
+    doc = JsonDocument(path, default=dict)
+    doc.replace({"new": 2})
+    assert json.loads(path.read_text()) == {"new": 2}
+
+
+def test_backfill_checkpoints_of_two_workers_are_merged(tmp_path, monkeypatch):
+    from utils import backfill
+
+    path = tmp_path / "backfill_state.json"
+    first = JsonDocument(path, default=dict, keyed=True)
+    second = JsonDocument(path, default=dict, keyed=True)
+    first.load()
+    second.load()
+
+    monkeypatch.setattr(backfill, "_checkpoints", first)
+    backfill.save_checkpoint(1, {"status": "running", "after": 10})
+    monkeypatch.setattr(backfill, "_checkpoints", second)
+    backfill.save_checkpoint(2, {"status": "running", "after": 20})
+    monkeypatch.setattr(backfill, "_checkpoints", first)
+    backfill.clear_checkpoint(1)
+
+    assert json.loads(path.read_text()) == {"2": {"status": "running", "after": 20}}
@@ -0,0 +1,20 @@
+import asyncio
+import time
+import types
+
+from cogs import verification
+from cogs.verification import Verification
+from utils.role_breaker import role_breaker
+
+
+def test_role_update_resets_role_and_kick_blocks():
+    role_breaker.forbidden(1, 10)
+    role_breaker.forbidden(2, 20)
+    verification.kick_blocked[1] = time.time() + 300
+    cog = Verification.__new__(Verification)
+    role = types.SimpleNamespace(guild=types.SimpleNamespace(id=1))
+    asyncio.run(Verification.on_guild_role_update(cog, role, role))
+    assert role_breaker.allow(1, 10)
+    assert 1 not in verification.kick_blocked
+    assert not role_breaker.allow(2, 20)
+    role_breaker.reset_guild(2)
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from utils import state_backend
+from utils.state_backend import InMemoryBackend, SQLiteBackend, StateBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryBackend()
+    return SQLiteBackend(str(tmp_path / "state.sqlite3"))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StateBackend()
+
+
+def test_set_nx_only_sets_absent_or_expired_keys(backend):
+    assert run(backend.set_nx("challenge:1", "a", ttl_s=60))
+    assert not run(backend.set_nx("challenge:1", "b", ttl_s=60))
+    assert run(backend.get("challenge:1")) == "a"
+
+    run(backend.set("cooldown:1", "x", ttl_s=0.01))
+    run(asyncio.sleep(0.02))
+    assert run(backend.get("cooldown:1")) is None
+    assert run(backend.set_nx("cooldown:1", "y", ttl_s=60))
+    assert run(backend.get("cooldown:1")) == "y"
+
+
+def test_incr(backend):
+    assert run(backend.incr("attempts:1", -1)) is None
+    run(backend.set("attempts:1", "3", ttl_s=60))
+    assert run(backend.incr("attempts:1", -1)) == 2
+    assert run(backend.incr("attempts:1", -2)) == 0
+    assert run(backend.get("attempts:1")) == "0"
+
+
+def test_sqlite_incr_without_returning(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_backend, "SQLITE_HAS_RETURNING", False)
+    backend = SQLiteBackend(str(tmp_path / "state.sqlite3"))
+    assert run(backend.incr("attempts:1")) is None
+    run(backend.set("attempts:1", "1"))
+    assert run(backend.incr("attempts:1", 4)) == 5
+    assert run(backend.get("attempts:1")) == "5"
+
+
+def test_count_and_purge_expired(backend):
+    run(backend.set("challenge:1", "a", ttl_s=60))
+    run(backend.set("challenge:2", "b", ttl_s=0.01))
+    run(backend.set("cooldown:1", "c"))
+    run(asyncio.sleep(0.02))
+    assert run(backend.count("challenge:")) == 1
+    assert run(backend.purge_expired()) == 1
+    run(backend.delete("challenge:1", "cooldown:1"))
+    assert run(backend.count("")) == 0
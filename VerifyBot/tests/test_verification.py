@@ -0,0 +1,107 @@
+import asyncio
+import time
+import types
+
+import nextcord
+import pytest
+
+from cogs import verification
+from cogs.verification import SolveModal, Verification
+from utils.deadlines import DeadlineIndex
+from utils.persistence import JsonDocument
+
+CFG = {"verified_role_id": 10, "not_verified_role_id": 11, "channel_id": 5, "deadline_minutes": 5}
+
+
+class FakeRole:
+    def __init__(self, role_id):
+        self.id = role_id
+        self.mention = f"<@&{role_id}>"
+
+
+class FakeMember:
+    def __init__(self, member_id, fail_add=False):
+        self.id = member_id
+        self.roles = [FakeRole(11)]
+        self.fail_add = fail_add
+
+    async def add_roles(self, role, reason=None):
+        if self.fail_add:
+            raise nextcord.HTTPException(types.SimpleNamespace(status=500, reason="x"), "boom")
+        self.roles.append(role)
+
+    async def remove_roles(self, role, reason=None):
+        self.roles = [r for r in self.roles if r.id != role.id]
+
+
+class FakeGuild:
+    id = 1
+
+    def __init__(self, member):
+        self.member = member
+
+    def get_member(self, member_id):
+        return self.member
+
+    def get_role(self, role_id):
+        return FakeRole(role_id)
+
+
+class FakeResponse:
+    def is_done(self):
+        return False
+
+    async def send_message(self, **kwargs):
+        pass
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    index = DeadlineIndex(JsonDocument(tmp_path / "deadlines.json", default=dict))
+    monkeypatch.setattr(verification, "deadlines", index)
+    monkeypatch.setattr(verification, "get_guild_config", lambda guild_id: dict(CFG))
+    monkeypatch.setattr(verification.journal, "record", lambda *args: None)
+    return index
+
+
+def _solve(member, monkeypatch):
+    challenge = types.SimpleNamespace(answer="ABC", is_expired=lambda: False)
+
+    async def get_challenge(guild_id, user_id):
+        return challenge
+
+    async def clear_challenge(guild_id, user_id):
+        pass
+
+    monkeypatch.setattr(verification, "get_challenge", get_challenge)
+    monkeypatch.setattr(verification, "clear_challenge", clear_challenge)
+
+    async def scenario():
+        modal = SolveModal(1, member.id)
+        modal.answer_input = types.SimpleNamespace(value="abc")
+        interaction = types.SimpleNamespace(guild=FakeGuild(member), response=FakeResponse(), created_at=None)
+        await modal.callback(interaction)
+
+    asyncio.run(scenario())
+
+
+def test_deadline_cancelled_once_the_role_is_granted(index, monkeypatch):
+    index.add(1, 7, time.time() + 300)
+    _solve(FakeMember(7), monkeypatch)
+    assert len(index) == 0
+
+
+def test_deadline_kept_when_the_role_grant_fails(index, monkeypatch):
+    index.add(1, 7, time.time() + 300)
+    _solve(FakeMember(7, fail_add=True), monkeypatch)
+    assert len(index) == 1
+
+
+def test_uncached_guild_is_retried_not_dropped(index):
+    cog = Verification.__new__(Verification)
+    cog.bot = types.SimpleNamespace(get_guild=lambda guild_id: None)
+    outcome = asyncio.run(cog._enforce_deadline(1, 7))
+    assert outcome == "deferred"
+    assert len(index) == 1
+    assert index.pop_due(time.time(), 10) == []
+    assert index.pop_due(time.time() + verification.DEADLINE_UNAVAILABLE_RETRY_S + 1, 10) == [(1, 7)]
@@ -0,0 +1,167 @@
+"""
+Captcha generation micro-benchmarks with regression thresholds.
+
+Measures renders/s per core, latency percentiles, PNG size and peak Python
+allocation for every challenge kind and image size, then compares against a
+JSON baseline. Exits with status 1 when any metric regresses by more than the
+threshold.
+
+Usage (from the VerifyBot directory):
+    python tools/bench_captcha.py                      # compare with baseline
+    python tools/bench_captcha.py --update-baseline    # record a new baseline
+    python tools/bench_captcha.py --threshold 0.10 --sizes 280x100,420x140
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+
+from utils import challenges  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BOT_DIR, "tools", "baselines", "captcha_bench.json")
+DEFAULT_SIZES = "280x100,420x140"
+DEFAULT_THRESHOLD = float(os.getenv("BENCH_THRESHOLD", "0.15"))
+
+# metric -> True if higher is better
+METRICS = {
+    "renders_per_s_per_core": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "png_bytes_mean": False,
+    "peak_alloc_bytes": False,
+}
+
+
+def _cases(sizes: List[Tuple[int, int]]) -> Dict[str, Callable[[], bytes]]:
+    cases: Dict[str, Callable[[], bytes]] = {}
+    for w, h in sizes:
+        cases[f"text_captcha@{w}x{h}"] = lambda w=w, h=h: challenges._generate_text_captcha(w, h)[1]
+        cases[f"math_captcha@{w}x{h}"] = lambda w=w, h=h: challenges._generate_math_captcha(w, h)[1]
+        cases[f"render_text@{w}x{h}"] = lambda w=w, h=h: challenges._render_text_to_image("12 * 7 - 3", w, h)
+    cases["make_new_challenge"] = lambda: challenges.make_new_challenge(1, 1).image_bytes
+    return cases
+
+
+def _pct(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def bench_case(fn: Callable[[], bytes], iterations: int, warmup: int, alloc_iterations: int) -> dict:
+    for _ in range(warmup):
+        fn()
+
+    latencies: List[float] = []
+    sizes: List[int] = []
+    cpu_start = time.process_time()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        png = fn()
+        latencies.append(time.perf_counter() - t0)
+        sizes.append(len(png))
+    cpu = time.process_time() - cpu_start
+
+    # tracemalloc slows allocation-heavy code a lot, so measure it in a separate short pass.
+    tracemalloc.start()
+    peak = 0
+    for _ in range(alloc_iterations):
+        tracemalloc.reset_peak()
+        fn()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "renders_per_s_per_core": round(iterations / cpu, 2) if cpu > 0 else 0.0,
+        "p50_ms": round(_pct(latencies, 50) * 1000, 3),
+        "p95_ms": round(_pct(latencies, 95) * 1000, 3),
+        "p99_ms": round(_pct(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+        "png_bytes_mean": round(statistics.fmean(sizes), 1),
+        "peak_alloc_bytes": peak,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    regressions: List[str] = []
+    for case, current in results.items():
+        base = baseline.get(case)
+        if not base:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = base.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append(f"{case}: {metric} {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def _parse_sizes(raw: str) -> List[Tuple[int, int]]:
+    out = []
+    for part in raw.split(","):
+        w, _, h = part.strip().partition("x")
+        out.append((int(w), int(h)))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Captcha generation benchmarks")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--alloc-iterations", type=int, default=20)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated WxH list")
+    parser.add_argument("--only", default="", help="Run only cases whose name contains this text")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative regression per metric (0.15 = 15%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    random.seed(args.seed)
+
+    results = {}
+    for name, fn in _cases(_parse_sizes(args.sizes)).items():
+        if args.only and args.only not in name:
+            continue
+        r = bench_case(fn, args.iterations, args.warmup, args.alloc_iterations)
+        results[name] = r
+        print(f"{name:<26} {r['renders_per_s_per_core']:>9}/s  p50={r['p50_ms']:>7}ms  p95={r['p95_ms']:>7}ms  "
+              f"p99={r['p99_ms']:>7}ms  png={r['png_bytes_mean']:>9}B  peak={r['peak_alloc_bytes']:>9}B")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Startup and memory benchmark for the gateway cache profiles.
+
+Each profile runs in a fresh interpreter that imports bot.py with
+CACHE_PROFILE set, then replays a synthetic gateway session against the
+bot's connection state: GUILD_CREATE for every guild, member chunks when the
+profile chunks at startup, and a stream of MESSAGE_CREATE events. Nothing
+connects to Discord. Reports time to ready, cached members/users/messages and
+resident memory per profile.
+
+Usage (from the bot directory):
+    python tools/bench_profiles.py
+    python tools/bench_profiles.py --guilds 20 --members 25000 --messages 5000 --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+
+# Members Discord includes in GUILD_CREATE for a large guild before chunking.
+GUILD_CREATE_MEMBERS = 100
+CHUNK_SIZE = 1000
+ROLES_PER_GUILD = 20
+
+
+def _user(uid: int) -> dict:
+    return {"id": str(uid), "username": f"user{uid}", "discriminator": "0", "avatar": None, "global_name": None}
+
+
+def _member(uid: int, role_ids) -> dict:
+    return {"user": _user(uid), "roles": role_ids, "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False}
+
+
+def _guild_payload(gid: int, self_id: int, members: int) -> dict:
+    role_ids = [str(gid + r) for r in range(1, ROLES_PER_GUILD + 1)]
+    roles = [{"id": str(gid), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+              "hoist": False, "managed": False, "mentionable": False}]
+    roles += [{"id": rid, "name": f"role{i}", "permissions": "0", "position": i + 1, "color": 0,
+               "hoist": False, "managed": False, "mentionable": False} for i, rid in enumerate(role_ids)]
+    initial = [_member(self_id, [])] + [
+        _member(gid * 1_000_000 + i, role_ids[i % 3:i % 3 + 1]) for i in range(min(members, GUILD_CREATE_MEMBERS))
+    ]
+    return {
+        "id": str(gid), "name": f"guild{gid}", "owner_id": str(self_id), "member_count": members, "large": True,
+        "roles": roles, "emojis": [], "stickers": [], "features": [], "members": initial, "presences": [],
+        "voice_states": [], "threads": [], "stage_instances": [], "guild_scheduled_events": [],
+        "channels": [{"id": str(gid + 999), "type": 0, "name": "general", "position": 0, "permission_overwrites": []}],
+        "role_ids": role_ids,
+    }
+
+
+def _rss_mb() -> float:
+    from utils.startup import rss_mb
+    return rss_mb()
+
+
+async def _replay(bot, guilds: int, members: int, messages: int) -> dict:
+    import nextcord
+
+    state = bot._connection
+    self_id = 1
+    state.user = nextcord.ClientUser(state=state, data=_user(self_id) | {"bot": True})
+
+    loaded: list = []
+    for g in range(guilds):
+        gid = (g + 1) << 32
+        payload = _guild_payload(gid, self_id, members)
+        role_ids = payload.pop("role_ids")
+        guild = state._add_guild_from_data(payload)
+        loaded.append(guild)
+        if state._guild_needs_chunking(guild):
+            # What ChunkRequest does with each GUILD_MEMBERS_CHUNK
+            cache = state.member_cache_flags.joined
+            for start in range(0, members, CHUNK_SIZE):
+                for i in range(start, min(start + CHUNK_SIZE, members)):
+                    m = nextcord.Member(data=_member(gid * 1_000_000 + i, role_ids[i % 3:i % 3 + 1]), guild=guild, state=state)
+                    if cache:
+                        guild._add_member(m)
+                await asyncio.sleep(0)
+
+    for n in range(messages):
+        guild = loaded[n % len(loaded)]
+        channel = guild.text_channels[0]
+        author = _member(guild.id * 1_000_000 + n % max(members, 1), [])
+        msg = nextcord.Message(channel=channel, state=state, data={
+            "id": str(10**17 + n), "channel_id": str(channel.id), "guild_id": str(guild.id),
+            "author": author["user"], "member": author, "content": "hello", "timestamp": "2024-01-01T00:00:00+00:00",
+            "edited_timestamp": None, "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+            "attachments": [], "embeds": [], "pinned": False, "type": 0,
+        })
+        if state._messages is not None:
+            state._messages.append(msg)
+
+    return {
+        "cached_members": sum(len(g._members) for g in loaded),
+        "cached_users": len(state._users),
+        "cached_messages": len(state._messages) if state._messages is not None else 0,
+    }
+
+
+def run_child(profile: str, guilds: int, members: int, messages: int) -> dict:
+    started = time.perf_counter()
+    os.environ["CACHE_PROFILE"] = profile
+    os.environ.setdefault("DISCORD_TOKEN", "bench")
+    for var in ("SHARD_COUNT", "SHARD_IDS", "WORKER_ID", "AUTO_SHARD", "METRICS_PORT"):
+        os.environ.pop(var, None)
+    import logging
+    logging.disable(logging.WARNING)
+
+    import bot as bot_module  # noqa: E402
+    imported = time.perf_counter()
+    rss_before = _rss_mb()
+    counts = asyncio.run(_replay(bot_module.bot, guilds, members, messages))
+    ready = time.perf_counter()
+    return {
+        "profile": profile,
+        "import_s": round(imported - started, 3),
+        "ready_s": round(ready - started, 3),
+        "replay_s": round(ready - imported, 3),
+        "rss_mb": round(_rss_mb(), 1),
+        "rss_delta_mb": round(_rss_mb() - rss_before, 1),
+        **counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cache profiles by startup time and memory")
+    parser.add_argument("--profiles", default="full,lean,minimal", help="Comma-separated profiles to compare")
+    parser.add_argument("--guilds", type=int, default=10)
+    parser.add_argument("--members", type=int, default=10000, help="Members per guild")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--child", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.guilds, args.members, args.messages)))
+        return
+
+    results = []
+    for profile in [p.strip() for p in args.profiles.split(",") if p.strip()]:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", profile, "--guilds", str(args.guilds),
+             "--members", str(args.members), "--messages", str(args.messages)],
+            cwd=BOT_DIR, capture_output=True, text=True, check=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.guilds} guilds x {args.members} members, {args.messages} messages")
+    for r in results:
+        print(f"{r['profile']:<8} ready={r['ready_s']:>6.2f}s (import {r['import_s']:.2f}s, replay {r['replay_s']:.2f}s)  "
+              f"rss={r['rss_mb']:>7.1f}MiB (+{r['rss_delta_mb']:.1f})  members={r['cached_members']:<8} "
+              f"users={r['cached_users']:<8} messages={r['cached_messages']}")
+
+
+if __name__ == "__main__":
+    main()
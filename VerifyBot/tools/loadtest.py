@@ -0,0 +1,394 @@
+"""
+Offline load generator for the verification flow.
+
+Drives on_member_join -> handle_start_verify -> SolveModal.callback for N
+simulated joiners using fake Interaction/Member/Guild objects and a mock REST
+layer. No token or network is needed.
+
+Usage (from the VerifyBot directory):
+    python tools/loadtest.py --joiners 500 --arrival-rate 50 --wrong-rate 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+# The stores resolve data/ and config/ relative to the working directory at import time;
+# run from a scratch directory so the real guild configs are never touched.
+os.chdir(tempfile.mkdtemp(prefix="verifybot-loadtest-"))
+
+import logging  # noqa: E402
+
+logging.basicConfig(level=logging.WARNING)
+
+import nextcord  # noqa: E402
+
+from utils.config_store import set_guild_config  # noqa: E402
+from utils import challenges as challenge_store  # noqa: E402
+from cogs.verification import SolveModal, Verification, handle_start_verify  # noqa: E402
+from utils import tracing  # noqa: E402
+from utils.state_backend import InMemoryBackend, get_backend  # noqa: E402
+
+GUILD_ID = 100000000000000001
+VERIFIED_ROLE_ID = 200000000000000001
+NOT_VERIFIED_ROLE_ID = 200000000000000002
+CHANNEL_ID = 300000000000000001
+
+
+class MockREST:
+    """Counts REST calls by route and simulates their latency."""
+
+    def __init__(self, latency_ms: float, jitter_ms: float):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls: Counter = Counter()
+
+    async def call(self, route: str):
+        self.calls[route] += 1
+        delay = max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class FakeRole:
+    def __init__(self, role_id: int, name: str):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+
+    def __eq__(self, other):
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.mention = f"<#{channel_id}>"
+
+
+class FakeGuild:
+    def __init__(self, rest: MockREST):
+        self.id = GUILD_ID
+        self.rest = rest
+        self.roles = {
+            VERIFIED_ROLE_ID: FakeRole(VERIFIED_ROLE_ID, "Verified"),
+            NOT_VERIFIED_ROLE_ID: FakeRole(NOT_VERIFIED_ROLE_ID, "Not Verified"),
+        }
+        self.channel = FakeChannel(CHANNEL_ID)
+        self.members: dict[int, "FakeMember"] = {}
+
+    def get_role(self, role_id: int):
+        return self.roles.get(role_id)
+
+    def get_channel(self, channel_id: int):
+        return self.channel if channel_id == self.channel.id else None
+
+    def get_member(self, user_id: int):
+        return self.members.get(user_id)
+
+    async def fetch_member(self, user_id: int):
+        await self.rest.call("GET /members/{id}")
+        return self.members[user_id]
+
+
+class FakeMember:
+    def __init__(self, user_id: int, guild: FakeGuild):
+        self.id = user_id
+        self.guild = guild
+        self.bot = False
+        self.roles: list[FakeRole] = []
+        self.mention = f"<@{user_id}>"
+        self.joined_at = datetime.now(timezone.utc)
+
+    def get_role(self, role_id: int):
+        return next((r for r in self.roles if r.id == role_id), None)
+
+    async def add_roles(self, *roles, reason=None):
+        for role in roles:
+            await self.guild.rest.call("PUT /members/{id}/roles/{id}")
+            if role not in self.roles:
+                self.roles.append(role)
+
+    async def remove_roles(self, *roles, reason=None):
+        for role in roles:
+            await self.guild.rest.call("DELETE /members/{id}/roles/{id}")
+            if role in self.roles:
+                self.roles.remove(role)
+
+    async def send(self, **kwargs):
+        await self.guild.rest.call("POST /channels/{dm}/messages")
+
+
+class FakeResponse:
+    def __init__(self, rest: MockREST):
+        self.rest = rest
+        self._done = False
+        self.last_kwargs: dict = {}
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, **kwargs):
+        if self._done:
+            raise nextcord.InteractionResponded(None)
+        self._done = True
+        self.last_kwargs = kwargs
+        await self.rest.call("POST /interactions/{id}/callback")
+
+    async def send_modal(self, modal):
+        self._done = True
+        await self.rest.call("POST /interactions/{id}/callback")
+
+    async def defer(self, **kwargs):
+        self._done = True
+        await self.rest.call("POST /interactions/{id}/callback")
+
+
+class FakeFollowup:
+    def __init__(self, rest: MockREST):
+        self.rest = rest
+
+    async def send(self, **kwargs):
+        await self.rest.call("POST /webhooks/{id}/{token}")
+
+
+class FakeInteraction:
+    def __init__(self, member: FakeMember):
+        self.user = member
+        self.guild = member.guild
+        self.client = None
+        self.response = FakeResponse(member.guild.rest)
+        self.followup = FakeFollowup(member.guild.rest)
+
+
+class LoopLagProbe:
+    """Measures how late a short periodic sleep wakes up, i.e. how long the loop was blocked."""
+
+    def __init__(self, interval_s: float = 0.005):
+        self.interval_s = interval_s
+        self.lags: list[float] = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval_s)
+            self.lags.append(max(0.0, loop.time() - start - self.interval_s))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+
+class StoreSampler:
+    """Samples the challenge store size while the run is in progress."""
+
+    def __init__(self, interval_s: float = 0.05):
+        self.interval_s = interval_s
+        self.peak_entries = 0
+        self.peak_image_bytes = 0
+        self._task = None
+
+    def sample(self):
+        backend = get_backend()
+        if not isinstance(backend, InMemoryBackend):
+            return
+        entries = [value for key, (value, _) in backend._store.items() if key.startswith("challenge:")]
+        self.peak_entries = max(self.peak_entries, len(entries))
+        self.peak_image_bytes = max(self.peak_image_bytes, sum(len(v) for v in entries))
+
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval_s)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+
+def _wrong_answer(expected: str) -> str:
+    return expected + "X"
+
+
+async def run_joiner(user_id: int, guild: FakeGuild, cog: Verification, args, results: dict):
+    member = FakeMember(user_id, guild)
+    guild.members[user_id] = member
+    started = time.perf_counter()
+
+    await Verification.on_member_join(cog, member)
+    if random.random() < args.abandon_rate:
+        results["abandoned"] += 1
+        return
+
+    await asyncio.sleep(random.uniform(0, args.think_ms) / 1000)
+    t0 = time.perf_counter()
+    await handle_start_verify(FakeInteraction(member))
+    results["start_latency"].append(time.perf_counter() - t0)
+
+    while True:
+        ch = await challenge_store.get_challenge(guild.id, user_id)
+        if ch is None:
+            results["failed"] += 1
+            return
+        answer = _wrong_answer(ch.answer) if random.random() < args.wrong_rate else ch.answer
+
+        await asyncio.sleep(random.uniform(0, args.think_ms) / 1000)
+        modal = SolveModal(guild.id, user_id)
+        modal.answer_input = SimpleNamespace(value=answer)
+        t0 = time.perf_counter()
+        await modal.callback(FakeInteraction(member))
+        results["solve_latency"].append(time.perf_counter() - t0)
+
+        if guild.roles[VERIFIED_ROLE_ID] in member.roles:
+            results["verified"] += 1
+            results["e2e_latency"].append(time.perf_counter() - started)
+            return
+
+
+def _pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _latency_summary(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.fmean(values) * 1000, 2) if values else 0.0,
+        "p50_ms": round(_pct(values, 50) * 1000, 2),
+        "p95_ms": round(_pct(values, 95) * 1000, 2),
+        "p99_ms": round(_pct(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+async def main_async(args) -> dict:
+    random.seed(args.seed)
+    set_guild_config(GUILD_ID, {
+        "verified_role_id": VERIFIED_ROLE_ID,
+        "not_verified_role_id": NOT_VERIFIED_ROLE_ID,
+        "channel_id": CHANNEL_ID,
+    })
+    rest = MockREST(args.rest_latency_ms, args.rest_jitter_ms)
+    guild = FakeGuild(rest)
+    # Skip Verification.__init__ so the cleanup loop (which waits for a gateway connection) never starts.
+    cog = Verification.__new__(Verification)
+    cog.bot = SimpleNamespace(user=SimpleNamespace(id=1))
+
+    results = {
+        "verified": 0, "failed": 0, "abandoned": 0,
+        "start_latency": [], "solve_latency": [], "e2e_latency": [],
+    }
+    probe = LoopLagProbe()
+    sampler = StoreSampler()
+    tracemalloc.start()
+    probe.start()
+    sampler.start()
+
+    wall_start = time.perf_counter()
+    tasks = []
+    for i in range(args.joiners):
+        tasks.append(asyncio.create_task(run_joiner(400000000000000000 + i, guild, cog, args, results)))
+        if args.arrival_rate > 0:
+            await asyncio.sleep(1 / args.arrival_rate)
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - wall_start
+
+    sampler.sample()
+    probe.stop()
+    sampler.stop()
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total_calls = sum(rest.calls.values())
+    verified = results["verified"]
+    return {
+        "joiners": args.joiners,
+        "wall_s": round(wall, 3),
+        "verified": verified,
+        "failed": results["failed"],
+        "abandoned": results["abandoned"],
+        "e2e": _latency_summary(results["e2e_latency"]),
+        "handle_start_verify": _latency_summary(results["start_latency"]),
+        "solve_modal_callback": _latency_summary(results["solve_latency"]),
+        "loop_blocking": {
+            **_latency_summary(probe.lags),
+            "total_blocked_s": round(sum(probe.lags), 3),
+        },
+        "challenge_store": {
+            "peak_entries": sampler.peak_entries,
+            "peak_image_bytes": sampler.peak_image_bytes,
+            "peak_python_alloc_bytes": peak_alloc,
+        },
+        "rest": {
+            "total_calls": total_calls,
+            "calls_per_verification": round(total_calls / verified, 2) if verified else None,
+            "by_route": dict(rest.calls.most_common()),
+        },
+    }
+
+
+def _print_report(report: dict):
+    print(f"Joiners: {report['joiners']}  wall: {report['wall_s']}s  "
+          f"verified: {report['verified']}  failed: {report['failed']}  abandoned: {report['abandoned']}")
+    for name in ("e2e", "handle_start_verify", "solve_modal_callback", "loop_blocking"):
+        s = report[name]
+        print(f"{name:<22} n={s['count']:<6} mean={s['mean_ms']:>8}ms p50={s['p50_ms']:>8}ms "
+              f"p95={s['p95_ms']:>8}ms p99={s['p99_ms']:>8}ms max={s['max_ms']:>8}ms")
+    print(f"loop blocked total: {report['loop_blocking']['total_blocked_s']}s")
+    cs = report["challenge_store"]
+    print(f"challenge store: peak entries={cs['peak_entries']} image bytes={cs['peak_image_bytes']} "
+          f"python alloc peak={cs['peak_python_alloc_bytes']}")
+    r = report["rest"]
+    print(f"REST calls: {r['total_calls']} ({r['calls_per_verification']} per verification)")
+    for route, n in r["by_route"].items():
+        print(f"  {n:>7}  {route}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the VerifyBot verification flow")
+    parser.add_argument("--joiners", type=int, default=200, help="Number of simulated members joining")
+    parser.add_argument("--arrival-rate", type=float, default=50.0, help="Joins per second (0 = all at once)")
+    parser.add_argument("--wrong-rate", type=float, default=0.2, help="Probability each submitted answer is wrong")
+    parser.add_argument("--abandon-rate", type=float, default=0.05, help="Probability a joiner never clicks Verify")
+    parser.add_argument("--think-ms", type=float, default=2000.0, help="Max simulated user think time per step")
+    parser.add_argument("--rest-latency-ms", type=float, default=60.0, help="Mean simulated REST latency")
+    parser.add_argument("--rest-jitter-ms", type=float, default=20.0, help="Std-dev of simulated REST latency")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    tracing.shutdown()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
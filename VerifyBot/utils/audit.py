@@ -0,0 +1,167 @@
+"""
+Verification audit journal.
+
+Every verification outcome (challenge started, verified, wrong answer,
+attempts exhausted, challenge expired, kicked at the deadline) is appended to
+a local SQLite file. Records are buffered and written in one transaction per
+``AUDIT_FLUSH_S`` (or every ``AUDIT_BATCH`` records) on a dedicated thread, so
+the event loop only pays for a list append.
+
+Rows are indexed by (guild, user) for member history and by (guild, time) for
+recent pass/fail rates; all-time per-guild counts are kept in a small totals
+table updated in the same transaction. When the live data grows past
+``AUDIT_MAX_BYTES`` the oldest quarter of the journal is dropped; SQLite reuses
+the freed pages, so the file stays bounded without a rewrite.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AUDIT_DB_PATH = os.getenv("AUDIT_DB_PATH", os.path.join("data", "audit.sqlite3"))
+AUDIT_MAX_BYTES = int(os.getenv("AUDIT_MAX_BYTES", str(64 * 1024 * 1024)))
+AUDIT_FLUSH_S = float(os.getenv("AUDIT_FLUSH_S", "1"))
+AUDIT_BATCH = 500
+
+OUTCOMES = ("started", "verified", "incorrect", "exhausted", "expired", "kicked")
+
+Row = Tuple[float, int, int, str, Optional[str]]
+
+
+class AuditJournal:
+    def __init__(self, path: str = AUDIT_DB_PATH):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit-sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: List[Row] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY, ts REAL NOT NULL, guild_id INTEGER NOT NULL, "
+                "user_id INTEGER NOT NULL, outcome TEXT NOT NULL, detail TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS events_member ON events(guild_id, user_id, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS events_recent ON events(guild_id, ts, outcome)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS totals ("
+                "guild_id INTEGER NOT NULL, outcome TEXT NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (guild_id, outcome)) WITHOUT ROWID"
+            )
+            self._conn = conn
+            logger.info("Audit journal at %s", self.path)
+        return self._conn
+
+    def _write(self, rows: List[Row]) -> None:
+        conn = self._connect()
+        counts = Counter((guild_id, outcome) for _, guild_id, _, outcome, _ in rows)
+        conn.execute("BEGIN")
+        try:
+            conn.executemany("INSERT INTO events(ts, guild_id, user_id, outcome, detail) VALUES (?, ?, ?, ?, ?)", rows)
+            conn.executemany(
+                "INSERT INTO totals(guild_id, outcome, count) VALUES (?, ?, ?) "
+                "ON CONFLICT(guild_id, outcome) DO UPDATE SET count = count + excluded.count",
+                [(guild_id, outcome, n) for (guild_id, outcome), n in counts.items()],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._rotate(conn)
+
+    def _rotate(self, conn: sqlite3.Connection) -> None:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0] - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if pages * page_size <= AUDIT_MAX_BYTES:
+            return
+        lo, hi = conn.execute("SELECT MIN(id), MAX(id) FROM events").fetchone()
+        if lo is None:
+            return
+        cutoff = lo + (hi - lo) // 4
+        cur = conn.execute("DELETE FROM events WHERE id <= ?", (cutoff,))
+        logger.info("Audit journal over %s bytes; dropped %s oldest records", AUDIT_MAX_BYTES, cur.rowcount)
+
+    def record(self, guild_id: int, user_id: int, outcome: str, detail: Optional[str] = None) -> None:
+        """Queue one outcome; written with the next batch."""
+        self._pending.append((time.time(), guild_id, user_id, outcome, detail))
+        if len(self._pending) >= AUDIT_BATCH:
+            self._spawn_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(AUDIT_FLUSH_S, self._spawn_flush)
+
+    def _spawn_flush(self) -> None:
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._write, rows)
+        except Exception as e:
+            logger.exception("Failed to write %s audit records: %s", len(rows), e)
+
+    async def _query(self, sql: str, params: tuple) -> list:
+        await self.flush()
+
+        def work():
+            return self._connect().execute(sql, params).fetchall()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, work)
+
+    async def history(self, guild_id: int, user_id: int, limit: int = 20) -> List[Tuple[float, str, Optional[str]]]:
+        """Newest-first outcomes for one member."""
+        return await self._query(
+            "SELECT ts, outcome, detail FROM events WHERE guild_id = ? AND user_id = ? ORDER BY id DESC LIMIT ?",
+            (guild_id, user_id, limit),
+        )
+
+    async def totals(self, guild_id: int) -> Dict[str, int]:
+        """All-time outcome counts for a guild (survive rotation)."""
+        rows = await self._query("SELECT outcome, count FROM totals WHERE guild_id = ?", (guild_id,))
+        return dict(rows)
+
+    async def recent(self, guild_id: int, since: float) -> Dict[str, int]:
+        """Outcome counts for a guild since a unix timestamp."""
+        rows = await self._query(
+            "SELECT outcome, COUNT(*) FROM events WHERE guild_id = ? AND ts >= ? GROUP BY outcome",
+            (guild_id, since),
+        )
+        return dict(rows)
+
+    def close(self) -> None:
+        """Write anything still buffered; call on shutdown, after the event loop stops."""
+        rows, self._pending = self._pending, []
+        if rows:
+            try:
+                self._executor.submit(self._write, rows).result(timeout=10)
+            except Exception as e:
+                logger.exception("Failed to write %s audit records on shutdown: %s", len(rows), e)
+        self._executor.shutdown(wait=True)
+
+
+def pass_rate(counts: Dict[str, int]) -> Optional[float]:
+    """Share of finished verifications that passed; failures are exhausted attempts and deadline kicks."""
+    passed = counts.get("verified", 0)
+    finished = passed + counts.get("exhausted", 0) + counts.get("kicked", 0)
+    return passed / finished if finished else None
+
+
+journal = AuditJournal()
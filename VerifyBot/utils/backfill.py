@@ -0,0 +1,189 @@
+import asyncio
+import os
+import logging
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import nextcord
+
+from utils.metrics import ROLE_OPS, ROLE_OP_FAILURES, ROLE_OPS_SKIPPED, failure_status
+from utils.persistence import JsonDocument, file_lock
+from utils.role_breaker import role_breaker
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = "data"
+CHECKPOINT_PATH = os.path.join(DATA_DIR, "backfill_state.json")
+CHECKPOINT_LOCK_FILE = Path(DATA_DIR, "backfill_state.json.lock")
+
+# Discord returns at most 1000 members per "list guild members" request.
+CHUNK_SIZE = 1000
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
+BACKFILL_RATE_PER_S = float(os.getenv("BACKFILL_RATE_PER_S", "5"))
+
+
+# Workers share the file: each write merges only the guilds this process touched.
+_checkpoints = JsonDocument(CHECKPOINT_PATH, default=dict, keyed=True, lock=lambda: file_lock(CHECKPOINT_LOCK_FILE))
+
+def get_checkpoint(guild_id: int) -> Optional[dict]:
+    return _checkpoints.data.get(str(guild_id))
+
+def save_checkpoint(guild_id: int, state: dict):
+    _checkpoints.data[str(guild_id)] = state
+    _checkpoints.changed(str(guild_id))
+    _checkpoints.save()
+
+def clear_checkpoint(guild_id: int):
+    if _checkpoints.data.pop(str(guild_id), None) is not None:
+        _checkpoints.removed(str(guild_id))
+        _checkpoints.save()
+
+def list_running_guild_ids() -> list[int]:
+    return [int(gid) for gid, st in _checkpoints.data.items() if st.get("status") == "running"]
+
+
+class _Pacer:
+    """Spaces REST calls evenly across all workers so the pool never bursts."""
+
+    def __init__(self, rate_per_s: float):
+        self.interval = 1.0 / rate_per_s if rate_per_s > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class BackfillJob:
+    """
+    Streams a guild's members page by page and gives the not-verified role to
+    everyone who has neither the verified nor the not-verified role.
+    A checkpoint (highest member ID fully handled) is written after every page,
+    so an interrupted run picks up where it stopped.
+    """
+
+    def __init__(
+        self,
+        guild: nextcord.Guild,
+        verified_role_id: int,
+        not_verified_role_id: int,
+        on_progress: Optional[Callable[["BackfillJob"], Awaitable[None]]] = None,
+        restart: bool = False,
+    ):
+        self.guild = guild
+        self.verified_role_id = verified_role_id
+        self.not_verified_role_id = not_verified_role_id
+        self.on_progress = on_progress
+
+        state = None if restart else get_checkpoint(guild.id)
+        if state and state.get("status") == "done":
+            state = None
+        state = state or {}
+        self.after: Optional[int] = state.get("after")
+        self.scanned: int = state.get("scanned", 0)
+        self.assigned: int = state.get("assigned", 0)
+        self.failed: int = state.get("failed", 0)
+        self.resumed = bool(state)
+        self.status = "running"
+
+    def _state(self) -> dict:
+        return {
+            "status": self.status,
+            "after": self.after,
+            "scanned": self.scanned,
+            "assigned": self.assigned,
+            "failed": self.failed,
+            "verified_role_id": self.verified_role_id,
+            "not_verified_role_id": self.not_verified_role_id,
+        }
+
+    def _needs_role(self, member: nextcord.Member) -> bool:
+        if member.bot:
+            return False
+        return member.get_role(self.verified_role_id) is None and member.get_role(self.not_verified_role_id) is None
+
+    async def _worker(self, queue: "asyncio.Queue[nextcord.Member]", pacer: _Pacer, role: nextcord.Role):
+        while True:
+            member = await queue.get()
+            try:
+                if not role_breaker.allow(self.guild.id, role.id):
+                    # The role is blocked by a 403; don't spend the rest of the guild on it
+                    ROLE_OPS_SKIPPED.inc(op="add")
+                    self.failed += 1
+                    continue
+                await pacer.wait()
+                ROLE_OPS.inc(op="add")
+                await member.add_roles(role, reason="Verification backfill")
+                role_breaker.success(self.guild.id, role.id)
+                self.assigned += 1
+            except Exception as e:
+                ROLE_OP_FAILURES.inc(op="add", status=failure_status(e))
+                if isinstance(e, nextcord.Forbidden):
+                    role_breaker.forbidden(self.guild.id, role.id)
+                self.failed += 1
+                logger.warning("Backfill failed for user %s in guild %s: %s", member.id, self.guild.id, e)
+            finally:
+                queue.task_done()
+
+    async def _fetch_page(self) -> list[nextcord.Member]:
+        """One "list guild members" request: the next CHUNK_SIZE members after the cursor."""
+        # fetch_members() keeps requesting pages until the guild is exhausted, whatever
+        # ``limit`` says, so stop reading after one page's worth.
+        after = nextcord.Object(id=self.after) if self.after else None
+        page: list[nextcord.Member] = []
+        async for member in self.guild.fetch_members(limit=CHUNK_SIZE, after=after):
+            page.append(member)
+            if len(page) >= CHUNK_SIZE:
+                break
+        return page
+
+    async def run(self):
+        role = self.guild.get_role(self.not_verified_role_id)
+        if role is None:
+            raise RuntimeError("The configured not-verified role no longer exists.")
+
+        save_checkpoint(self.guild.id, self._state())
+        pacer = _Pacer(BACKFILL_RATE_PER_S)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=CHUNK_SIZE)
+        workers = [asyncio.create_task(self._worker(queue, pacer, role)) for _ in range(max(1, BACKFILL_WORKERS))]
+        logger.info(
+            "Backfill %s for guild %s (after=%s)",
+            "resumed" if self.resumed else "started", self.guild.id, self.after,
+        )
+        try:
+            while True:
+                page = await self._fetch_page()
+                if not page:
+                    break
+                for member in page:
+                    if self._needs_role(member):
+                        await queue.put(member)
+                await queue.join()
+
+                # The endpoint returns members in ascending ID order, which is what makes the
+                # ``after`` cursor work; nextcord yields each page reversed, so take the max.
+                self.after = max(m.id for m in page)
+                self.scanned += len(page)
+                save_checkpoint(self.guild.id, self._state())
+                if self.on_progress is not None:
+                    await self.on_progress(self)
+                if len(page) < CHUNK_SIZE:
+                    break
+        finally:
+            for w in workers:
+                w.cancel()
+
+        self.status = "done"
+        save_checkpoint(self.guild.id, self._state())
+        logger.info(
+            "Backfill finished for guild %s: scanned=%s assigned=%s failed=%s",
+            self.guild.id, self.scanned, self.assigned, self.failed,
+        )
+        if self.on_progress is not None:
+            await self.on_progress(self)
@@ -0,0 +1,51 @@
+"""
+Gateway cache profiles.
+
+    full     library defaults: cache every member, chunk all guilds at startup,
+             keep the last 1000 messages
+    lean     no startup chunking; cache only members Discord sends us (guild
+             create, joins); message cache bounded to MESSAGE_CACHE_SIZE
+    minimal  no member cache, no chunking, no message cache; members are
+             resolved from the event payload or fetched on demand
+
+Pick one with CACHE_PROFILE (default: lean).
+"""
+import logging
+import os
+from typing import Any, Dict
+
+import nextcord
+
+logger = logging.getLogger(__name__)
+
+PROFILES = ("full", "lean", "minimal")
+DEFAULT_PROFILE = "lean"
+
+MESSAGE_CACHE_SIZE = int(os.getenv("MESSAGE_CACHE_SIZE", "100"))
+
+
+def profile_from_env() -> str:
+    profile = os.getenv("CACHE_PROFILE", DEFAULT_PROFILE).strip().lower()
+    if profile not in PROFILES:
+        logger.warning("Unknown CACHE_PROFILE '%s'; using '%s'", profile, DEFAULT_PROFILE)
+        return DEFAULT_PROFILE
+    return profile
+
+
+def bot_options(intents: nextcord.Intents, profile: str) -> Dict[str, Any]:
+    """Keyword arguments for the Bot constructor that implement ``profile``."""
+    if profile == "full":
+        return {}
+    if profile == "minimal":
+        return {
+            "member_cache_flags": nextcord.MemberCacheFlags.none(),
+            "chunk_guilds_at_startup": False,
+            "max_messages": None,
+        }
+    flags = nextcord.MemberCacheFlags.none()
+    flags.joined = intents.members
+    return {
+        "member_cache_flags": flags,
+        "chunk_guilds_at_startup": False,
+        "max_messages": MESSAGE_CACHE_SIZE or None,
+    }
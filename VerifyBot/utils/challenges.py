@@ -1,11 +1,16 @@
+import base64
+import functools
+import json
 import logging
 import random
 import string
+import time
 from io import BytesIO
 from datetime import datetime, timedelta
+from typing import Optional
 
-from PIL import Image, ImageDraw, ImageFont
-from captcha.image import ImageCaptcha
+from utils.metrics import CHALLENGE_RENDER, PENDING_CHALLENGES, REGISTRY
+from utils.state_backend import get_backend
 
 logger = logging.getLogger(__name__)
 
@@ -24,25 +29,57 @@ class Challenge:
     def is_expired(self) -> bool:
         return datetime.utcnow() > self.expires_at
 
-# {(guild_id, user_id): Challenge}
-challenges = {}
+    def to_json(self) -> str:
+        return json.dumps({
+            "answer": self.answer,
+            "image": base64.b64encode(self.image_bytes).decode("ascii"),
+            "expires_at": self.expires_at.isoformat(),
+            "kind": self.kind,
+        })
 
-def _render_text_to_image(text: str):
-    width, height = 420, 140
-    bg_color = (255, 255, 255)
-    text_color = (30, 30, 30)
-    image = Image.new("RGB", (width, height), bg_color)
-    draw = ImageDraw.Draw(image)
+    @classmethod
+    def from_json(cls, guild_id: int, user_id: int, raw: str, attempts_left: int) -> "Challenge":
+        d = json.loads(raw)
+        return cls(
+            guild_id, user_id, d["answer"], base64.b64decode(d["image"]),
+            datetime.fromisoformat(d["expires_at"]), attempts_left=attempts_left, kind=d["kind"],
+        )
+
+# Challenges live in the state backend (see utils/state_backend.py) under
+# challenge:<guild>:<user>, with the remaining attempts in a separate counter key
+# so wrong answers can be decremented atomically across workers.
+def _challenge_key(guild_id: int, user_id: int) -> str:
+    return f"challenge:{guild_id}:{user_id}"
+
+def _attempts_key(guild_id: int, user_id: int) -> str:
+    return f"attempts:{guild_id}:{user_id}"
+
+async def _count_pending():
+    PENDING_CHALLENGES.set(await get_backend().count("challenge:"))
+
+REGISTRY.add_refresh_hook(_count_pending)
+
+# PIL and captcha are imported on first render (or by warm_up() once the
+# gateway connects), keeping them off the startup path.
+@functools.lru_cache(maxsize=None)
+def _font(size: int):
+    from PIL import ImageFont
 
-    font = None
     for candidate in ["arial.ttf", "Arial.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"]:
         try:
-            font = ImageFont.truetype(candidate, 48)
-            break
+            return ImageFont.truetype(candidate, size)
         except Exception:
             continue
-    if font is None:
-        font = ImageFont.load_default()
+    return ImageFont.load_default()
+
+def _render_text_to_image(text: str, width: int = 420, height: int = 140):
+    from PIL import Image, ImageDraw
+
+    bg_color = (255, 255, 255)
+    text_color = (30, 30, 30)
+    image = Image.new("RGB", (width, height), bg_color)
+    draw = ImageDraw.Draw(image)
+    font = _font(48)
 
     bbox = draw.textbbox((0, 0), text, font=font)
     tw = bbox[2] - bbox[0]
@@ -55,16 +92,18 @@ def _render_text_to_image(text: str):
     image.save(bio, format="PNG")
     return bio.getvalue()
 
-def _generate_text_captcha():
+def _generate_text_captcha(width: int = 280, height: int = 100):
+    from captcha.image import ImageCaptcha
+
     length = random.choice([5, 6])
     text = "".join(random.choices(string.ascii_uppercase + string.digits, k=length))
-    gen = ImageCaptcha(width=280, height=100)
+    gen = ImageCaptcha(width=width, height=height)
     image = gen.generate_image(text)
     bio = BytesIO()
     image.save(bio, format="PNG")
     return text, bio.getvalue()
 
-def _generate_math_captcha():
+def _generate_math_captcha(width: int = 420, height: int = 140):
     ops = ["+", "-", "*"]
     terms = [random.randint(2, 15)]
     expr_parts = [str(terms[0])]
@@ -78,30 +117,56 @@ def _generate_math_captcha():
         result = eval(expr, {"__builtins__": {}})
     except Exception:
         result = 0
-    img_bytes = _render_text_to_image(expr)
+    img_bytes = _render_text_to_image(expr, width, height)
     return str(int(result)), img_bytes
 
+def warm_up():
+    """Import the imaging stack and load fonts; run in an executor after connect."""
+    started = time.perf_counter()
+    _generate_text_captcha()
+    _generate_math_captcha()
+    logger.info("Captcha renderer warmed up in %.0fms", (time.perf_counter() - started) * 1000)
+
 def make_new_challenge(guild_id: int, user_id: int) -> Challenge:
+    started = time.perf_counter()
     if random.random() < 0.5:
         ans, img_bytes = _generate_text_captcha()
         kind = "text"
     else:
         ans, img_bytes = _generate_math_captcha()
         kind = "math"
+    CHALLENGE_RENDER.observe(time.perf_counter() - started, kind=kind)
     expires_at = datetime.utcnow() + timedelta(minutes=CHALLENGE_TTL_MINUTES)
     ch = Challenge(guild_id, user_id, ans, img_bytes, expires_at, attempts_left=5, kind=kind)
     logger.info("Created %s challenge for guild=%s user=%s (expires in %s min)", kind, guild_id, user_id, CHALLENGE_TTL_MINUTES)
     return ch
 
-def get_or_create_active_challenge(guild_id: int, user_id: int) -> Challenge:
-    key = (guild_id, user_id)
-    ch = challenges.get(key)
+async def get_challenge(guild_id: int, user_id: int) -> Optional[Challenge]:
+    backend = get_backend()
+    raw = await backend.get(_challenge_key(guild_id, user_id))
+    if raw is None:
+        return None
+    attempts = await backend.get(_attempts_key(guild_id, user_id))
+    return Challenge.from_json(guild_id, user_id, raw, int(attempts) if attempts is not None else 0)
+
+async def get_or_create_active_challenge(guild_id: int, user_id: int) -> Challenge:
+    ch = await get_challenge(guild_id, user_id)
     if ch is None or ch.is_expired() or ch.attempts_left <= 0:
         ch = make_new_challenge(guild_id, user_id)
-        challenges[key] = ch
+        ttl_s = CHALLENGE_TTL_MINUTES * 60
+        backend = get_backend()
+        await backend.set(_attempts_key(guild_id, user_id), str(ch.attempts_left), ttl_s)
+        await backend.set(_challenge_key(guild_id, user_id), ch.to_json(), ttl_s)
     return ch
 
-def clear_challenge(guild_id: int, user_id: int):
-    if (guild_id, user_id) in challenges:
-        logger.info("Cleared challenge for guild=%s user=%s", guild_id, user_id)
-    challenges.pop((guild_id, user_id), None)
\ No newline at end of file
+async def record_wrong_attempt(guild_id: int, user_id: int) -> int:
+    """Atomically use up one attempt; returns the attempts left (0 if the challenge is gone)."""
+    left = await get_backend().incr(_attempts_key(guild_id, user_id), -1)
+    return max(left, 0) if left is not None else 0
+
+async def clear_challenge(guild_id: int, user_id: int):
+    await get_backend().delete(_challenge_key(guild_id, user_id), _attempts_key(guild_id, user_id))
+    logger.info("Cleared challenge for guild=%s user=%s", guild_id, user_id)
+
+async def purge_expired_challenges() -> int:
+    return await get_backend().purge_expired()
@@ -1,46 +1,43 @@
-import json
 import os
 import logging
+from pathlib import Path
+
+from utils.metrics import STORAGE_LATENCY
+from utils.persistence import JsonDocument, file_lock
 
 logger = logging.getLogger(__name__)
 
 DATA_DIR = "data"
 CONFIG_PATH = os.path.join(DATA_DIR, "guild_configs.json")
-os.makedirs(DATA_DIR, exist_ok=True)
-if not os.path.exists(CONFIG_PATH):
-    with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-        json.dump({}, f)
-        logger.info("Created guild config store at %s", CONFIG_PATH)
-
-def _load_all():
-    try:
-        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.exception("Failed to read guild config store: %s", e)
-        return {}
-
-def _save_all(obj):
-    try:
-        with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-            json.dump(obj, f, indent=2)
-    except Exception as e:
-        logger.exception("Failed to write guild config store: %s", e)
+CONFIG_LOCK_FILE = Path(DATA_DIR, "guild_configs.json.lock")
+
+# Served from memory and written behind; watched so that a /setupverification
+# handled by another worker is picked up. Writes merge per guild under a file
+# lock, so two workers saving different guilds keep both.
+_doc = JsonDocument(
+    CONFIG_PATH,
+    default=dict,
+    latency=STORAGE_LATENCY,
+    watch=True,
+    keyed=True,
+    lock=lambda: file_lock(CONFIG_LOCK_FILE),
+)
 
 def get_guild_config(guild_id: int):
-    return _load_all().get(str(guild_id))
+    cfg = _doc.data.get(str(guild_id))
+    return dict(cfg) if cfg is not None else None
 
 def set_guild_config(guild_id: int, config: dict):
-    allc = _load_all()
-    allc[str(guild_id)] = config
-    _save_all(allc)
+    _doc.data[str(guild_id)] = dict(config)
+    _doc.changed(str(guild_id))
+    _doc.save()
     logger.info("Saved verification config for guild %s", guild_id)
 
 def delete_guild_config(guild_id: int):
-    allc = _load_all()
-    allc.pop(str(guild_id), None)
-    _save_all(allc)
+    _doc.data.pop(str(guild_id), None)
+    _doc.removed(str(guild_id))
+    _doc.save()
     logger.info("Deleted verification config for guild %s", guild_id)
 
 def list_guild_ids():
-    return list(_load_all().keys())
\ No newline at end of file
+    return list(_doc.data.keys())
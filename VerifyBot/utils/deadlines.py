@@ -0,0 +1,105 @@
+"""
+Verification deadlines.
+
+When a guild sets a deadline, each joining member gets an entry
+(guild, member) -> join time + deadline in data/verify_deadlines.json.
+Entries are indexed twice in memory: a dict for O(1) cancellation when the
+member verifies or leaves, and a min-heap ordered by deadline so the
+enforcement loop only pops members that are due. Cancelled entries stay in
+the heap until they surface (checked against the dict) or the heap is
+rebuilt once stale entries outnumber live ones.
+
+Several workers may share the file: writes merge per entry under a file lock,
+so each worker only adds and removes its own entries.
+"""
+import heapq
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.metrics import PENDING_DEADLINES
+from utils.persistence import JsonDocument, file_lock
+
+logger = logging.getLogger(__name__)
+
+DEADLINES_PATH = "data/verify_deadlines.json"
+DEADLINES_LOCK_FILE = Path("data/verify_deadlines.json.lock")
+DEADLINE_KICK_RATE_PER_S = float(os.getenv("DEADLINE_KICK_RATE_PER_S", "2"))
+DEADLINE_BATCH = int(os.getenv("DEADLINE_BATCH", "50"))  # due members handled per loop tick
+DEADLINE_MAX_MINUTES = 7 * 24 * 60
+
+_doc = JsonDocument(DEADLINES_PATH, default=dict, keyed=True, lock=lambda: file_lock(DEADLINES_LOCK_FILE))
+
+
+def _key(guild_id: int, member_id: int) -> str:
+    return f"{guild_id}:{member_id}"
+
+
+class DeadlineIndex:
+    def __init__(self, doc: JsonDocument):
+        self._doc = doc
+        self._heap: Optional[List[Tuple[float, str]]] = None
+
+    @property
+    def _entries(self) -> Dict[str, float]:
+        return self._doc.data
+
+    def _ensure_heap(self) -> List[Tuple[float, str]]:
+        if self._heap is None:
+            self._heap = [(deadline, key) for key, deadline in self._entries.items()]
+            heapq.heapify(self._heap)
+        return self._heap
+
+    def add(self, guild_id: int, member_id: int, deadline: float) -> None:
+        key = _key(guild_id, member_id)
+        self._entries[key] = deadline
+        heapq.heappush(self._ensure_heap(), (deadline, key))
+        self._doc.changed(key)
+        self._doc.save()
+
+    def cancel(self, guild_id: int, member_id: int) -> bool:
+        """Drop a member's deadline (verified or left). O(1); returns True if one existed."""
+        key = _key(guild_id, member_id)
+        if self._entries.pop(key, None) is None:
+            return False
+        self._doc.removed(key)
+        self._doc.save()
+        heap = self._ensure_heap()
+        if len(heap) > 64 and len(heap) > 2 * len(self._entries):
+            self._heap = None  # mostly stale: rebuild from the live entries on next use
+        return True
+
+    def clear_guild(self, guild_id: int) -> int:
+        prefix = f"{guild_id}:"
+        keys = [k for k in self._entries if k.startswith(prefix)]
+        for key in keys:
+            del self._entries[key]
+        if keys:
+            self._doc.removed(*keys)
+            self._heap = None
+            self._doc.save()
+        return len(keys)
+
+    def pop_due(self, now: float, limit: int) -> List[Tuple[int, int]]:
+        """Remove and return up to ``limit`` (guild_id, member_id) whose deadline has passed."""
+        heap = self._ensure_heap()
+        due: List[Tuple[int, int]] = []
+        while heap and heap[0][0] <= now and len(due) < limit:
+            deadline, key = heapq.heappop(heap)
+            if self._entries.get(key) != deadline:
+                continue  # cancelled or re-added with a later deadline
+            del self._entries[key]
+            self._doc.removed(key)
+            guild_id, member_id = key.split(":")
+            due.append((int(guild_id), int(member_id)))
+        if due:
+            self._doc.save()
+        return due
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+deadlines = DeadlineIndex(_doc)
+PENDING_DEADLINES.set_function(lambda: len(deadlines))
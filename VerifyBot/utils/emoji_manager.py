@@ -1,16 +1,17 @@
+import copy
 import os
-import json
 import logging
 from typing import Optional, Dict, Any
 
 import aiohttp
 import nextcord
 
+from utils.persistence import JsonDocument
+
 logger = logging.getLogger(__name__)
 
 CONFIG_DIR = "config"
 GLOBAL_CONFIG_PATH = os.path.join(CONFIG_DIR, "config.json")
-os.makedirs(CONFIG_DIR, exist_ok=True)
 
 DEFAULT_CONFIG = {
     "emoji_urls": {
@@ -23,25 +24,14 @@ DEFAULT_CONFIG = {
     }
 }
 
-def load_global_config() -> Dict[str, Any]:
-    if not os.path.exists(GLOBAL_CONFIG_PATH):
-        with open(GLOBAL_CONFIG_PATH, "w", encoding="utf-8") as f:
-            json.dump(DEFAULT_CONFIG, f, indent=2)
-        logger.info("Created global config at %s", GLOBAL_CONFIG_PATH)
+# Read once and served from memory: button emojis are looked up on every panel render.
+_global_config = JsonDocument(GLOBAL_CONFIG_PATH, default=lambda: copy.deepcopy(DEFAULT_CONFIG))
 
-    try:
-        with open(GLOBAL_CONFIG_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.exception("Failed to load global config: %s", e)
-        return DEFAULT_CONFIG.copy()
+def load_global_config() -> Dict[str, Any]:
+    return _global_config.data
 
 def save_global_config(cfg: Dict[str, Any]):
-    try:
-        with open(GLOBAL_CONFIG_PATH, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, indent=2)
-    except Exception as e:
-        logger.exception("Failed to write global config: %s", e)
+    _global_config.replace(cfg)
 
 async def _download_bytes(url: str) -> Optional[bytes]:
     try:
@@ -0,0 +1,121 @@
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the lag histogram buckets; the last bucket is open-ended.
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LagHistogram:
+    def __init__(self, bounds_ms=LAG_BUCKETS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, lag_ms: float):
+        self.counts[bisect.bisect_left(self.bounds_ms, lag_ms)] += 1
+        self.count += 1
+        self.sum_ms += lag_ms
+        if lag_ms > self.max_ms:
+            self.max_ms = lag_ms
+
+    def summary(self) -> str:
+        labels = [f"<={b}ms" for b in self.bounds_ms] + [f">{self.bounds_ms[-1]}ms"]
+        parts = [f"{label}:{n}" for label, n in zip(labels, self.counts) if n]
+        mean = self.sum_ms / self.count if self.count else 0.0
+        return f"n={self.count} mean={mean:.1f}ms max={self.max_ms:.1f}ms [{' '.join(parts)}]"
+
+
+def _describe_task(task: Optional[asyncio.Task]) -> str:
+    if task is None:
+        return "<no task: callback or loop internals>"
+    coro = task.get_coro()
+    qualname = getattr(coro, "__qualname__", repr(coro))
+    return f"{task.get_name()} ({qualname})"
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag with a periodic ticker and records it in a histogram.
+    A daemon thread watches the ticker; if the loop stops ticking for longer than
+    the threshold it grabs the loop thread's stack, so the blocking call shows up
+    in the logs together with the task (event handler) that was running.
+    """
+
+    def __init__(self, threshold_ms: float = 250.0, interval_s: float = 0.5, report_every_s: float = 300.0):
+        self.threshold_ms = threshold_ms
+        self.interval_s = interval_s
+        self.report_every_s = report_every_s
+        self.histogram = LagHistogram()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._tick(), name="loop-lag-monitor")
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-sampler", daemon=True)
+        self._thread.start()
+        logger.info("Loop lag monitor started (threshold=%sms)", self.threshold_ms)
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _tick(self):
+        last_report = time.monotonic()
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval_s)
+            now = time.monotonic()
+            self._last_beat = now
+            lag_ms = max(0.0, (now - start - self.interval_s) * 1000)
+            self.histogram.observe(lag_ms)
+            if lag_ms >= self.threshold_ms:
+                logger.warning("Event loop lag %.0fms (threshold %.0fms)", lag_ms, self.threshold_ms)
+            if now - last_report >= self.report_every_s:
+                last_report = now
+                logger.info("Loop lag histogram: %s", self.histogram.summary())
+
+    def _watch(self):
+        threshold_s = self.threshold_ms / 1000
+        poll_s = max(0.01, min(threshold_s / 2, 0.1))
+        captured_for = None
+        while not self._stop.wait(poll_s):
+            beat = self._last_beat
+            stalled_s = time.monotonic() - beat - self.interval_s
+            if stalled_s < threshold_s or captured_for == beat:
+                continue
+            # One stack per stall; the ticker moving on resets it.
+            captured_for = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            try:
+                task = asyncio.current_task(self._loop)
+            except Exception:
+                task = None
+            logger.warning(
+                "Event loop blocked for at least %.0fms in handler %s; stack:\n%s",
+                stalled_s * 1000, _describe_task(task), stack,
+            )
@@ -0,0 +1,245 @@
+import bisect
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float]):
+        """Compute the (unlabelled) value only when scraped."""
+        self._function = fn
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {float(self._function())}"]
+            except Exception as e:
+                logger.warning("Gauge %s callback failed: %s", self.name, e)
+                return []
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {v}" for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (+inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        out: List[str] = []
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {cumulative}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {total}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {count}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._refresh_hooks: List[Callable[[], Awaitable[None]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_refresh_hook(self, hook: Callable[[], Awaitable[None]]):
+        """Coroutine run before each scrape, for values that need async lookups."""
+        self._refresh_hooks.append(hook)
+
+    async def refresh(self):
+        for hook in self._refresh_hooks:
+            try:
+                await hook()
+            except Exception as e:
+                logger.warning("Metrics refresh hook failed: %s", e)
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# Instrumentation points. Updating these is a dict lookup plus an add; the text
+# exposition (and gauge callbacks) only run when something scrapes /metrics.
+EVENTS_RECEIVED = counter("verifybot_events_received_total", "Gateway events and interactions handled.", ("event",))
+EVENTS_DEDUPLICATED = counter(
+    "verifybot_events_deduplicated_total", "Gateway events dropped as replays of events already handled.", ("event",)
+)
+ROLE_OPS = counter("verifybot_role_ops_total", "Role add/remove requests issued.", ("op",))
+ROLE_OP_FAILURES = counter("verifybot_role_op_failures_total", "Role add/remove requests that failed.", ("op", "status"))
+ROLE_OPS_SKIPPED = counter(
+    "verifybot_role_ops_skipped_total", "Role edits skipped because the role's circuit breaker is open.", ("op",)
+)
+ROLE_BREAKERS_OPEN = gauge("verifybot_role_breakers_open", "Roles currently blocked by a 403 circuit breaker.")
+STORAGE_LATENCY = histogram("verifybot_storage_seconds", "Guild config store read/write latency.", ("op",))
+CHALLENGE_RENDER = histogram("verifybot_challenge_render_seconds", "Captcha generation time.", ("kind",))
+PENDING_CHALLENGES = gauge("verifybot_pending_challenges", "Challenges currently held in the store.")
+PENDING_DEADLINES = gauge("verifybot_pending_deadlines", "Unverified members with a verification deadline.")
+DEADLINE_KICKS = counter(
+    "verifybot_deadline_kicks_total", "Members past their verification deadline, by outcome.", ("outcome",)
+)
+INTERACTION_ACK = histogram(
+    "verifybot_interaction_ack_seconds", "Time from interaction creation to the initial response.", ("handler",)
+)
+HTTP_RATELIMITS = counter("verifybot_http_ratelimits_total", "HTTP 429 responses received from Discord (route and global).")
+
+
+def failure_status(error: Exception) -> str:
+    return str(getattr(error, "status", "error"))
+
+
+def observe_ack(interaction, handler: str):
+    created_at = getattr(interaction, "created_at", None)
+    if created_at is not None:
+        INTERACTION_ACK.observe(max(0.0, time.time() - created_at.timestamp()), handler=handler)
+
+
+class _RateLimitLogCounter(logging.Handler):
+    # nextcord's http_ratelimit event also fires when a bucket merely runs out before a
+    # request, so real 429s are counted from the warning logged only in the 429 branch.
+    MESSAGE = "We are being rate limited."
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+
+    def emit(self, record: logging.LogRecord):
+        if isinstance(record.msg, str) and record.msg.startswith(self.MESSAGE):
+            HTTP_RATELIMITS.inc()
+
+
+def install_ratelimit_listeners(bot):
+    """Count Discord 429 responses seen by the bot's HTTP client."""
+    http_logger = logging.getLogger("nextcord.http")
+    if not any(isinstance(h, _RateLimitLogCounter) for h in http_logger.handlers):
+        http_logger.addHandler(_RateLimitLogCounter())
+
+
+async def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    from aiohttp import web
+
+    async def handle(request):
+        await REGISTRY.refresh()
+        return web.Response(text=REGISTRY.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Metrics endpoint listening on http://%s:%s/metrics", host, port)
+    return runner
+
+
+def metrics_port_from_env() -> Optional[int]:
+    raw = os.getenv("METRICS_PORT", "").strip()
+    return int(raw) if raw.isdigit() else None
@@ -0,0 +1,313 @@
+"""
+Async persistence for the bot's JSON files.
+
+Each file is a ``JsonDocument``: loaded once (``preload()`` before the event
+loop starts), served from memory, and written behind. ``save()`` only marks
+the document dirty; a burst of saves inside PERSIST_COMMIT_DELAY_MS is
+serialized once and handed to a dedicated I/O thread, which writes a temp
+file, fsyncs it and renames it into place. Nothing on the event loop touches
+the disk. ``flush_all()`` writes whatever is still pending on shutdown.
+
+Documents created with ``watch=True`` are re-read when another process
+changes the file (checked by the I/O thread every PERSIST_POLL_S).
+
+Documents created with ``keyed=True`` hold a dict shared with other
+processes: callers report the keys they set or deleted with ``changed()`` /
+``removed()``, and each write re-reads the file under ``lock`` and applies
+only those keys, so entries written by other processes are kept.
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Callable, ContextManager, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PERSIST_COMMIT_DELAY_MS = float(os.getenv("PERSIST_COMMIT_DELAY_MS", "50"))
+PERSIST_POLL_S = float(os.getenv("PERSIST_POLL_S", "2"))
+
+_documents: List["JsonDocument"] = []
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+Keys = Optional[Tuple[Set[str], Set[str]]]  # (changed, removed) keys of a keyed document
+
+
+class _IOThread:
+    """Runs submitted callables one at a time on a single daemon thread."""
+
+    def __init__(self):
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[[], Any]) -> Future:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="persistence-io", daemon=True)
+                self._thread.start()
+        fut: Future = Future()
+        self._queue.put((fn, fut))
+        return fut
+
+    def drain(self, timeout: float = 10.0) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self.submit(lambda: None).result(timeout=timeout)
+
+    def _run(self):
+        while True:
+            try:
+                fn, fut = self._queue.get(timeout=PERSIST_POLL_S)
+            except queue.Empty:
+                _poll_watched()
+                continue
+            try:
+                fut.set_result(fn())
+            except BaseException as e:
+                fut.set_exception(e)
+
+
+_io = _IOThread()
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+@contextmanager
+def file_lock(lock_file: Path):
+    """Exclusive flock on ``lock_file``, for read-merge-writes of a file shared between processes."""
+    if fcntl is None:
+        yield
+        return
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_file, "w") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _merge_keys(on_disk: Any, ours: dict, changed: Set[str], removed: Set[str]) -> dict:
+    if not isinstance(on_disk, dict):
+        return ours
+    merged = dict(on_disk)
+    for key in changed:
+        if key in ours:
+            merged[key] = ours[key]
+    for key in removed:
+        merged.pop(key, None)
+    return merged
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+class JsonDocument:
+    def __init__(
+        self,
+        path: os.PathLike,
+        default: Callable[[], Any],
+        *,
+        on_load: Optional[Callable[[Any], Any]] = None,
+        merge: Optional[Callable[[Any, Any], Any]] = None,
+        lock: Callable[[], ContextManager] = nullcontext,
+        latency=None,
+        watch: bool = False,
+        keyed: bool = False,
+    ):
+        """
+        ``on_load(data)`` post-processes what was read (e.g. filtering).
+        ``merge(on_disk, ours)`` runs on the I/O thread under ``lock`` just
+        before each write, for files shared with other processes. ``latency``
+        is an optional histogram timed with op="read"/"write". ``keyed``
+        merges by the keys reported with ``changed()`` / ``removed()`` instead.
+        """
+        self.path = Path(path)
+        self.default = default
+        self.on_load = on_load
+        self.merge = merge
+        self.lock = lock
+        self.latency = latency
+        self.watch = watch
+        self.keyed = keyed
+        self._changed: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._data: Any = None
+        self._dirty = False
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._inflight: Optional[Future] = None
+        self._known_mtime: Optional[int] = None
+        _documents.append(self)
+
+    def _timed(self, op: str) -> ContextManager:
+        return self.latency.time(op=op) if self.latency is not None else nullcontext()
+
+    def _read(self) -> Any:
+        if not self.path.exists():
+            return None
+        try:
+            with self._timed("read"):
+                text = self.path.read_text(encoding="utf-8")
+            return json.loads(text) if text.strip() else None
+        except (OSError, ValueError) as e:
+            logger.exception("Failed to read %s: %s", self.path, e)
+            return None
+
+    def load(self) -> Any:
+        """Read the file now (blocking). Called by preload() and on first access."""
+        data = self._read()
+        self._known_mtime = _mtime_ns(self.path)
+        self._data = data if data is not None else self.default()
+        if self.on_load is not None:
+            self._data = self.on_load(self._data)
+        if data is None:
+            self.save()
+        return self._data
+
+    def invalidate(self) -> None:
+        """Drop the cached contents; the next access re-reads the file."""
+        self._data = None
+
+    @property
+    def data(self) -> Any:
+        if self._data is None:
+            self.load()
+        return self._data
+
+    def changed(self, *keys: str) -> None:
+        """Keyed documents: these keys were set; the next write stores them."""
+        self._removed.difference_update(keys)
+        self._changed.update(keys)
+
+    def removed(self, *keys: str) -> None:
+        """Keyed documents: these keys were deleted; the next write drops them from the file."""
+        self._changed.difference_update(keys)
+        self._removed.update(keys)
+
+    def replace(self, data: Any) -> None:
+        self._data = data
+        self.save()
+
+    def save(self) -> None:
+        """Schedule a write-behind of the current contents."""
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(*self._snapshot())
+            return
+        if self._handle is None:
+            self._handle = loop.call_later(PERSIST_COMMIT_DELAY_MS / 1000, self._commit)
+
+    def _snapshot(self) -> Tuple[str, Keys]:
+        # Event loop: the keys are taken together with the contents they describe
+        self._dirty = False
+        keys = None
+        if self.keyed:
+            keys = (self._changed, self._removed)
+            self._changed, self._removed = set(), set()
+        return json.dumps(self._data, indent=2), keys
+
+    def _commit(self) -> None:
+        self._handle = None
+        if self._dirty:
+            text, keys = self._snapshot()
+            self._inflight = _io.submit(lambda: self._write(text, keys))
+
+    def _write(self, text: str, keys: Keys = None) -> None:
+        try:
+            with self.lock():
+                ours = text
+                if keys is not None:
+                    text = json.dumps(_merge_keys(self._read(), json.loads(text), *keys), indent=2)
+                elif self.merge is not None:
+                    text = json.dumps(self.merge(self._read(), json.loads(text)), indent=2)
+                with self._timed("write"):
+                    _atomic_write(self.path, text)
+                # If other processes' entries were merged in, let the watcher load them
+                self._known_mtime = _mtime_ns(self.path) if text == ours or not self.watch else None
+        except Exception as e:
+            logger.exception("Failed to write %s: %s", self.path, e)
+
+    async def flush(self) -> None:
+        """Write pending changes now and wait until they are on disk."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._commit()
+        if self._inflight is not None:
+            await asyncio.wrap_future(self._inflight)
+
+    def _check_external(self) -> None:
+        # I/O thread: pick up a write made by another process
+        mtime = _mtime_ns(self.path)
+        if mtime is None or mtime == self._known_mtime or _loop is None:
+            return
+        data = self._read()
+        if data is not None:
+            if self.on_load is not None:
+                data = self.on_load(data)
+            _loop.call_soon_threadsafe(self._apply_external, data, mtime)
+
+    def _apply_external(self, data: Any, mtime: int) -> None:
+        if self._dirty or self._handle is not None or (self._inflight is not None and not self._inflight.done()):
+            return  # our pending write wins; it will be re-checked after it lands
+        self._data = data
+        self._known_mtime = mtime
+        logger.info("Reloaded %s after an external change", self.path)
+
+
+def _poll_watched() -> None:
+    for doc in _documents:
+        if doc.watch and doc._data is not None:
+            doc._check_external()
+
+
+def preload() -> None:
+    """Load every registered document; call before the event loop starts."""
+    for doc in _documents:
+        if doc._data is None:
+            doc.load()
+
+
+def start(loop: asyncio.AbstractEventLoop) -> None:
+    """Enable reloading of watched documents on ``loop``."""
+    global _loop
+    _loop = loop
+    if any(doc.watch for doc in _documents):
+        _io.submit(lambda: None)
+
+
+def flush_all() -> None:
+    """Blocking flush for shutdown, after the event loop has stopped."""
+    try:
+        _io.drain()
+    except Exception as e:
+        logger.warning("Persistence thread did not drain: %s", e)
+    for doc in _documents:
+        if doc._handle is not None:
+            doc._handle.cancel()
+            doc._handle = None
+        if doc._dirty:
+            doc._write(*doc._snapshot())
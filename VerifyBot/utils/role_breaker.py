@@ -0,0 +1,74 @@
+"""
+Circuit breaker for role edits that Discord rejects with 403 Forbidden.
+
+A Forbidden on (guild, role) usually means the bot's top role is below the
+role or it lacks Manage Roles, so every further attempt fails the same way.
+The first one opens the breaker: later attempts are skipped without a REST
+call, and the caller is told to notify the admins once. The breaker closes
+when the guild's roles or the bot's own roles change, or when a probe (one
+attempt let through every ROLE_BREAKER_PROBE_S, doubling up to an hour)
+succeeds.
+"""
+import logging
+import os
+import time
+from typing import Dict, Tuple
+
+from utils.metrics import ROLE_BREAKERS_OPEN
+
+logger = logging.getLogger(__name__)
+
+ROLE_BREAKER_PROBE_S = float(os.getenv("ROLE_BREAKER_PROBE_S", "300"))
+MAX_PROBE_S = 3600.0
+
+
+class _Trip:
+    __slots__ = ("retry_at", "interval")
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.retry_at = time.monotonic() + interval
+
+
+class RoleBreaker:
+    def __init__(self, probe_after_s: float = ROLE_BREAKER_PROBE_S):
+        self.probe_after_s = probe_after_s
+        self._open: Dict[Tuple[int, int], _Trip] = {}
+
+    def allow(self, guild_id: int, role_id: int) -> bool:
+        """False while the breaker is open, except for one probe per interval."""
+        trip = self._open.get((guild_id, role_id))
+        if trip is None:
+            return True
+        now = time.monotonic()
+        if now < trip.retry_at:
+            return False
+        # Half-open: let this attempt through and hold the rest until it reports back
+        trip.interval = min(trip.interval * 2, MAX_PROBE_S)
+        trip.retry_at = now + trip.interval
+        return True
+
+    def success(self, guild_id: int, role_id: int) -> None:
+        if self._open.pop((guild_id, role_id), None) is not None:
+            logger.info("Role breaker closed for role %s in guild %s", role_id, guild_id)
+
+    def forbidden(self, guild_id: int, role_id: int) -> bool:
+        """Record a 403. Returns True only when this opens the breaker (notify once)."""
+        key = (guild_id, role_id)
+        if key in self._open:
+            return False
+        self._open[key] = _Trip(self.probe_after_s)
+        logger.warning("Role breaker opened for role %s in guild %s after 403 Forbidden", role_id, guild_id)
+        return True
+
+    def reset_guild(self, guild_id: int) -> None:
+        for key in [k for k in self._open if k[0] == guild_id]:
+            del self._open[key]
+            logger.info("Role breaker reset for role %s in guild %s", key[1], guild_id)
+
+    def open_count(self) -> int:
+        return len(self._open)
+
+
+role_breaker = RoleBreaker()
+ROLE_BREAKERS_OPEN.set_function(role_breaker.open_count)
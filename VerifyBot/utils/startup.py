@@ -0,0 +1,64 @@
+"""
+Startup profiling.
+
+Records how long each startup phase took, measured from process start:
+module imports, each cog load, gateway connect and ready. The breakdown is
+logged once, on the first on_ready. For a per-module import breakdown run
+the bot with ``python -X importtime bot.py``.
+"""
+import os
+import time
+from typing import List, Tuple
+
+
+def _process_age_s() -> float:
+    """Seconds since this process was created (0.0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def rss_mb() -> float:
+    """Current resident set size in MiB (0.0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class StartupProfile:
+    def __init__(self):
+        self.origin = time.monotonic() - _process_age_s()
+        self._last = self.origin
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        """Close the phase that ends now; it started at the previous mark."""
+        now = time.monotonic()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.origin
+
+    def report(self) -> str:
+        parts = ", ".join(f"{name} {secs * 1000:.0f}ms" for name, secs in self.phases)
+        return f"{parts}; total {self.elapsed():.2f}s"
+
+
+PROFILE = StartupProfile()
+
+
+def mark_once(phase: str) -> bool:
+    """Mark ``phase`` unless it was already recorded (gateway reconnects re-fire events)."""
+    if any(name == phase for name, _ in PROFILE.phases):
+        return False
+    PROFILE.mark(phase)
+    return True
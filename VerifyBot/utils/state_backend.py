@@ -0,0 +1,227 @@
+import abc
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", os.path.join("data", "state.sqlite3"))
+# UPDATE ... RETURNING needs SQLite 3.35+; older libraries use a short transaction instead
+SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+class StateBackend(abc.ABC):
+    """
+    Key-value store for short-lived verification state (challenges, attempt
+    counters, click cooldowns). Values are strings; every key may carry a TTL.
+    Workers that share a backend see each other's state, so a click and the
+    matching modal submit can land on different processes.
+    """
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: str, ttl_s: Optional[float] = None) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def set_nx(self, key: str, value: str, ttl_s: Optional[float] = None) -> bool:
+        """Set only if the key is absent (or expired). Returns True if it was set."""
+
+    @abc.abstractmethod
+    async def incr(self, key: str, amount: int = 1) -> Optional[int]:
+        """Atomically add to an integer value. Returns the new value, or None if the key is missing."""
+
+    @abc.abstractmethod
+    async def delete(self, *keys: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def count(self, prefix: str) -> int:
+        ...
+
+    @abc.abstractmethod
+    async def purge_expired(self) -> int:
+        ...
+
+
+class InMemoryBackend(StateBackend):
+    """Process-local backend; the default for a single worker."""
+
+    def __init__(self):
+        self._store: Dict[str, Tuple[str, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[str]:
+        item = self._store.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self._store[key]
+            return None
+        return value
+
+    @staticmethod
+    def _expiry(ttl_s: Optional[float]) -> Optional[float]:
+        return time.time() + ttl_s if ttl_s else None
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._live(key)
+
+    async def set(self, key: str, value: str, ttl_s: Optional[float] = None) -> None:
+        self._store[key] = (value, self._expiry(ttl_s))
+
+    async def set_nx(self, key: str, value: str, ttl_s: Optional[float] = None) -> bool:
+        if self._live(key) is not None:
+            return False
+        self._store[key] = (value, self._expiry(ttl_s))
+        return True
+
+    async def incr(self, key: str, amount: int = 1) -> Optional[int]:
+        value = self._live(key)
+        if value is None:
+            return None
+        new = int(value) + amount
+        self._store[key] = (str(new), self._store[key][1])
+        return new
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._store.pop(key, None)
+
+    async def count(self, prefix: str) -> int:
+        now = time.time()
+        return sum(1 for k, (_, exp) in self._store.items() if k.startswith(prefix) and (exp is None or exp > now))
+
+    async def purge_expired(self) -> int:
+        now = time.time()
+        expired = [k for k, (_, exp) in self._store.items() if exp is not None and exp <= now]
+        for k in expired:
+            del self._store[k]
+        return len(expired)
+
+
+class SQLiteBackend(StateBackend):
+    """
+    Shared backend on a local SQLite file (WAL mode), for several workers on one
+    host. Statements run on a dedicated thread so they never block the event loop;
+    each operation is a single statement, which SQLite executes atomically.
+    """
+
+    def __init__(self, path: str = STATE_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor.submit(self._connect).result()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS kv_expires ON kv(expires_at)")
+        self._conn = conn
+        logger.info("SQLite state backend at %s", self.path)
+
+    async def _run(self, sql: str, params: tuple = ()):
+        def work():
+            return self._conn.execute(sql, params)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, work)
+
+    async def _fetchone(self, sql: str, params: tuple = ()):
+        def work():
+            return self._conn.execute(sql, params).fetchone()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, work)
+
+    @staticmethod
+    def _expiry(ttl_s: Optional[float]) -> Optional[float]:
+        return time.time() + ttl_s if ttl_s else None
+
+    async def get(self, key: str) -> Optional[str]:
+        row = await self._fetchone(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        )
+        return row[0] if row else None
+
+    async def set(self, key: str, value: str, ttl_s: Optional[float] = None) -> None:
+        await self._run(
+            "INSERT INTO kv(key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, value, self._expiry(ttl_s)),
+        )
+
+    async def set_nx(self, key: str, value: str, ttl_s: Optional[float] = None) -> bool:
+        def work():
+            cur = self._conn.execute(
+                "INSERT INTO kv(key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE kv.expires_at IS NOT NULL AND kv.expires_at <= ?",
+                (key, value, self._expiry(ttl_s), time.time()),
+            )
+            return cur.rowcount == 1
+        return await asyncio.get_running_loop().run_in_executor(self._executor, work)
+
+    async def incr(self, key: str, amount: int = 1) -> Optional[int]:
+        def work():
+            params = (amount, key, time.time())
+            if SQLITE_HAS_RETURNING:
+                # fetchall() steps the statement to completion so the write commits here.
+                rows = self._conn.execute(
+                    "UPDATE kv SET value = CAST(value AS INTEGER) + ? "
+                    "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?) RETURNING value",
+                    params,
+                ).fetchall()
+                return int(rows[0][0]) if rows else None
+            # BEGIN IMMEDIATE takes the write lock first, so no other worker can step in between
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self._conn.execute(
+                    "UPDATE kv SET value = CAST(value AS INTEGER) + ? "
+                    "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                    params,
+                )
+                row = self._conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone() if cur.rowcount else None
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return int(row[0]) if row else None
+        return await asyncio.get_running_loop().run_in_executor(self._executor, work)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._run(f"DELETE FROM kv WHERE key IN ({','.join('?' * len(keys))})", keys)
+
+    async def count(self, prefix: str) -> int:
+        row = await self._fetchone(
+            "SELECT COUNT(*) FROM kv WHERE key >= ? AND key < ? AND (expires_at IS NULL OR expires_at > ?)",
+            (prefix, prefix + "\uffff", time.time()),
+        )
+        return int(row[0])
+
+    async def purge_expired(self) -> int:
+        cur = await self._run("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        return cur.rowcount
+
+
+_backend: Optional[StateBackend] = None
+
+
+def get_backend() -> StateBackend:
+    global _backend
+    if _backend is None:
+        if STATE_BACKEND == "sqlite":
+            _backend = SQLiteBackend(STATE_DB_PATH)
+        else:
+            if STATE_BACKEND != "memory":
+                logger.warning("Unknown STATE_BACKEND '%s'; using in-memory state", STATE_BACKEND)
+            _backend = InMemoryBackend()
+    return _backend